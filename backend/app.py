@@ -8,12 +8,21 @@ from dotenv import load_dotenv
 from flask import Flask, jsonify
 from flask_cors import CORS
 from marshmallow import ValidationError
+from werkzeug.exceptions import HTTPException
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Import extensions explicitly
-from extensions import db, jwt, limiter
+from extensions import db, jwt, limiter, metrics, response_cache
+from database import create_missing_indexes, load_database_config, register_sqlite_pragmas
 from models import User, Category
 from routes import register_routes
+from routes.assets import MAX_FILE_SIZE, UploadRequest
+from asset_catalog import register_reference_tracking
+from profiling import register_profiler
+from querylog import register_query_log
+
+# 信任前方的 1 层 Nginx（asgi.py 的快速路径也用同一组参数）
+PROXY_FIX_OPTIONS = {"x_for": 1, "x_proto": 1, "x_host": 1, "x_prefix": 1}
 
 def create_app():
     load_dotenv()
@@ -24,15 +33,18 @@ def create_app():
         sys.exit(1)
     
     app = Flask(__name__)
+    # 上传接口边接收边校验、哈希并写盘（见 routes/assets.py 的 UploadStream）
+    app.request_class = UploadRequest
     
     # == 应用 Nginx 反向代理信任修正 ==
     # 信任前方的 1 层 Nginx，使得 get_remote_address 取到真实的客户端 IP，防止全局限流误伤！
-    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
+    app.wsgi_app = ProxyFix(app.wsgi_app, **PROXY_FIX_OPTIONS)
 
     cors_origins = cors_origins_raw.split(",")
     CORS(app, resources={r"/api/*": {"origins": cors_origins}})
     
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///blog.db"
+    # 数据库 URI、连接池与 SQLite PRAGMA（见 database.py）
+    load_database_config(app)
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     
     jwt_secret = os.getenv("JWT_SECRET_KEY")
@@ -49,11 +61,50 @@ def create_app():
     if not os.path.exists(upload_folder):
         os.makedirs(upload_folder)
     app.config['UPLOAD_FOLDER'] = upload_folder
+    app.config["MAX_UPLOAD_SIZE"] = int(os.getenv("MAX_UPLOAD_SIZE", MAX_FILE_SIZE))
+    # NOTE: 不设置全局 MAX_CONTENT_LENGTH，请求体上限只作用于上传接口（见 UploadRequest.max_content_length）
+    app.config["IMAGE_WORKERS"] = int(os.getenv("IMAGE_WORKERS", 2))
+
+    # 公开接口响应缓存
+    app.config["RESPONSE_CACHE_ENABLED"] = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() in ["true", "1", "t"]
+    app.config["RESPONSE_CACHE_MAX_ENTRIES"] = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+    app.config["RESPONSE_CACHE_VERSION_TTL"] = float(os.getenv("RESPONSE_CACHE_VERSION_TTL", 1.0))
+    app.config["RESPONSE_CACHE_ETAG_SALT"] = os.getenv("RESPONSE_CACHE_ETAG_SALT")
+
+    # 限流计数存储：默认放在 instance/ratelimit.db，让所有 worker 共享同一份计数
+    default_ratelimit_uri = f"sqlite:///{os.path.join(app.instance_path, 'ratelimit.db')}"
+    app.config["RATELIMIT_STORAGE_URI"] = os.getenv("RATELIMIT_STORAGE_URI", default_ratelimit_uri)
+    # 压测 / 基准测试时可整体关闭限流（bench/bench_api.py 会这样做），生产环境请保持开启
+    app.config["RATELIMIT_ENABLED"] = os.getenv("RATELIMIT_ENABLED", "True").lower() in ["true", "1", "t"]
+
+    # 性能指标：各 worker 的快照默认写到 instance/metrics，/api/metrics 合并输出
+    app.config["METRICS_ENABLED"] = os.getenv("METRICS_ENABLED", "True").lower() in ["true", "1", "t"]
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN")
+    app.config["METRICS_DIR"] = os.getenv("METRICS_DIR", os.path.join(app.instance_path, "metrics"))
+    app.config["METRICS_FLUSH_INTERVAL"] = float(os.getenv("METRICS_FLUSH_INTERVAL", 5.0))
+
+    # 按请求剖析：管理员用 X-Profile 头或 ?__profile= 触发；PROFILE_SAMPLE_EVERY=N 时每 N 个请求自动采样一次
+    app.config["PROFILE_DIR"] = os.getenv("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+    app.config["PROFILE_SAMPLE_EVERY"] = int(os.getenv("PROFILE_SAMPLE_EVERY", 0))
+    app.config["PROFILE_INTERVAL"] = float(os.getenv("PROFILE_INTERVAL", 0.002))
+    app.config["PROFILE_MAX_FILES"] = int(os.getenv("PROFILE_MAX_FILES", 500))
+
+    # 慢查询日志与 N+1 检测（见 querylog.py）；QUERY_STRICT 让检测到的 N+1 直接抛异常，供测试使用
+    app.config["SLOW_QUERY_MS"] = float(os.getenv("SLOW_QUERY_MS", 200))
+    app.config["QUERY_EXPLAIN"] = os.getenv("QUERY_EXPLAIN", "True").lower() in ["true", "1", "t"]
+    app.config["N_PLUS_ONE_THRESHOLD"] = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
+    app.config["QUERY_STRICT"] = os.getenv("QUERY_STRICT", "False").lower() in ["true", "1", "t"]
 
     # 注册扩展
     db.init_app(app)
+    register_sqlite_pragmas(app)
+    register_query_log(app)
     jwt.init_app(app)
     limiter.init_app(app)
+    response_cache.init_app(app)
+    metrics.init_app(app)
+    # 内容保存时同步维护上传文件的引用索引（见 asset_catalog.py）
+    register_reference_tracking()
 
     # 注册路由
     register_routes(app)
@@ -64,12 +115,18 @@ def create_app():
     # 注册 CLI 命令
     register_cli_commands(app)
 
+    # 剖析中间件包在最外层（见 profiling.py）
+    register_profiler(app)
+
     return app
 
 
 def register_error_handlers(app):
     @app.errorhandler(Exception)
     def handle_exception(e):
+        # 限流触发的 429 等 HTTP 异常原样返回状态码，不当作服务器错误
+        if isinstance(e, HTTPException):
+            return jsonify({"error": e.description}), e.code
         app.logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
         return jsonify({"error": "Internal server error"}), 500
 
@@ -93,9 +150,15 @@ def register_error_handlers(app):
 def register_cli_commands(app):
     import click
     from flask.cli import AppGroup
+    import search
+    import asset_catalog
+    import content_io
 
     db_cli = AppGroup('db')
     admin_cli = AppGroup('admin')
+    search_cli = AppGroup('search')
+    assets_cli = AppGroup('assets')
+    content_cli = AppGroup('content')
 
     @db_cli.command("init")
     def init_db_cmd():
@@ -111,22 +174,199 @@ def register_cli_commands(app):
                 new_cat = Category(slug=slug, name=name)
                 db.session.add(new_cat)
         db.session.commit()
+        search.ensure_index()
+        db.session.commit()
         print("✅ 数据库基础初始化完成！")
 
     @db_cli.command("fix")
     def fix_db_cmd():
         """检查并尝试修复表结构（由原来 fix_db.py 迁移而来）"""
-        from sqlalchemy import text
+        from sqlalchemy import inspect, text
+        had_references = inspect(db.engine).has_table("asset_reference")
         db.create_all()
         inspector = db.session.execute(text("PRAGMA table_info(article)")).fetchall()
         existing_columns = [row[1] for row in inspector]
-        if 'collection_id' not in existing_columns:
-            db.session.execute(text("ALTER TABLE article ADD COLUMN collection_id INTEGER REFERENCES collection(id)"))
+        missing_columns = [
+            ("collection_id", "INTEGER REFERENCES collection(id)"),
+            ("excerpt", "VARCHAR(200)"),
+            ("word_count", "INTEGER NOT NULL DEFAULT 0"),
+            ("reading_time", "INTEGER NOT NULL DEFAULT 0"),
+        ]
+        upgraded = False
+        for column, ddl in missing_columns:
+            if column not in existing_columns:
+                db.session.execute(text(f"ALTER TABLE article ADD COLUMN {column} {ddl}"))
+                upgraded = True
+        if upgraded:
             db.session.commit()
             print("✨ article 表平滑升级成功！旧数据毫发无伤awa！")
+            print("💡 记得再运行一次 flask db backfill-excerpts 为旧文章生成摘要哦~")
         else:
             print("👌 article 表已是最新的结构！")
 
+        for name in create_missing_indexes():
+            print(f"📇 已补建索引：{name}")
+
+        if not had_references:
+            count = asset_catalog.rebuild_references()
+            print(f"🔗 素材引用索引已创建，扫描了 {count} 条内容！")
+
+        from models import Asset
+        if db.session.execute(db.select(Asset.id).limit(1)).first() is None:
+            print("💡 素材表还是空的，运行 flask assets reconcile 把已有的上传文件登记进去吧~")
+
+        if search.ensure_index():
+            count = search.rebuild()
+            print(f"🔍 全文检索索引已创建，并为 {count} 篇文章建立了索引！")
+
+    @db_cli.command("index")
+    def index_db_cmd():
+        """为已有数据库补建模型中声明的索引。"""
+        created = create_missing_indexes()
+        for name in created:
+            print(f"📇 已补建索引：{name}")
+        if not created:
+            print("👌 所有索引都已存在！")
+
+    @db_cli.command("check-plans")
+    def check_plans_cmd():
+        """请求热点接口，检查是否出现整表扫描、以及列表类接口是否读取了文章正文。"""
+        from plan_check import check_query_plans, format_violation
+        violations = check_query_plans(app)
+        if violations:
+            print(f"❌ 发现 {len(violations)} 处执行计划回归：")
+            for violation in violations:
+                print(format_violation(violation))
+            sys.exit(1)
+        print("✅ 热点查询的执行计划全部命中索引！")
+
+    @db_cli.command("backfill-excerpts")
+    @click.option("--batch-size", default=200, show_default=True, help="每批处理并提交的文章数")
+    def backfill_excerpts_cmd(batch_size: int):
+        """为已有文章重新计算摘要、字数与阅读时长。"""
+        from sqlalchemy.orm import undefer
+        from models import Article
+        last_id = 0
+        total = 0
+        while True:
+            batch = db.session.execute(
+                db.select(Article)
+                .options(undefer(Article.content))
+                .where(Article.id > last_id)
+                .order_by(Article.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not batch:
+                break
+            for article in batch:
+                article.refresh_summary()
+            last_id = batch[-1].id
+            total += len(batch)
+            response_cache.bump("articles")
+            db.session.commit()
+            # 释放本批 ORM 对象（含正文），控制长文章较多时的内存占用
+            db.session.expunge_all()
+        print(f"✅ 已为 {total} 篇文章生成摘要！")
+
+    @search_cli.command("rebuild")
+    def rebuild_search_cmd():
+        """清空并重建文章全文检索索引。"""
+        count = search.rebuild()
+        print(f"🔍 已为 {count} 篇文章重建全文检索索引！")
+
+    @assets_cli.command("reconcile")
+    @click.option("--batch-size", default=500, show_default=True, help="每批提交的记录数")
+    def reconcile_assets_cmd(batch_size: int):
+        """同步素材表与上传目录：登记新文件、刷新变化的文件、移除已删除文件的记录。"""
+        db.create_all()
+        result = asset_catalog.reconcile(app.config["UPLOAD_FOLDER"], batch_size=batch_size)
+        print(f"🗂️ 素材表同步完成：新增 {result.added}，更新 {result.updated}，移除 {result.removed}")
+
+    @assets_cli.command("reindex")
+    def reindex_assets_cmd():
+        """按当前内容重建上传文件的引用索引。"""
+        count = asset_catalog.rebuild_references()
+        print(f"🔗 引用索引重建完成，扫描了 {count} 条内容！")
+
+    @assets_cli.command("gc")
+    @click.option("--min-age-hours", default=24.0, show_default=True, help="只回收早于这么多小时之前上传的文件")
+    @click.option("--delete", "do_delete", is_flag=True, help="真正删除；不加时只列出将被删除的文件")
+    def gc_assets_cmd(min_age_hours: float, do_delete: bool):
+        """回收没有被任何文章、画廊、友链或投喂引用的上传文件。"""
+        upload_folder = app.config["UPLOAD_FOLDER"]
+        # 先同步素材表，保证手动放进目录的文件也在回收范围内、已删除的文件不会被重复统计
+        asset_catalog.reconcile(upload_folder)
+        orphans = asset_catalog.find_orphans(min_age_hours * 3600)
+        total_bytes = sum(orphan.size for orphan in orphans)
+        if not orphans:
+            print("👌 没有找到孤儿文件！")
+            return
+        if not do_delete:
+            for orphan in orphans:
+                print(f"  {orphan.path} ({orphan.size // 1024} KB)")
+            print(f"🧹 共 {len(orphans)} 个孤儿文件，{total_bytes / 1024 / 1024:.1f} MB；加上 --delete 才会真正删除哦~")
+            return
+        removed = asset_catalog.delete_orphans(upload_folder, orphans)
+        print(f"🧹 已删除 {removed} 个孤儿文件（连同派生图），释放 {total_bytes / 1024 / 1024:.1f} MB！")
+
+    @content_cli.command("import")
+    @click.argument("source", type=click.Path(exists=True))
+    @click.option("--batch-size", default=500, show_default=True, help="每批写入并提交的记录数")
+    @click.option("--workers", default=8, show_default=True, help="并行读取正文的线程数")
+    def import_content_cmd(source: str, batch_size: int, workers: int):
+        """从目录或归档（.zip / .tar / .tar.gz）幂等导入文章、合集、友链与画廊，不会删除已有数据。"""
+        db.create_all()
+        print(f"📥 正在导入 {os.path.abspath(source)} ...")
+        report = content_io.import_content(source, app.static_folder, batch_size=batch_size, workers=workers)
+        for line in content_io.format_report(report):
+            print(line)
+        print("✅ 导入完成！")
+
+    @content_cli.command("export")
+    @click.argument("target", type=click.Path())
+    @click.option("--batch-size", default=500, show_default=True, help="每批读取的文章数")
+    def export_content_cmd(target: str, batch_size: int):
+        """把文章、合集、友链与画廊导出到目录或归档（按扩展名选择 .zip / .tar / .tar.gz）。"""
+        print(f"📤 正在导出到 {os.path.abspath(target)} ...")
+        report = content_io.export_content(target, app.static_folder, batch_size=batch_size)
+        for line in content_io.format_report(report, exported=True):
+            print(line)
+        print("✅ 导出完成！可以用 flask content import 原样导回~")
+
+    @app.cli.command("serve")
+    @click.option("--bind", default=None, help="监听地址，默认取 GUNICORN_BIND 或 unix:blog.sock")
+    @click.option("--workers", type=int, default=None, help="worker 进程数，默认按 CPU 核数计算")
+    @click.option("--threads", type=int, default=None, help="每个 worker 的线程数")
+    def serve_cmd(bind, workers, threads):
+        """用 gunicorn 启动生产服务器（预加载应用、预热缓存、优雅退出）。"""
+        from serving import warm_up
+        try:
+            from gunicorn.app.base import Application
+        except ImportError:
+            # Windows 没有 gunicorn：退回多线程的 Werkzeug 服务器，仅供本地试用
+            print("⚠️ 没有找到 gunicorn（Windows 不支持），改用 Werkzeug 多线程服务器，请勿用于生产环境！")
+            warmed = warm_up(app)
+            print(f"🔥 已预热 {warmed} 个接口")
+            host, _, port = (bind or "127.0.0.1:5000").rpartition(":")
+            app.run(host=host or "127.0.0.1", port=int(port), threaded=True)
+            return
+
+        class StandaloneApplication(Application):
+            """读取 gunicorn.conf.py，再用命令行参数覆盖，加载的就是当前这个 app。"""
+
+            def load_config(self):
+                self.load_config_from_file(os.path.join(app.root_path, "gunicorn.conf.py"))
+                for key, value in (("bind", bind), ("workers", workers), ("threads", threads)):
+                    if value is not None:
+                        self.cfg.set(key, [value] if key == "bind" else value)
+
+            def load(self):
+                warmed = warm_up(app)
+                print(f"🔥 已预热 {warmed} 个接口")
+                return app
+
+        StandaloneApplication().run()
+
     @admin_cli.command("create")
     def create_admin():
         """创建管理员账户（由老 app.py 迁移而来）。"""
@@ -161,11 +401,26 @@ def register_cli_commands(app):
 
     app.cli.add_command(db_cli)
     app.cli.add_command(admin_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(content_cli)
+
+# --- 全局 app 备用 ---
+# NOTE: 第一次访问 app.app 时才创建（兼容 `gunicorn app:app` 与 `from app import app`），
+#       只导入 create_app 的地方（wsgi.py、flask CLI）不会再多建一个应用实例。
+_app = None
+
+
+def __getattr__(name):
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# --- 生成全局 app 备用 ---
-app = create_app()
 
 if __name__ == "__main__":
     is_debug = os.getenv("FLASK_DEBUG", "False").lower() in ["true", "1", "t"]
     run_port = int(os.getenv("FLASK_PORT", 5000))
-    app.run(debug=is_debug, port=run_port, host="0.0.0.0")
+    create_app().run(debug=is_debug, port=run_port, host="0.0.0.0")
@@ -0,0 +1,222 @@
+"""
+可选的 ASGI 入口：uvicorn asgi:app --workers 2
+
+为什么需要：
+  公开接口绝大多数请求都能命中响应缓存，真正的工作只有几微秒，
+  但在同步 WSGI 下每个慢客户端（尤其是爬虫突发）都会占住一个 worker 线程。
+  ASGI 模式下：
+    1. public_bp / seo_bp 里带 @response_cache.cached 的 GET / HEAD 请求走快速路径：
+       在线程池里跑一个很短的任务——查缓存（含 304），命中后再跑限流与其它 before_request 钩子，
+       不执行视图；线程只占用这几微秒到几毫秒，收发请求与响应都在事件循环里，慢客户端不占线程；
+    2. 其余请求（缓存未命中、后台接口、上传……）完整交给原来的 Flask WSGI 应用，
+       在线程池里执行，行为与 gunicorn 部署完全一致；请求体由线程边读边从事件循环拉取，
+       客户端中途断开时请求直接中止，不会把截断的请求体交给视图。
+
+NOTE: 快速路径与 WSGI 路径一样先经过 ProxyFix，再跑 before_request / after_request 钩子，
+      缓存命中的请求同样计入限流。限流计数与版本快照刷新都会读写 SQLite，
+      所以快速路径放在线程池里执行，绝不在事件循环里阻塞。
+      未命中时不跑 before_request，直接交给 WSGI 路径，保证每个请求只计一次限流。
+      线程池大小由 ASGI_THREADS 控制（默认 8）。
+"""
+
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, Response
+from werkzeug.exceptions import ClientDisconnected, HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app import PROXY_FIX_OPTIONS, create_app
+from extensions import response_cache
+from serving import on_worker_exit, warm_up
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# 走快速路径的蓝图
+FAST_PATH_BLUEPRINTS = ("public", "seo")
+# wsgi.input 的读缓冲大小
+BODY_BUFFER_SIZE = 64 * 1024
+
+
+class _ReceiveStream(io.RawIOBase):
+    """wsgi.input：WSGI 线程读请求体时才从事件循环拉取下一个分片，请求体不会整体攒在内存里。"""
+
+    def __init__(self, receive: Receive, loop: asyncio.AbstractEventLoop) -> None:
+        self._receive = receive
+        self._loop = loop
+        self._chunk = memoryview(b"")
+        self._more_body = True
+        self.disconnected = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._chunk and self._more_body:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message["type"] == "http.disconnect":
+                self.disconnected = True
+                self._more_body = False
+                break
+            self._chunk = memoryview(message.get("body", b""))
+            self._more_body = message.get("more_body", False)
+        if self.disconnected:
+            # 客户端中途断开：让 Werkzeug 中止解析，而不是把截断的请求体当成完整请求处理
+            raise ClientDisconnected()
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+
+def _to_environ(scope: Scope, body: IO[bytes]) -> Dict[str, Any]:
+    """把 ASGI HTTP scope 转成 WSGI environ（PEP 3333）。"""
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server_name),
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        # 请求体以 EOF 结束，大小上限交给 Flask 的 MAX_CONTENT_LENGTH / max_content_length 检查
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name == "CONTENT_LENGTH":
+            environ["CONTENT_LENGTH"] = value
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _call_wsgi(flask_app: Flask, environ: Dict[str, Any]) -> Tuple[int, List[Tuple[str, str]], List[bytes]]:
+    """在线程池里完整执行一次 WSGI 请求，连同流式响应体一起收集。"""
+    captured: Dict[str, Any] = {}
+
+    def start_response(status: str, headers: List[Tuple[str, str]], exc_info: Any = None) -> Callable[[bytes], None]:
+        captured["status"] = int(status.split(" ", 1)[0])
+        captured["headers"] = headers
+        return lambda data: None
+
+    result = flask_app(environ, start_response)
+    try:
+        chunks = [chunk for chunk in result if chunk]
+    finally:
+        close = getattr(result, "close", None)
+        if close is not None:
+            close()
+    return captured["status"], captured["headers"], chunks
+
+
+class AsgiApp:
+    """把 Flask 应用包装成 ASGI 应用：缓存命中走事件循环，其余交给线程池里的 WSGI。"""
+
+    def __init__(self, flask_app: Flask, threads: int) -> None:
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+        # 与 create_app 里包装 wsgi_app 的 ProxyFix 参数相同，只用来改写快速路径的 environ
+        self.proxy_fix = ProxyFix(lambda environ, start_response: [], **PROXY_FIX_OPTIONS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await loop.run_in_executor(self.executor, warm_up, self.flask_app)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await loop.run_in_executor(self.executor, on_worker_exit, self.flask_app)
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        loop = asyncio.get_running_loop()
+        stream = _ReceiveStream(receive, loop)
+        environ = _to_environ(scope, io.BufferedReader(stream, BODY_BUFFER_SIZE))
+        if scope["method"] in ("GET", "HEAD"):
+            resp = await loop.run_in_executor(self.executor, self._cached_response, environ)
+            if resp is not None:
+                await self._send(send, scope, resp.status_code, resp.headers.to_wsgi_list(), [resp.get_data()])
+                return
+
+        status, headers, chunks = await loop.run_in_executor(self.executor, _call_wsgi, self.flask_app, environ)
+        if stream.disconnected:
+            return
+        await self._send(send, scope, status, headers, chunks)
+
+    def _cached_response(self, environ: Dict[str, Any]) -> Optional[Response]:
+        """快速路径：路由匹配到可缓存的公开接口、且缓存可直接作答时返回响应。在线程池里执行。"""
+        # ProxyFix 会原地改写 environ，未命中时交给 WSGI 的仍须是原始 environ
+        fixed = dict(environ)
+        self.proxy_fix(fixed, lambda status, headers, exc_info=None: None)
+
+        adapter = self.flask_app.url_map.bind_to_environ(fixed)
+        try:
+            endpoint, _ = adapter.match()
+        except HTTPException:
+            return None
+        if endpoint.split(".", 1)[0] not in FAST_PATH_BLUEPRINTS:
+            return None
+        view = self.flask_app.view_functions.get(endpoint)
+        resources = getattr(view, "cache_resources", None)
+        if resources is None or getattr(view, "cache_key_func", None) is not None:
+            return None
+
+        with self.flask_app.request_context(fixed):
+            # 版本快照过期时在这里（线程池）刷新，之后的命中都不再等待 WSGI 路径
+            if response_cache.enabled and not response_cache.versions_fresh():
+                response_cache.versions(resources)
+            resp = response_cache.lookup(resources, getattr(view, "cache_params", ()))
+            if resp is None:
+                return None
+            try:
+                rv = self.flask_app.preprocess_request()
+            except Exception as e:
+                rv = self.flask_app.handle_user_exception(e)
+            return self.flask_app.finalize_request(resp if rv is None else rv)
+
+    @staticmethod
+    async def _send(send: Send, scope: Scope, status: int, headers: List[Tuple[str, str]], chunks: List[bytes]) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        })
+        if scope["method"] == "HEAD":
+            chunks = []
+        await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+
+flask_app = create_app()
+# create_app 已加载 .env，之后读取的环境变量才包含其中的配置
+app = AsgiApp(flask_app, threads=int(os.getenv("ASGI_THREADS", 8)))
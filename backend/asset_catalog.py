@@ -0,0 +1,278 @@
+"""
+上传文件目录（Asset 表）的维护
+
+职责：
+  1. 上传成功后登记文件的路径、类型、大小、宽高、哈希与修改时间，
+     素材库列表直接分页查表，不再对上传目录做 scandir + stat。
+  2. reconcile()：把表与磁盘同步（flask assets reconcile），
+     用于升级前已存在的文件、以及绕过接口手动放进 / 删除的文件。
+  3. 引用索引（AssetReference 表）：文章正文、画廊图、友链 / 投喂头像里出现的上传 URL，
+     在每次 flush 时随内容一起更新；find_orphans() 只查这张索引，不再扫描文章正文（flask assets gc）。
+
+NOTE: 表里只登记原图；派生图（imaging.py）和上传中的临时文件（.upload-*）不登记。
+      直接用 Core 语句批量写入内容表时不会触发 flush 事件，需要自行调用 sync_references()。
+"""
+
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import Connection, delete, event, insert, inspect, update
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Article, Artwork, Asset, AssetReference, Friend, Sponsor
+import imaging
+
+# 上传类型，即 UPLOAD_FOLDER 下的子目录
+UPLOAD_TYPES = ("article", "artwork", "friend", "misc")
+
+# 计算哈希时每次读取的字节数
+_CHUNK_SIZE = 64 * 1024
+
+# 内容里的上传文件 URL（带不带域名都只匹配 /static/uploads/... 这一段）
+_UPLOAD_URL = re.compile(r"/static/uploads/(" + "|".join(UPLOAD_TYPES) + r")/([A-Za-z0-9_.\-]+)")
+
+# 需要维护引用索引的模型：模型 -> (引用方类型, 可能包含上传 URL 的列)
+TRACKED_FIELDS: Dict[Any, Tuple[str, Tuple[str, ...]]] = {
+    Article: ("article", ("content",)),
+    Artwork: ("artwork", ("thumbnail", "fullsize")),
+    Friend: ("friend", ("avatar",)),
+    Sponsor: ("sponsor", ("avatar",)),
+}
+
+
+@dataclass
+class ReconcileResult:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def record_upload(upload_folder: str, path: str, upload_type: str, digest: str) -> Asset:
+    """登记（或刷新）一个已落盘的上传文件，由调用方负责 commit。"""
+    rel_path = os.path.relpath(path, upload_folder).replace(os.sep, "/")
+    stat = os.stat(path)
+    width, height = imaging.image_size(path) or (None, None)
+
+    asset = db.session.execute(db.select(Asset).filter_by(path=rel_path)).scalar_one_or_none()
+    if asset is None:
+        asset = Asset(rel_path, upload_type, stat.st_size, digest, stat.st_mtime, width, height)
+        db.session.add(asset)
+    else:
+        asset.size = stat.st_size
+        asset.hash = digest
+        asset.mtime = stat.st_mtime
+        asset.width = width
+        asset.height = height
+    return asset
+
+
+def forget(upload_type: str, filename: str) -> None:
+    """删除文件后移除对应的记录，由调用方负责 commit。"""
+    db.session.execute(delete(Asset).where(Asset.path == f"{upload_type}/{filename}"))
+
+
+def _iter_upload_files(upload_folder: str) -> Iterator[Tuple[str, os.DirEntry]]:
+    for upload_type in UPLOAD_TYPES:
+        directory = os.path.join(upload_folder, upload_type)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.is_file() or imaging.is_derivative(entry.name):
+                    continue
+                yield upload_type, entry
+
+
+def reconcile(upload_folder: str, batch_size: int = 500) -> ReconcileResult:
+    """
+    同步 Asset 表与磁盘：补登记新文件、刷新大小或修改时间变化的文件、删除已不存在的记录。
+
+    NOTE: 大小与 mtime 都没变的文件直接跳过，不重新计算哈希，已登记的大目录只需一次 scandir。
+    """
+    result = ReconcileResult()
+    known: Dict[str, Tuple[int, int, float]] = {
+        path: (asset_id, size, mtime)
+        for asset_id, path, size, mtime in db.session.execute(
+            db.select(Asset.id, Asset.path, Asset.size, Asset.mtime)
+        )
+    }
+    seen = set()
+    pending = 0
+
+    for upload_type, entry in _iter_upload_files(upload_folder):
+        rel_path = f"{upload_type}/{entry.name}"
+        seen.add(rel_path)
+        stat = entry.stat()
+        row = known.get(rel_path)
+        if row and row[1] == stat.st_size and row[2] == stat.st_mtime:
+            continue
+
+        digest = file_digest(entry.path)
+        width, height = imaging.image_size(entry.path) or (None, None)
+        if row:
+            db.session.execute(
+                update(Asset)
+                .where(Asset.id == row[0])
+                .values(size=stat.st_size, hash=digest, mtime=stat.st_mtime, width=width, height=height)
+            )
+            result.updated += 1
+        else:
+            db.session.add(Asset(rel_path, upload_type, stat.st_size, digest, stat.st_mtime, width, height))
+            result.added += 1
+
+        pending += 1
+        if pending >= batch_size:
+            db.session.commit()
+            pending = 0
+
+    stale: List[int] = [row[0] for path, row in known.items() if path not in seen]
+    for start in range(0, len(stale), batch_size):
+        db.session.execute(delete(Asset).where(Asset.id.in_(stale[start:start + batch_size])))
+    result.removed = len(stale)
+
+    db.session.commit()
+    return result
+
+
+# ── 引用索引 ────────────────────────────────────────────────────────────────────
+
+def asset_key(upload_type: str, filename: str) -> str:
+    return f"{upload_type}/{imaging.source_stem(filename)}"
+
+
+def extract_references(*texts: Optional[str]) -> Set[str]:
+    """从若干段文本里找出引用到的上传文件，返回 asset_key 集合。"""
+    keys: Set[str] = set()
+    for text in texts:
+        if text:
+            keys.update(asset_key(upload_type, name) for upload_type, name in _UPLOAD_URL.findall(text))
+    return keys
+
+
+def sync_references(connection: Connection, owner_type: str, rows: Iterable[Tuple[int, Set[str]]]) -> None:
+    """用 rows 里的 (owner_id, asset_key 集合) 覆盖这些内容行原有的引用记录。"""
+    rows = list(rows)
+    if not rows:
+        return
+    owner_ids = [owner_id for owner_id, _ in rows]
+    for start in range(0, len(owner_ids), 500):
+        connection.execute(
+            delete(AssetReference)
+            .where(AssetReference.owner_type == owner_type)
+            .where(AssetReference.owner_id.in_(owner_ids[start:start + 500]))
+        )
+    values = [
+        {"owner_type": owner_type, "owner_id": owner_id, "asset_key": key}
+        for owner_id, keys in rows
+        for key in keys
+    ]
+    if values:
+        connection.execute(insert(AssetReference), values)
+
+
+def _track_references(session: Session, flush_context: Any) -> None:
+    """after_flush：新增、修改、删除的内容行同步更新引用索引（此时新行已经有主键）。"""
+    changed: Dict[str, List[Tuple[int, Set[str]]]] = {}
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tracked = TRACKED_FIELDS.get(type(obj))
+        if tracked is None:
+            continue
+        owner_type, fields = tracked
+        state = inspect(obj)
+        if obj in session.deleted:
+            keys: Set[str] = set()
+        elif obj in session.new or any(state.attrs[f].history.has_changes() for f in fields):
+            # NOTE: 正文是延迟加载列，只有真的被改过（已经在内存里）时才会走到这里读取
+            keys = extract_references(*(getattr(obj, f) for f in fields))
+        else:
+            continue
+        changed.setdefault(owner_type, []).append((obj.id, keys))
+
+    if changed:
+        connection = session.connection()
+        for owner_type, rows in changed.items():
+            sync_references(connection, owner_type, rows)
+
+
+def register_reference_tracking() -> None:
+    if not event.contains(Session, "after_flush", _track_references):
+        event.listen(Session, "after_flush", _track_references)
+
+
+def rebuild_references(batch_size: int = 500) -> int:
+    """清空并按当前内容重建引用索引，返回处理的内容行数。"""
+    connection = db.session.connection()
+    connection.execute(delete(AssetReference))
+    total = 0
+    for model, (owner_type, fields) in TRACKED_FIELDS.items():
+        columns = [getattr(model, f) for f in fields]
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                db.select(model.id, *columns).where(model.id > last_id).order_by(model.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            sync_references(connection, owner_type, ((row[0], extract_references(*row[1:])) for row in rows))
+            last_id = rows[-1][0]
+            total += len(rows)
+    db.session.commit()
+    return total
+
+
+# ── 孤儿文件回收 ────────────────────────────────────────────────────────────────
+
+@dataclass
+class Orphan:
+    id: int
+    path: str
+    size: int
+
+
+def find_orphans(min_age: float) -> List[Orphan]:
+    """
+    找出没有任何内容引用、且修改时间早于 min_age 秒之前的已登记文件。
+
+    NOTE: 刚上传还没保存进文章的图片也「没有引用」，min_age 就是留给它们的宽限期。
+    """
+    referenced = set(db.session.execute(db.select(AssetReference.asset_key).distinct()).scalars())
+    cutoff = time.time() - min_age
+    rows = db.session.execute(
+        db.select(Asset.id, Asset.path, Asset.size).where(Asset.mtime < cutoff).order_by(Asset.id)
+    ).all()
+    return [
+        Orphan(asset_id, path, size)
+        for asset_id, path, size in rows
+        if asset_key(*path.split("/", 1)) not in referenced
+    ]
+
+
+def delete_orphans(upload_folder: str, orphans: List[Orphan], batch_size: int = 500) -> int:
+    """删除孤儿文件（连同派生图）与其登记记录，返回删除的原图数。"""
+    removed = 0
+    for start in range(0, len(orphans), batch_size):
+        batch = orphans[start:start + batch_size]
+        for orphan in batch:
+            path = os.path.join(upload_folder, *orphan.path.split("/"))
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            imaging.remove_derivatives(path)
+        db.session.execute(delete(Asset).where(Asset.id.in_([orphan.id for orphan in batch])))
+        db.session.commit()
+    return removed
@@ -0,0 +1,648 @@
+"""
+后端接口基准测试
+
+在临时 SQLite 库里生成指定规模的合成站点数据，然后分三个阶段测量：
+  1. client-cold：关闭响应缓存，用 Flask 测试客户端逐个请求 public / seo 的每个路由，
+     记录延迟与每请求 SQL 条数（N+1 会直接体现在 queries 上）；
+  2. client-warm：打开响应缓存重复同样的请求，再跑一遍后台写接口（增 / 改 / 删）；
+  3. http：用 flask serve（gunicorn，Windows 上为 Werkzeug）启动真实服务器，
+     多线程长连接并发压测公开接口，记录吞吐与延迟分布。
+结果以 JSON 输出；指定 --baseline 时与上一次结果对比，p50 / p99 变慢超过阈值或 SQL 条数增加即以退出码 1 结束，
+可以直接放进 CI。
+
+用法（在 backend 目录下）：
+    python bench/bench_api.py --size small
+    python bench/bench_api.py --size medium --output bench-medium.json
+    python bench/bench_api.py --size medium --baseline bench-medium.json --threshold 0.2
+    python bench/bench_api.py --size large --db /tmp/bench-large.db --no-http   # 保留库，下次直接复用
+
+NOTE: 压测期间通过 RATELIMIT_ENABLED=False 关闭限流，否则几秒内就会被 5000/hour 的全局限额拦下。
+      造数会先 drop_all 清空整个库，写阶段也会改动数据：--db 指向的库已有数据、却不是本脚本生成的
+      （没有 bench_marker 标记表）时直接拒绝运行，确认可以覆盖时加 --force。
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不统计峰值内存
+    resource = None
+
+from bench_search import _fake_text, _percentile  # noqa: E402
+
+# 各规模的数据量
+SIZES: Dict[str, Dict[str, int]] = {
+    "small": {"articles": 100, "collections": 5, "artworks": 200, "contributions": 365,
+              "friends": 30, "sponsors": 30, "plans": 20},
+    "medium": {"articles": 10_000, "collections": 100, "artworks": 2_000, "contributions": 1_500,
+               "friends": 200, "sponsors": 200, "plans": 50},
+    "large": {"articles": 100_000, "collections": 500, "artworks": 5_000, "contributions": 3_650,
+              "friends": 500, "sponsors": 500, "plans": 100},
+}
+
+CATEGORIES = (("frontend", "技术手记"), ("topics", "奇怪杂谈"), ("novels", "幻想物语"))
+
+# 合成正文的模板数：正文从模板池里轮流取，摘要 / 字数只需对每个模板算一次
+BODY_TEMPLATES = 200
+
+# 每个路由取样的文章 / 合集数（缓存按 URL 区分，样本太多 warm 阶段就测不到命中）
+SAMPLE_KEYS = 10
+
+# 爬虫 UA：seo 蓝图的文章 / 分类页只对爬虫返回 meta HTML
+BOT_UA = "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
+
+# 对比基线时，绝对差值小于该毫秒数的变化视为噪声
+NOISE_FLOOR_MS = 0.5
+
+# 标记「本脚本生成的基准库」的表；不在 models 里，drop_all 不会删掉它
+MARKER_TABLE = "bench_marker"
+
+# ── 造数 ─────────────────────────────────────────────────────────────────────
+
+
+def _prepare_env(db_path: str, work_dir: str) -> None:
+    """create_app 从环境变量读取配置：指向基准库，关闭限流，指标快照放进临时目录。"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("CORS_ORIGINS", "http://localhost")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-" + "x" * 40)
+    os.environ["RATELIMIT_ENABLED"] = "False"
+    os.environ["RATELIMIT_STORAGE_URI"] = "memory://"
+    os.environ["METRICS_DIR"] = os.path.join(work_dir, "metrics")
+
+
+def seed(app: Any, counts: Dict[str, int], rng: random.Random, length: int) -> Dict[str, Any]:
+    """用 executemany 批量写入合成数据，返回各表行数与耗时。"""
+    from extensions import db
+    from models import Article, Artwork, Category, Collection, Contribution, Friend, Plan, Sponsor, User
+    import search
+
+    started = time.perf_counter()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(db.insert(Category), [{"slug": s, "name": n} for s, n in CATEGORIES])
+        novels_id = len(CATEGORIES)
+
+        db.session.execute(db.insert(Collection), [
+            {"slug": f"saga-{i}", "name": f"合集 {i}", "description": _fake_text(rng, 60), "category_id": novels_id}
+            for i in range(counts["collections"])
+        ])
+
+        # 摘要、字数与阅读时长按模板预先算好，和 Article.refresh_summary() 的结果一致
+        templates = []
+        for _ in range(BODY_TEMPLATES):
+            body = f"# {_fake_text(rng, 12)}\n\n{_fake_text(rng, length)}"
+            probe = Article("probe", "probe", "2000-01-01", body, 1)
+            templates.append((body, probe.excerpt, probe.word_count, probe.reading_time))
+
+        first_day = date(2015, 1, 1)
+        batch: List[Dict[str, Any]] = []
+        for i in range(counts["articles"]):
+            body, excerpt, word_count, reading_time = templates[i % BODY_TEMPLATES]
+            # 三分之一进合集（连载），其余平均分给技术与杂谈
+            in_collection = counts["collections"] and i % 3 == 2
+            batch.append({
+                "slug": f"post-{i}",
+                "uid": f"{i:08x}",
+                "title": _fake_text(rng, rng.randint(6, 24)),
+                "date": (first_day + timedelta(days=i % 4000)).isoformat(),
+                "content": body,
+                "category_id": novels_id if in_collection else 1 + i % 2,
+                "collection_id": 1 + i % counts["collections"] if in_collection else None,
+                "excerpt": excerpt,
+                "word_count": word_count,
+                "reading_time": reading_time,
+            })
+            if len(batch) == 5000:
+                db.session.execute(db.insert(Article), batch)
+                batch.clear()
+        if batch:
+            db.session.execute(db.insert(Article), batch)
+
+        db.session.execute(db.insert(Artwork), [
+            {"title": f"作品 {i}", "thumbnail": f"https://img.example.com/t/{i}.webp",
+             "fullsize": f"https://img.example.com/f/{i}.png", "description": _fake_text(rng, 40),
+             "date": (first_day + timedelta(days=i)).isoformat()}
+            for i in range(counts["artworks"])
+        ])
+        today = date.today()
+        db.session.execute(db.insert(Contribution), [
+            {"date": (today - timedelta(days=i)).isoformat(), "count": rng.randint(1, 12)}
+            for i in range(counts["contributions"])
+        ])
+        db.session.execute(db.insert(Friend), [
+            {"name": f"友链 {i}", "desc": _fake_text(rng, 30), "url": f"https://friend{i}.example.com",
+             "avatar": f"https://friend{i}.example.com/avatar.png", "tags": ["博客", "技术"]}
+            for i in range(counts["friends"])
+        ])
+        db.session.execute(db.insert(Sponsor), [
+            {"name": f"投喂 {i}", "message": _fake_text(rng, 30), "date": today.isoformat()}
+            for i in range(counts["sponsors"])
+        ])
+        db.session.execute(db.insert(Plan), [
+            {"content": _fake_text(rng, 20), "status": "todo", "update_date": today.isoformat(), "sort_order": i}
+            for i in range(counts["plans"])
+        ])
+        admin = User("bench")
+        admin.set_password("bench")
+        db.session.add(admin)
+        db.session.execute(db.text(f"CREATE TABLE IF NOT EXISTS {MARKER_TABLE} (created_at TEXT NOT NULL)"))
+        db.session.execute(db.text(f"INSERT INTO {MARKER_TABLE} (created_at) VALUES (datetime('now'))"))
+        db.session.commit()
+
+        search.rebuild()
+
+    return {"seconds": round(time.perf_counter() - started, 2), "rows": counts}
+
+
+def _is_bench_db(app: Any) -> bool:
+    """库是空的，或者带有本脚本造数时写入的标记表。"""
+    from sqlalchemy import inspect
+    from extensions import db
+
+    with app.app_context():
+        tables = inspect(db.engine).get_table_names()
+    return not tables or MARKER_TABLE in tables
+
+
+def _seeded_counts(app: Any) -> Optional[Dict[str, int]]:
+    """已有的基准库里各表的行数（表不存在时返回 None）。"""
+    from sqlalchemy import inspect
+    from extensions import db
+    from models import Article, Artwork
+
+    with app.app_context():
+        if not inspect(db.engine).has_table("article"):
+            return None
+        return {
+            "articles": db.session.execute(db.select(db.func.count(Article.id))).scalar_one(),
+            "artworks": db.session.execute(db.select(db.func.count(Artwork.id))).scalar_one(),
+        }
+
+
+# ── 请求场景 ─────────────────────────────────────────────────────────────────
+
+
+def read_requests(app: Any, rng: random.Random) -> List[Tuple[str, str]]:
+    """public / seo 蓝图每个路由的 (标签, URL) 列表，路径参数从库里抽样。"""
+    from extensions import db
+    from models import Article, Category, Collection
+    from routes.seo import SITEMAP_MAX_URLS
+
+    with app.app_context():
+        total = db.session.execute(db.select(db.func.count(Article.id))).scalar_one()
+        articles = db.session.execute(
+            db.select(Category.slug, Article.slug).join(Category, Article.category_id == Category.id)
+            .order_by(db.func.random()).limit(SAMPLE_KEYS)
+        ).all()
+        collections = db.session.execute(
+            db.select(Collection.slug).order_by(db.func.random()).limit(SAMPLE_KEYS)
+        ).scalars().all()
+
+    requests: List[Tuple[str, str]] = [
+        ("GET /api/articles/index", "/api/articles/index"),
+        ("GET /api/friends", "/api/friends"),
+        ("GET /api/sponsors", "/api/sponsors"),
+        ("GET /api/artworks", "/api/artworks"),
+        ("GET /api/artworks?limit=50", "/api/artworks?limit=50"),
+        ("GET /api/contributions", "/api/contributions"),
+        ("GET /api/plans", "/api/plans"),
+        ("GET /sitemap.xml", "/sitemap.xml"),
+    ]
+    requests += [("GET /api/article/<category>/<slug>", f"/api/article/{c}/{s}") for c, s in articles]
+    requests += [("GET /api/collection/<slug>", f"/api/collection/{s}") for s in collections]
+    requests += [("GET /api/collection/<slug>?limit=20", f"/api/collection/{s}?limit=20") for s in collections]
+    requests += [("GET /api/search", f"/api/search?q={quote(q)}") for q in ("发展", "Vue", "sqlite index", "不存在的词汇组合")]
+    requests += [("GET /articles/<category>/<slug> (bot)", f"/articles/{c}/{s}") for c, s in articles]
+    requests += [("GET /articles/<category> (bot)", f"/articles/{c}") for c, _ in CATEGORIES]
+    if total > SITEMAP_MAX_URLS:
+        requests.append(("GET /sitemap-<n>.xml", "/sitemap-1.xml"))
+    rng.shuffle(requests)
+    return requests
+
+
+def _check_coverage(app: Any, urls: List[str]) -> List[str]:
+    """找出 public / seo 蓝图里没有被任何请求覆盖到的端点。"""
+    adapter = app.url_map.bind("localhost")
+    covered = set()
+    for url in urls:
+        try:
+            endpoint, _ = adapter.match(url.split("?", 1)[0])
+            covered.add(endpoint)
+        except Exception:
+            continue
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint.split(".")[0] in ("public", "seo")}
+    return sorted(endpoints - covered)
+
+
+def write_cycle(i: int) -> List[Tuple[str, str, str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    一轮后台写操作：(标签, 方法, URL, JSON, 从响应里取 id 的字段) 列表，
+    URL 里的 {id} 由上一步创建接口返回的 id 填充。
+    """
+    slug = f"bench-write-{i}-{random.randrange(1 << 30)}"
+    article = {"slug": slug, "title": "基准测试", "category": "frontend", "content": "# 标题\n\n正文 " * 50}
+    return [
+        ("POST /api/articles (new)", "POST", "/api/articles", {**article, "isNew": True}, None),
+        ("POST /api/articles (update)", "POST", "/api/articles", {**article, "title": "改过的标题"}, None),
+        ("DELETE /api/articles/<slug>", "DELETE", f"/api/articles/{slug}", None, None),
+        ("POST /api/admin/collections", "POST", "/api/admin/collections",
+         {"slug": slug, "name": "合集", "category": "novels"}, None),
+        ("PUT /api/admin/collections/<slug>", "PUT", f"/api/admin/collections/{slug}", {"name": "改名"}, None),
+        ("DELETE /api/admin/collections/<slug>", "DELETE", f"/api/admin/collections/{slug}", None, None),
+        ("POST /api/friends", "POST", "/api/friends", {"name": "友链", "url": "https://friend.example.com"}, "friend"),
+        ("PUT /api/friends/<id>", "PUT", "/api/friends/{id}", {"name": "友链2", "url": "https://friend.example.com"}, None),
+        ("DELETE /api/friends/<id>", "DELETE", "/api/friends/{id}", None, None),
+        ("POST /api/artworks", "POST", "/api/artworks",
+         {"thumbnail": "https://img.example.com/t.webp", "fullsize": "https://img.example.com/f.png"}, "artwork"),
+        ("PUT /api/artworks/<id>", "PUT", "/api/artworks/{id}",
+         {"title": "新标题", "thumbnail": "https://img.example.com/t.webp", "fullsize": "https://img.example.com/f.png"}, None),
+        ("DELETE /api/artworks/<id>", "DELETE", "/api/artworks/{id}", None, None),
+        ("POST /api/sponsors", "POST", "/api/sponsors", {"name": "投喂"}, "sponsor"),
+        ("PUT /api/sponsors/<id>", "PUT", "/api/sponsors/{id}", {"name": "投喂2"}, None),
+        ("DELETE /api/sponsors/<id>", "DELETE", "/api/sponsors/{id}", None, None),
+        ("POST /api/admin/plans", "POST", "/api/admin/plans", {"content": "计划"}, ""),
+        ("PUT /api/admin/plans/<id>", "PUT", "/api/admin/plans/{id}", {"status": "done"}, None),
+        ("DELETE /api/admin/plans/<id>", "DELETE", "/api/admin/plans/{id}", None, None),
+    ]
+
+
+# ── 统计 ─────────────────────────────────────────────────────────────────────
+
+
+def summarize(samples: List[float], queries: Optional[List[int]] = None) -> Dict[str, Any]:
+    """毫秒样本 → 延迟分布；queries 为每个请求的 SQL 条数。"""
+    stats: Dict[str, Any] = {
+        "count": len(samples),
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(_percentile(samples, 99), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+    if queries is not None:
+        stats["queries"] = max(queries)
+    return stats
+
+
+class QueryCounter:
+    """统计 with 块内执行的 SQL 条数。"""
+
+    def __init__(self, engine: Any) -> None:
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args: Any) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        from sqlalchemy import event
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        from sqlalchemy import event
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def run_client_reads(app: Any, requests: List[Tuple[str, str]], iterations: int, cached: bool) -> Dict[str, Any]:
+    from extensions import db, response_cache
+
+    response_cache.enabled = cached
+    response_cache.clear()
+    client = app.test_client()
+    with app.app_context():
+        engine = db.engine
+
+    samples: Dict[str, List[float]] = {}
+    queries: Dict[str, List[int]] = {}
+    statuses: Dict[str, int] = {}
+    if cached:
+        # 先各请求一次填满缓存，warm 阶段只测命中
+        for _, url in requests:
+            client.get(url, headers={"User-Agent": BOT_UA}).get_data()
+    for _ in range(iterations):
+        for label, url in requests:
+            with QueryCounter(engine) as counter:
+                t0 = time.perf_counter()
+                resp = client.get(url, headers={"User-Agent": BOT_UA})
+                resp.get_data()
+                elapsed = (time.perf_counter() - t0) * 1000
+            samples.setdefault(label, []).append(elapsed)
+            queries.setdefault(label, []).append(counter.count)
+            statuses[label] = resp.status_code
+    response_cache.enabled = True
+
+    return {
+        label: {**summarize(samples[label], queries[label]), "status": statuses[label]}
+        for label in sorted(samples)
+    }
+
+
+def run_client_writes(app: Any, iterations: int) -> Dict[str, Any]:
+    from flask_jwt_extended import create_access_token
+    from extensions import db
+
+    with app.app_context():
+        token = create_access_token(identity="1")
+        engine = db.engine
+    headers = {"Authorization": f"Bearer {token}"}
+    client = app.test_client()
+
+    samples: Dict[str, List[float]] = {}
+    queries: Dict[str, List[int]] = {}
+    failures: Dict[str, int] = {}
+    for i in range(iterations):
+        created_id: Any = None
+        for label, method, url, payload, id_field in write_cycle(i):
+            with QueryCounter(engine) as counter:
+                t0 = time.perf_counter()
+                resp = client.open(url.format(id=created_id), method=method, json=payload, headers=headers)
+                elapsed = (time.perf_counter() - t0) * 1000
+            if resp.status_code != 200:
+                failures[label] = failures.get(label, 0) + 1
+                continue
+            samples.setdefault(label, []).append(elapsed)
+            queries.setdefault(label, []).append(counter.count)
+            if id_field is not None:
+                body = resp.get_json()
+                created_id = (body[id_field] if id_field else body)["id"]
+
+    report = {label: summarize(samples[label], queries[label]) for label in sorted(samples)}
+    for label, count in failures.items():
+        report.setdefault(label, {})["failures"] = count
+    return report
+
+
+# ── HTTP 压测 ────────────────────────────────────────────────────────────────
+
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: Optional[int], log_path: str) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "flask", "--app", "app", "serve", "--bind", f"127.0.0.1:{port}"]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    log = open(log_path, "w", encoding="utf-8")
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, stdout=log, stderr=subprocess.STDOUT)
+
+    # 服务器启动时会预热缓存，大库可能需要一段时间
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited early, see {log_path}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"Server did not start in time, see {log_path}")
+
+
+def run_http_load(host: str, port: int, requests: List[Tuple[str, str]], duration: float, concurrency: int) -> Dict[str, Any]:
+    """多个线程各持一条长连接，在 duration 秒内轮流请求 requests。"""
+    samples: Dict[str, List[float]] = {}
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def _worker(offset: int) -> None:
+        nonlocal errors
+        local: List[Tuple[str, float]] = []
+        local_errors = 0
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        i = offset
+        while time.monotonic() < deadline:
+            label, url = requests[i % len(requests)]
+            i += 1
+            try:
+                t0 = time.perf_counter()
+                conn.request("GET", url, headers={"User-Agent": BOT_UA, "Accept-Encoding": "gzip, br"})
+                resp = conn.getresponse()
+                resp.read()
+                elapsed = (time.perf_counter() - t0) * 1000
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            if resp.status >= 500 or resp.status == 429:
+                local_errors += 1
+            local.append((label, elapsed))
+        conn.close()
+        with lock:
+            errors += local_errors
+            for label, elapsed in local:
+                samples.setdefault(label, []).append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=_worker, args=(n * 7,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(v) for v in samples.values())
+    every = [ms for v in samples.values() for ms in v]
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "overall": summarize(every) if every else {},
+        "routes": {label: summarize(samples[label]) for label in sorted(samples)},
+    }
+
+
+# ── 基线对比 ─────────────────────────────────────────────────────────────────
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """返回回归项说明；延迟按比例比较（带噪声下限），SQL 条数只要增加就算回归。"""
+    regressions: List[str] = []
+    for phase in ("client-cold", "client-warm", "client-writes"):
+        for label, base in baseline.get(phase, {}).items():
+            cur = current.get(phase, {}).get(label)
+            if not cur or "p50_ms" not in base or "p50_ms" not in cur:
+                continue
+            for key in ("p50_ms", "p99_ms"):
+                if cur[key] > base[key] * (1 + threshold) and cur[key] - base[key] > NOISE_FLOOR_MS:
+                    regressions.append(f"{phase} {label}: {key} {base[key]} → {cur[key]}")
+            if cur.get("queries", 0) > base.get("queries", 0):
+                regressions.append(f"{phase} {label}: queries {base.get('queries')} → {cur['queries']}")
+
+    base_rps = baseline.get("http", {}).get("throughput_rps")
+    cur_rps = current.get("http", {}).get("throughput_rps")
+    if base_rps and cur_rps and cur_rps < base_rps * (1 - threshold):
+        regressions.append(f"http: throughput_rps {base_rps} → {cur_rps}")
+    return regressions
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """本进程的峰值常驻内存（KB）。"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return int(rss / 1024) if sys.platform == "darwin" else int(rss)
+
+
+def _process_tree_peak_rss_kb(pid: int) -> Optional[Dict[str, int]]:
+    """
+    服务器进程树（master + 各 worker）的峰值常驻内存：取 /proc 里的 VmHWM，只支持 Linux。
+
+    NOTE: 不用 RUSAGE_CHILDREN：Linux 的 ru_maxrss 会跨 exec 保留，子进程的值至少等于 fork 时父进程的内存。
+    """
+    if not os.path.isdir(f"/proc/{pid}"):
+        return None
+    peaks: List[int] = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status", "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peaks.append(int(line.split()[1]))
+            with open(f"/proc/{current}/task/{current}/children", "r", encoding="utf-8") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    if not peaks:
+        return None
+    return {"max_process": max(peaks), "total": sum(peaks), "processes": len(peaks)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="后端接口基准测试")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small", help="合成数据规模")
+    parser.add_argument("--articles", type=int, help="覆盖该规模下的文章数")
+    parser.add_argument("--length", type=int, default=400, help="每篇正文字数")
+    parser.add_argument("--db", help="基准库路径；已存在且文章数一致时直接复用，不再造数")
+    parser.add_argument("--iterations", type=int, default=20, help="client 阶段每个请求重复的次数")
+    parser.add_argument("--write-iterations", type=int, default=10, help="后台写操作的轮数")
+    parser.add_argument("--no-http", action="store_true", help="跳过真实服务器压测")
+    parser.add_argument("--duration", type=float, default=10.0, help="HTTP 压测时长（秒）")
+    parser.add_argument("--concurrency", type=int, default=16, help="HTTP 压测并发连接数")
+    parser.add_argument("--workers", type=int, help="服务器 worker 数，默认按 CPU 核数")
+    parser.add_argument("--output", help="结果 JSON 的保存路径（同时输出到标准输出）")
+    parser.add_argument("--baseline", help="上一次的结果 JSON，用于回归对比")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定为回归的变慢比例")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="--db 不是本脚本生成的库时也清空重建")
+    args = parser.parse_args()
+
+    counts = dict(SIZES[args.size])
+    if args.articles is not None:
+        counts["articles"] = args.articles
+    rng = random.Random(args.seed)
+
+    work_dir = tempfile.mkdtemp(prefix="blog-bench-")
+    db_path = os.path.abspath(args.db) if args.db else os.path.join(work_dir, "bench.db")
+    _prepare_env(db_path, work_dir)
+
+    from app import create_app
+    app = create_app()
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "size": args.size,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "iterations": args.iterations,
+        },
+    }
+    try:
+        owned = _is_bench_db(app)
+        if not owned and not args.force:
+            print(f"❌ {db_path} 已有数据且不是本脚本生成的基准库，拒绝清空重建；确认可以覆盖时加 --force", file=sys.stderr)
+            sys.exit(2)
+        # 不是本脚本生成的库（--force）一律重新造数，不按行数复用
+        existing = _seeded_counts(app) if owned else None
+        if existing and existing["articles"] == counts["articles"]:
+            report["seed"] = {"seconds": 0, "reused": db_path, "rows": existing}
+        else:
+            print(f"🌱 正在生成 {args.size} 规模的数据（{counts['articles']} 篇文章）...", file=sys.stderr)
+            report["seed"] = seed(app, counts, rng, args.length)
+        # WAL 模式下刚写入的数据还在 -wal 文件里
+        report["meta"]["db_bytes"] = sum(
+            os.path.getsize(path) for path in (db_path, f"{db_path}-wal") if os.path.exists(path)
+        )
+
+        requests = read_requests(app, rng)
+        uncovered = _check_coverage(app, [url for _, url in requests])
+        if uncovered:
+            print(f"⚠️ 以下端点没有被基准覆盖：{', '.join(uncovered)}", file=sys.stderr)
+        report["meta"]["uncovered_endpoints"] = uncovered
+
+        print("⏱️ client-cold：关闭响应缓存...", file=sys.stderr)
+        report["client-cold"] = run_client_reads(app, requests, args.iterations, cached=False)
+        print("⏱️ client-warm：打开响应缓存...", file=sys.stderr)
+        report["client-warm"] = run_client_reads(app, requests, args.iterations, cached=True)
+        print("⏱️ client-writes：后台写接口...", file=sys.stderr)
+        report["client-writes"] = run_client_writes(app, args.write_iterations)
+        report["meta"]["bench_peak_rss_kb"] = _peak_rss_kb()
+
+        if not args.no_http:
+            # 写阶段的数据已提交，服务器进程看到的是同一个库
+            port = _free_port()
+            print(f"🚀 http：启动服务器并压测 {args.duration:g} 秒...", file=sys.stderr)
+            server = start_server(port, args.workers, os.path.join(work_dir, "server.log"))
+            try:
+                report["http"] = run_http_load("127.0.0.1", port, requests, args.duration, args.concurrency)
+                report["meta"]["server_peak_rss_kb"] = _process_tree_peak_rss_kb(server.pid)
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ 发现 {len(regressions)} 项性能回归（阈值 {args.threshold:.0%}）：", file=sys.stderr)
+            for line in regressions:
+                print(f"   - {line}", file=sys.stderr)
+            sys.exit(1)
+        print("✅ 与基线相比没有性能回归", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
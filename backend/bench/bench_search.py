@@ -0,0 +1,114 @@
+"""
+全文检索基准测试
+
+在临时 SQLite 库里生成合成语料（默认 10 万篇中英混排文章），
+测量 FTS 索引构建吞吐与典型查询的延迟分布。直接复用 search.py 的
+建表语句、分词与查询 SQL，测到的就是线上实际执行的那几条语句。
+
+用法（在 backend 目录下）：
+    python bench/bench_search.py
+    python bench/bench_search.py --count 20000 --length 400 --queries 300
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from search import FTS_DDL, FTS_TABLE, SEARCH_SQL, SNIPPET_TOKENS, build_match_query, segment  # noqa: E402
+
+# 常用汉字 + 一些技术词，拼出「像样」的中英混排正文
+_HANZI = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经"
+    "十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理世车"
+)
+_WORDS = ["Vue", "Flask", "SQLite", "Python", "Proxy", "cache", "index", "nginx", "gunicorn", "markdown", "router", "pinia"]
+
+# 覆盖：常见双字词、长短语、单字（高频命中）、英文前缀、中英混合、无结果
+_QUERIES = ["发展", "社会", "工业生产", "理", "Vue", "sqlite index", "发展 Python", "gunicorn nginx", "不存在的词汇组合"]
+
+
+def _fake_text(rng: random.Random, length: int) -> str:
+    parts = []
+    while sum(len(p) for p in parts) < length:
+        if rng.random() < 0.15:
+            parts.append(f" {rng.choice(_WORDS)} ")
+        else:
+            parts.append("".join(rng.choices(_HANZI, k=rng.randint(2, 12))))
+            parts.append(rng.choice("，。、；"))
+    return "".join(parts)[:length]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FTS5 全文检索基准测试")
+    parser.add_argument("--count", type=int, default=100_000, help="合成文章数")
+    parser.add_argument("--length", type=int, default=600, help="每篇正文字数")
+    parser.add_argument("--queries", type=int, default=200, help="每个查询词执行的次数")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        conn.execute(FTS_DDL)
+
+        # 只计入写索引的时间，不计合成语料本身的开销
+        build_seconds = 0.0
+        batch = []
+        for rowid in range(1, args.count + 1):
+            batch.append((rowid, segment(_fake_text(rng, 20)), segment(_fake_text(rng, args.length))))
+            if len(batch) == 1000 or rowid == args.count:
+                t0 = time.perf_counter()
+                conn.executemany(f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (?, ?, ?)", batch)
+                build_seconds += time.perf_counter() - t0
+                batch.clear()
+        t0 = time.perf_counter()
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        conn.commit()
+        build_seconds += time.perf_counter() - t0
+
+        report = {
+            "articles": args.count,
+            "length": args.length,
+            "build_seconds": round(build_seconds, 3),
+            "build_articles_per_second": round(args.count / build_seconds, 1),
+            "db_bytes": os.path.getsize(os.path.join(tmp, "bench.db")),
+            "queries": {},
+        }
+        for query in _QUERIES:
+            match = build_match_query(query)
+            samples = []
+            hits = 0
+            for _ in range(args.queries):
+                # sqlite3 同样支持 :name 参数风格，SEARCH_SQL 可原样执行
+                t0 = time.perf_counter()
+                rows = conn.execute(
+                    SEARCH_SQL, {"match": match, "limit": 21, "offset": 0, "snippet_tokens": SNIPPET_TOKENS}
+                ).fetchall()
+                samples.append((time.perf_counter() - t0) * 1000)
+                hits = len(rows)
+            report["queries"][query] = {
+                "hits": hits,
+                "p50_ms": round(statistics.median(samples), 3),
+                "p99_ms": round(_percentile(samples, 99), 3),
+            }
+        conn.close()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
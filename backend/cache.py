@@ -0,0 +1,359 @@
+"""
+公开接口响应缓存
+
+职责：
+  1. 以「资源」为粒度维护版本号（content_version 表），后台写接口在提交前调用
+     bump() 让对应资源版本 +1，版本号与业务数据同一事务提交。
+  2. 公开只读接口用 @response_cache.cached(...) 装饰，命中时直接返回预序列化的
+     响应字节，不再查询 SQLite、不再走序列化。
+  3. 每个响应都带上由版本号推导的强 ETag 与 Last-Modified，
+     If-None-Match / If-Modified-Since 命中时直接 304，连缓存条目都不用取。
+  4. 条目写入时一次性预压缩出 gzip / br 变体，按 Accept-Encoding 协商后直接返回压缩字节，
+     压缩只在内容变化后发生一次，而不是每个请求一次。
+
+NOTE: 版本号存放在数据库而不是进程内，是为了让多个 gunicorn worker 之间也能正确失效。
+      每个进程只会按 RESPONSE_CACHE_VERSION_TTL 的间隔读取一次版本表（一条极小的查询），
+      本进程内的写操作提交后会立刻丢弃版本快照，保证「自己写完马上能读到」。
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import Flask, Response, g, make_response, request
+from werkzeug.http import http_date
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，缺失时只提供 gzip
+    brotli = None
+
+# 可被缓存 / 失效的资源名
+RESOURCES = ("articles", "friends", "sponsors", "artworks", "contributions", "plans")
+
+# 小于该字节数的响应不压缩（压缩头的开销比省下的还多）
+COMPRESS_MIN_SIZE = 1024
+
+
+@dataclass
+class CacheEntry:
+    """一条预序列化的响应"""
+    versions: Tuple[int, ...]
+    body: bytes
+    status: int
+    content_type: Optional[str]
+    # Content-Encoding -> 预压缩后的字节
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """按资源版本失效的进程内响应缓存（LRU）。"""
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self.max_entries = 1024
+        self.version_ttl = 1.0
+        self.etag_salt = ""
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 版本快照：resource -> (version, updated_at)
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._versions_loaded_at = 0.0
+        self._table_checked = False
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = bool(app.config.get("RESPONSE_CACHE_ENABLED", True))
+        self.max_entries = int(app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+        self.version_ttl = float(app.config.get("RESPONSE_CACHE_VERSION_TTL", 1.0))
+        self.etag_salt = app.config.get("RESPONSE_CACHE_ETAG_SALT") or _source_digest(app.root_path)
+
+        # 监听器挂在全局 Session 类上，多次 create_app 也只注册一次
+        if not event.contains(Session, "after_commit", _drop_version_snapshot):
+            event.listen(Session, "after_commit", _drop_version_snapshot)
+        if not event.contains(Session, "after_rollback", _forget_bump):
+            event.listen(Session, "after_rollback", _forget_bump)
+
+    # ── 版本号 ──────────────────────────────────────────────────────────────────
+
+    def _ensure_table(self) -> None:
+        """老数据库没有 content_version 表时自动补建（每个进程只检查一次）。"""
+        if self._table_checked:
+            return
+        from extensions import db
+        from models import ContentVersion
+        ContentVersion.__table__.create(db.engine, checkfirst=True)  # type: ignore[attr-defined]
+        self._table_checked = True
+
+    def versions_fresh(self) -> bool:
+        """版本快照是否仍在 TTL 内（此时读取版本号不会访问数据库）。"""
+        return time.monotonic() - self._versions_loaded_at < self.version_ttl
+
+    def _load_versions(self) -> Dict[str, Tuple[int, float]]:
+        now = time.monotonic()
+        if now - self._versions_loaded_at < self.version_ttl:
+            return self._versions
+
+        from extensions import db
+        from models import ContentVersion
+        self._ensure_table()
+        rows = db.session.execute(
+            db.select(ContentVersion.resource, ContentVersion.version, ContentVersion.updated_at)
+        ).all()
+        self._versions = {resource: (version, updated_at) for resource, version, updated_at in rows}
+        self._versions_loaded_at = now
+        return self._versions
+
+    def versions(self, resources: Tuple[str, ...]) -> Tuple[int, ...]:
+        """取若干资源当前的版本号（缺失视为 0）。"""
+        snapshot = self._load_versions()
+        return tuple(snapshot.get(r, (0, 0.0))[0] for r in resources)
+
+    def last_modified(self, resources: Tuple[str, ...]) -> float:
+        """若干资源中最近一次写入的时间戳（从未写入过为 0）。"""
+        snapshot = self._load_versions()
+        return max((snapshot.get(r, (0, 0.0))[1] for r in resources), default=0.0)
+
+    def etag(self, key: str, versions: Tuple[int, ...]) -> str:
+        """由缓存键 + 版本号 + 代码摘要推导出的强 ETag（不含引号）。"""
+        raw = f"{self.etag_salt}|{key}|{','.join(map(str, versions))}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=10).hexdigest()
+
+    def bump(self, *resources: str) -> None:
+        """
+        在当前事务里把资源版本号 +1。
+
+        NOTE: 必须在 db.session.commit() 之前调用，版本号与业务数据一起提交；
+              事务回滚时版本号也随之回滚，不会产生多余的失效。
+        """
+        from extensions import db
+        from models import ContentVersion
+
+        unknown = set(resources) - set(RESOURCES)
+        if unknown:
+            raise ValueError(f"Unknown cache resources: {sorted(unknown)}")
+
+        self._ensure_table()
+        now = time.time()
+        for resource in resources:
+            stmt = sqlite_insert(ContentVersion).values(resource=resource, version=1, updated_at=now)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ContentVersion.resource],
+                set_={"version": ContentVersion.version + 1, "updated_at": now},
+            )
+            db.session.execute(stmt)
+        db.session.info["response_cache_bumped"] = self
+
+    # ── 响应条目 ────────────────────────────────────────────────────────────────
+
+    def get(self, key: str, versions: Tuple[int, ...]) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.versions != versions:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._versions_loaded_at = 0.0
+
+    # ── 装饰器 ──────────────────────────────────────────────────────────────────
+
+    def cached(
+        self,
+        *resources: str,
+        params: Tuple[str, ...] = (),
+        key_func: Optional[Callable[[], Optional[str]]] = None,
+    ) -> Callable[[Callable[..., Any]], Callable[..., Response]]:
+        """
+        缓存视图函数的 200 响应，直到 resources 中任一资源版本号变化。
+
+        params 是视图会读取的查询参数，key_func 默认使用「路径 + 这些参数」，
+        其余查询参数不进入缓存键，随意拼接的参数不会挤占 LRU；key_func 返回 None 表示本次请求不走缓存。
+        """
+        unknown = set(resources) - set(RESOURCES)
+        if unknown:
+            raise ValueError(f"Unknown cache resources: {sorted(unknown)}")
+
+        def decorator(view: Callable[..., Any]) -> Callable[..., Response]:
+            @wraps(view)
+            def wrapper(*args: Any, **kwargs: Any) -> Response:
+                if not self.enabled:
+                    return make_response(view(*args, **kwargs))
+
+                key = key_func() if key_func else cache_key(params)
+                if key is None:
+                    return make_response(view(*args, **kwargs))
+
+                # 先读版本再执行视图：即使执行期间有写入，条目的版本号也只会偏旧，不会偏新
+                versions = self.versions(resources)
+                etag = self.etag(key, versions)
+                last_modified = self.last_modified(resources)
+
+                if _not_modified(etag, last_modified):
+                    g.response_cache = "not_modified"
+                    return _with_validators(Response(status=304), etag, last_modified, None)
+
+                entry = self.get(key, versions)
+                g.response_cache = "miss" if entry is None else "hit"
+                if entry is None:
+                    resp = make_response(view(*args, **kwargs))
+                    if resp.status_code != 200:
+                        return resp
+                    # 流式响应（如 sitemap）在这里被一次性收集，之后都从缓存字节返回
+                    body = resp.get_data()
+                    entry = CacheEntry(
+                        versions=versions,
+                        body=body,
+                        status=resp.status_code,
+                        content_type=resp.content_type,
+                        encoded=compress_variants(body),
+                    )
+                    self.set(key, entry)
+
+                return _render(entry, etag, last_modified)
+
+            # 供 asgi.py 的快速路径识别：不执行视图、直接查缓存
+            wrapper.cache_resources = resources  # type: ignore[attr-defined]
+            wrapper.cache_params = params  # type: ignore[attr-defined]
+            wrapper.cache_key_func = key_func  # type: ignore[attr-defined]
+            return wrapper
+        return decorator
+
+    def lookup(self, resources: Tuple[str, ...], params: Tuple[str, ...] = ()) -> Optional[Response]:
+        """
+        在请求上下文里只查缓存、不执行视图，也不访问数据库：
+        版本快照仍新鲜且命中条目（或满足条件请求）时返回响应，否则返回 None，由调用方走正常流程。
+        """
+        if not self.enabled or not self.versions_fresh():
+            return None
+        key = cache_key(params)
+        versions = self.versions(resources)
+        etag = self.etag(key, versions)
+        last_modified = self.last_modified(resources)
+
+        if _not_modified(etag, last_modified):
+            g.response_cache = "not_modified"
+            return _with_validators(Response(status=304), etag, last_modified, None)
+        entry = self.get(key, versions)
+        if entry is None:
+            return None
+        g.response_cache = "hit"
+        return _render(entry, etag, last_modified)
+
+
+def _drop_version_snapshot(session: Session) -> None:
+    # 本进程刚提交了版本号变更：下一次读取立即刷新快照
+    cache = session.info.pop("response_cache_bumped", None)
+    if cache is not None:
+        cache._versions_loaded_at = 0.0
+
+
+def _forget_bump(session: Session) -> None:
+    session.info.pop("response_cache_bumped", None)
+
+
+def cache_key(params: Tuple[str, ...]) -> str:
+    """默认缓存键：路径 + 视图接受的查询参数（按参数名排序，同名参数保留原有顺序）。"""
+    query = urlencode([(name, value) for name in sorted(params) for value in request.args.getlist(name)])
+    return f"{request.path}?{query}"
+
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    """预先算好各个 Content-Encoding 的压缩结果；压缩后反而更大的变体直接丢弃。"""
+    if len(body) < COMPRESS_MIN_SIZE:
+        return {}
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=9)
+    return {enc: data for enc, data in variants.items() if len(data) < len(body)}
+
+
+def negotiate_encoding(entry: CacheEntry, accept_encoding: Any) -> Optional[str]:
+    """从条目已有的压缩变体里挑客户端接受、且体积最小的一个；都不接受时返回 None。"""
+    best: Optional[str] = None
+    for enc in ("br", "gzip"):
+        if enc in entry.encoded and accept_encoding.quality(enc) > 0:
+            if best is None or len(entry.encoded[enc]) < len(entry.encoded[best]):
+                best = enc
+    return best
+
+
+def _render(entry: CacheEntry, etag: str, last_modified: float) -> Response:
+    encoding = negotiate_encoding(entry, request.accept_encodings)
+    body = entry.encoded[encoding] if encoding else entry.body
+    resp = Response(body, status=entry.status, content_type=entry.content_type)
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    return _with_validators(resp, etag, last_modified, encoding)
+
+
+def _not_modified(etag: str, last_modified: float) -> bool:
+    """按 RFC 9110 的顺序判断条件请求：有 If-None-Match 时忽略 If-Modified-Since。"""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if request.if_none_match:
+        # 压缩变体的 ETag 带有 -gzip / -br 后缀，三者对应同一份内容
+        candidates = [etag] + [f"{etag}-{enc}" for enc in ("gzip", "br")]
+        return any(request.if_none_match.contains_weak(tag) for tag in candidates)
+    if request.if_modified_since and last_modified:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def _with_validators(resp: Response, etag: str, last_modified: float, encoding: Optional[str]) -> Response:
+    # 强 ETag 必须区分字节级不同的表示，所以压缩变体带上编码后缀
+    resp.set_etag(f"{etag}-{encoding}" if encoding else etag)
+    if last_modified:
+        resp.headers["Last-Modified"] = http_date(int(last_modified))
+    # 允许浏览器缓存，但每次使用前都要带上验证器回源确认（命中时只回一个 304）
+    resp.headers["Cache-Control"] = "public, no-cache"
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+def _source_digest(root_path: str) -> str:
+    """
+    对路由与模型源码取摘要，作为 ETag 的默认盐。
+
+    NOTE: 数据没变但接口输出格式随代码更新变了时，ETag 也必须跟着变，
+          否则客户端会拿着旧格式的缓存收到 304。同一次部署的所有 worker 算出的值相同。
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    paths = [os.path.join(root_path, "models.py")]
+    routes_dir = os.path.join(root_path, "routes")
+    if os.path.isdir(routes_dir):
+        paths += sorted(os.path.join(routes_dir, n) for n in os.listdir(routes_dir) if n.endswith(".py"))
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            continue
+    return digest.hexdigest()
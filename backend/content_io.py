@@ -0,0 +1,644 @@
+"""
+内容批量导入 / 导出（flask content import|export）
+
+目录或归档的布局与 frontend/legacy_data 一致，老的示例数据可以直接导入：
+  article/index.json          {分类 slug: [{id, uid, title, date, content: "/article/<分类>/<文件>.md", collection?}]}
+  article/<分类>/<文件>.md    正文
+  article/meta.json           （可选）分类名称与连载合集：{"categories": {slug: 名称}, "collections": [...]}
+  friends/index.json          {"friends": [...]}，示例头像放在 friends/ 下
+  artwork/index.json          {"artworks": [...]}，示例图片放在 artwork/ 下
+
+导入：
+  1. 幂等：分类 / 合集 / 文章按 slug、友链按名称、画廊按原图地址匹配已有记录，内容没变的行直接跳过，
+     同一份数据重复导入不会产生任何写入；源里没有的记录不会被删除。
+  2. 正文由线程池并行读取并计算摘要 / 字数 / 阅读时长，与上一批的数据库写入重叠进行；
+     每批（batch_size 行）用 executemany 插入 / 按主键更新，一个事务提交。
+  3. 全文检索索引、素材引用索引与响应缓存版本号在同一事务里维护（Core 语句不会触发 flush 事件）。
+导出：按 id 分批流式读出，写入目录或 .zip / .tar / .tar.gz 归档，结果可以原样再导入。
+
+NOTE: 上传目录（static/uploads）不在导出范围内，请单独备份；
+      友链 / 画廊引用的 /static/friends、/static/artwork 下的示例图片会随内容一起导出与导入。
+"""
+
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+
+from extensions import db, response_cache
+from models import Article, Artwork, Category, Collection, Friend, summarize
+import asset_catalog
+import search
+
+# legacy_data 里分类 slug 对应的默认名称（article/meta.json 里没有写名称时使用）
+CATEGORY_NAMES: Dict[str, str] = {
+    "frontend": "技术手记",
+    "topics": "奇怪杂谈",
+    "novels": "幻想物语",
+    "tools": "工具箱",
+}
+
+ARTICLE_INDEX = "article/index.json"
+ARTICLE_META = "article/meta.json"
+FRIENDS_INDEX = "friends/index.json"
+ARTWORKS_INDEX = "artwork/index.json"
+
+# 随内容一起导入 / 导出的示例图片目录（相对 static 目录）
+IMAGE_DIRS = ("friends", "artwork")
+
+# 单条 IN (...) 查询里的最大参数个数
+_IN_CHUNK = 500
+
+# 可以直接用作正文文件名的 slug
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_.\-]+$")
+
+Log = Callable[[str], None]
+
+
+@dataclass
+class TableStats:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+
+@dataclass
+class TransferReport:
+    tables: Dict[str, TableStats] = field(default_factory=dict)
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    def table(self, name: str) -> TableStats:
+        return self.tables.setdefault(name, TableStats())
+
+
+# ── 数据源 / 目标 ───────────────────────────────────────────────────────────────
+
+def _clean_path(path: str) -> Optional[str]:
+    """
+    把源里的相对路径（归档成员名、index.json 里的正文路径）规整成 a/b/c 形式。
+
+    绝对路径、盘符、反斜杠以及 .. 越出根目录的路径一律返回 None，防止导入时读写根目录以外的文件。
+    """
+    if not path or "\\" in path or "\0" in path:
+        return None
+    normalized = posixpath.normpath(path.lstrip("/"))
+    if normalized in (".", "") or normalized.startswith("../") or normalized == ".." or ":" in normalized.split("/", 1)[0]:
+        return None
+    return normalized
+
+
+def _within(root: str, path: str) -> Optional[str]:
+    """root 下的相对路径 path 对应的绝对路径；解析（含符号链接）后落在 root 之外时返回 None。"""
+    clean = _clean_path(path)
+    if clean is None:
+        return None
+    real_root = os.path.realpath(root)
+    full = os.path.realpath(os.path.join(real_root, *clean.split("/")))
+    if os.path.commonpath([real_root, full]) != real_root:
+        return None
+    return full
+
+
+class DirectorySource:
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+
+    def read(self, path: str) -> Optional[bytes]:
+        full = _within(self.root, path)
+        if full is None or not os.path.isfile(full):
+            return None
+        with open(full, "rb") as f:
+            return f.read()
+
+    def files(self, prefix: str) -> Iterator[str]:
+        base = os.path.join(self.root, prefix)
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                yield os.path.relpath(os.path.join(dirpath, filename), self.root).replace(os.sep, "/")
+
+    def close(self) -> None:
+        pass
+
+
+class ZipSource:
+    """
+    .zip 归档；允许所有内容都套在一层顶级目录里（例如直接打包 legacy_data/）。
+
+    NOTE: 成员读取共用一个文件句柄，这里加锁串行解压；解码与摘要计算仍在线程池里并行。
+    """
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._zip = zipfile.ZipFile(path)
+        # 成员名规整后作为键，越出根目录的成员直接忽略
+        members = {}
+        for name in self._zip.namelist():
+            clean = _clean_path(name)
+            if clean is not None and not name.endswith("/"):
+                members[clean] = name
+        prefix = _detect_prefix(list(members))
+        self._names = {n[len(prefix):]: name for n, name in members.items() if n.startswith(prefix)}
+
+    def read(self, path: str) -> Optional[bytes]:
+        clean = _clean_path(path)
+        name = self._names.get(clean) if clean else None
+        if name is None:
+            return None
+        with self._lock:
+            return self._zip.read(name)
+
+    def files(self, prefix: str) -> Iterator[str]:
+        return (n for n in list(self._names) if n.startswith(prefix + "/"))
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+class TarSource(DirectorySource):
+    """
+    .tar / .tar.gz 归档：先顺序解压到临时目录，再按目录并行读取。
+
+    NOTE: gzip 流不能随机访问，线程池乱序读取成员时每次回退都要从头解压，
+          一次性顺序解压反而快得多；临时目录在 close() 时删除。
+    """
+
+    def __init__(self, path: str) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="content-import-")
+        with tarfile.open(path, "r:*") as tar:
+            tar.extractall(self._tmp.name, filter="data")
+            names = [m.name.removeprefix("./") for m in tar.getmembers() if m.isfile()]
+        super().__init__(os.path.join(self._tmp.name, _detect_prefix(names)))
+
+    def close(self) -> None:
+        self._tmp.cleanup()
+
+
+def _detect_prefix(names: List[str]) -> str:
+    """找到 article/、friends/、artwork/ 所在的目录前缀（归档根目录时为空串）。"""
+    for index in (ARTICLE_INDEX, FRIENDS_INDEX, ARTWORKS_INDEX):
+        for name in sorted(names, key=len):
+            if name == index or name.endswith("/" + index):
+                return name[: len(name) - len(index)]
+    return ""
+
+
+def open_source(path: str) -> Any:
+    if os.path.isdir(path):
+        return DirectorySource(path)
+    if zipfile.is_zipfile(path):
+        return ZipSource(path)
+    if tarfile.is_tarfile(path):
+        return TarSource(path)
+    raise ValueError(f"Unsupported content source: {path}")
+
+
+class DirectorySink:
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def write(self, path: str, data: bytes) -> None:
+        full = os.path.join(self.root, *path.split("/"))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as f:
+            f.write(data)
+
+    def close(self) -> None:
+        pass
+
+
+class ZipSink:
+    def __init__(self, path: str) -> None:
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+
+    def write(self, path: str, data: bytes) -> None:
+        self._zip.writestr(path, data)
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+class TarSink:
+    def __init__(self, path: str) -> None:
+        mode = "w:gz" if path.endswith((".tar.gz", ".tgz")) else "w"
+        self._tar = tarfile.open(path, mode)
+
+    def write(self, path: str, data: bytes) -> None:
+        info = tarfile.TarInfo(path)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self) -> None:
+        self._tar.close()
+
+
+def open_sink(path: str) -> Any:
+    if path.endswith(".zip"):
+        return ZipSink(path)
+    if path.endswith((".tar", ".tar.gz", ".tgz")):
+        return TarSink(path)
+    return DirectorySink(path)
+
+
+# ── 导入 ────────────────────────────────────────────────────────────────────────
+
+def import_content(source_path: str, static_folder: str, batch_size: int = 500, workers: int = 8, log: Log = print) -> TransferReport:
+    """从目录或归档导入分类、合集、文章、友链与画廊（需要在 app_context 里调用）。"""
+    started = time.perf_counter()
+    report = TransferReport()
+    source = open_source(source_path)
+    try:
+        _import_images(source, static_folder, report)
+        index = _read_json(source, ARTICLE_INDEX, report) or {}
+        meta = _read_json(source, ARTICLE_META, report) or {}
+        category_ids, collection_ids = _import_taxonomy(index, meta, report)
+        _import_articles(source, index, category_ids, collection_ids, report, batch_size, workers, log)
+        _import_friends(source, report, batch_size)
+        _import_artworks(source, report, batch_size)
+    finally:
+        source.close()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _read_json(source: Any, path: str, report: TransferReport) -> Optional[Any]:
+    data = source.read(path)
+    if data is None:
+        return None
+    report.files += 1
+    report.bytes += len(data)
+    return json.loads(data.decode("utf-8"))
+
+
+def _static_path(path: Optional[str]) -> Optional[str]:
+    """legacy_data 里的 /friends/xxx 改成 /static/friends/xxx；外链与已是 /static 的地址原样保留。"""
+    if not path or path.startswith("/static") or "://" in path or path.startswith("data:"):
+        return path
+    return f"/static/{path.lstrip('/')}"
+
+
+def _import_images(source: Any, static_folder: str, report: TransferReport) -> None:
+    """把示例图片复制到 static 目录；已存在且大小相同的文件跳过。"""
+    for sub in IMAGE_DIRS:
+        for path in source.files(sub):
+            if path.endswith(".json"):
+                continue
+            target = _within(static_folder, path)
+            if target is None:
+                continue
+            data = source.read(path)
+            if data is None or (os.path.isfile(target) and os.path.getsize(target) == len(data)):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+            report.files += 1
+            report.bytes += len(data)
+
+
+def _upsert(model: Any, key: str, rows: List[Dict[str, Any]], stats: TableStats) -> Tuple[Dict[Any, int], List[Tuple[int, Dict[str, Any]]]]:
+    """
+    按 key 列匹配已有记录：新行 executemany 插入，有变化的行按主键批量更新，没变的行跳过。
+
+    返回 (key -> id, 本次写入的 [(id, 行)])；受引用索引跟踪的模型顺带同步引用记录。
+    """
+    # 同一批里 key 重复时以最后一行为准
+    rows = list({row[key]: row for row in rows}.values())
+    if not rows:
+        return {}, []
+    columns = list(rows[0])
+    key_column = getattr(model, key)
+    existing: Dict[Any, Any] = {}
+    keys = [row[key] for row in rows]
+    for start in range(0, len(keys), _IN_CHUNK):
+        for row in db.session.execute(
+            db.select(model.id, *(getattr(model, c) for c in columns)).where(key_column.in_(keys[start:start + _IN_CHUNK]))
+        ).mappings():
+            existing[row[key]] = row
+
+    ids: Dict[Any, int] = {}
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    for row in rows:
+        old = existing.get(row[key])
+        if old is None:
+            inserts.append(row)
+        elif any(old[c] != row[c] for c in columns):
+            updates.append({"id": old["id"], **row})
+            ids[row[key]] = old["id"]
+        else:
+            ids[row[key]] = old["id"]
+            stats.unchanged += 1
+
+    changed: List[Tuple[int, Dict[str, Any]]] = [(row["id"], row) for row in updates]
+    if updates:
+        db.session.execute(update(model), updates)
+        stats.updated += len(updates)
+    if inserts:
+        for new_id, new_key in db.session.execute(insert(model).returning(model.id, key_column), inserts):
+            ids[new_key] = new_id
+        changed.extend((ids[row[key]], row) for row in inserts)
+        stats.inserted += len(inserts)
+
+    tracked = asset_catalog.TRACKED_FIELDS.get(model)
+    if tracked and changed:
+        owner_type, fields = tracked
+        asset_catalog.sync_references(
+            db.session.connection(), owner_type,
+            ((row_id, asset_catalog.extract_references(*(row.get(f) for f in fields))) for row_id, row in changed),
+        )
+    return ids, changed
+
+
+def _import_taxonomy(index: Dict[str, Any], meta: Dict[str, Any], report: TransferReport) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """导入分类与合集，返回 slug -> id。"""
+    names: Dict[str, str] = meta.get("categories", {})
+    slugs = list(dict.fromkeys([slug for slug, items in index.items() if isinstance(items, list)] + list(names)))
+
+    started = time.perf_counter()
+    stats = report.table("categories")
+    category_ids, _ = _upsert(Category, "slug", [
+        {"slug": slug, "name": names.get(slug) or CATEGORY_NAMES.get(slug, slug.capitalize())}
+        for slug in slugs
+    ], stats)
+    category_ids.update(
+        db.session.execute(db.select(Category.slug, Category.id)).all()
+    )
+    stats.seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    stats = report.table("collections")
+    rows = []
+    for item in meta.get("collections", []):
+        category_id = category_ids.get(item.get("category"))
+        if not item.get("slug") or not item.get("name") or category_id is None:
+            stats.skipped += 1
+            continue
+        rows.append({"slug": item["slug"], "name": item["name"], "description": item.get("description"), "category_id": category_id})
+    collection_ids, changed = _upsert(Collection, "slug", rows, stats)
+    collection_ids.update(
+        db.session.execute(db.select(Collection.slug, Collection.id)).all()
+    )
+    if stats.inserted or stats.updated or report.table("categories").inserted or report.table("categories").updated:
+        response_cache.bump("articles")
+    db.session.commit()
+    stats.seconds = time.perf_counter() - started
+    return category_ids, collection_ids
+
+
+def _load_article(source: Any, category_slug: str, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """线程池里执行：读取正文并预先算好摘要。缺少 slug、标题或正文文件时返回 None。"""
+    slug = item.get("id")
+    content_path = item.get("content")
+    if not slug or not item.get("title") or not content_path:
+        return None
+    data = source.read(content_path.lstrip("/"))
+    if data is None:
+        return None
+    content = data.decode("utf-8")
+    excerpt, word_count, reading_time = summarize(content)
+    return {
+        "slug": slug,
+        # 没有 uid 时按 slug 生成固定值，重复导入不会变化
+        "uid": item.get("uid") or hashlib.md5(slug.encode("utf-8")).hexdigest()[:8],
+        "title": item["title"],
+        "date": item.get("date") or "",
+        "content": content,
+        "_category": category_slug,
+        "_collection": item.get("collection"),
+        "excerpt": excerpt,
+        "word_count": word_count,
+        "reading_time": reading_time,
+        "_bytes": len(data),
+    }
+
+
+def _import_articles(
+    source: Any, index: Dict[str, Any], category_ids: Dict[str, int], collection_ids: Dict[str, int],
+    report: TransferReport, batch_size: int, workers: int, log: Log,
+) -> None:
+    items = [(slug, item) for slug, entries in index.items() if isinstance(entries, list) for item in entries]
+    stats = report.table("articles")
+    started = time.perf_counter()
+
+    def write(futures: List[Tuple[Dict[str, Any], "Future[Optional[Dict[str, Any]]]"]]) -> None:
+        rows = []
+        for item, future in futures:
+            row = future.result()
+            if row is None:
+                stats.skipped += 1
+                log(f"     ⚠️ 跳过文章 {item.get('id')}：缺少 slug、标题或正文文件 {item.get('content')}")
+                continue
+            report.files += 1
+            report.bytes += row.pop("_bytes")
+            row["category_id"] = category_ids[row.pop("_category")]
+            row["collection_id"] = collection_ids.get(row.pop("_collection") or "")
+            rows.append(row)
+        _, changed = _upsert(Article, "slug", rows, stats)
+        if changed:
+            search.index_rows([(row_id, row["title"], row["content"]) for row_id, row in changed])
+            response_cache.bump("articles")
+        db.session.commit()
+        log(f"   -> 文章 {stats.total + stats.skipped}/{len(items)}")
+
+    # 读取下一批正文的同时写入上一批
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending: Optional[List[Tuple[Dict[str, Any], "Future[Optional[Dict[str, Any]]]"]]] = None
+        for start in range(0, len(items), batch_size):
+            futures = [(item, pool.submit(_load_article, source, slug, item)) for slug, item in items[start:start + batch_size]]
+            if pending is not None:
+                write(pending)
+            pending = futures
+        if pending is not None:
+            write(pending)
+    stats.seconds = time.perf_counter() - started
+
+
+def _import_rows(model: Any, key: str, resource: str, rows: List[Dict[str, Any]], stats: TableStats, batch_size: int) -> None:
+    started = time.perf_counter()
+    for start in range(0, len(rows), batch_size):
+        _, changed = _upsert(model, key, rows[start:start + batch_size], stats)
+        if changed:
+            response_cache.bump(resource)
+        db.session.commit()
+    stats.seconds = time.perf_counter() - started
+
+
+def _import_friends(source: Any, report: TransferReport, batch_size: int) -> None:
+    data = _read_json(source, FRIENDS_INDEX, report) or {}
+    stats = report.table("friends")
+    rows = []
+    for item in data.get("friends", []):
+        if not item.get("name"):
+            stats.skipped += 1
+            continue
+        rows.append({
+            "name": item["name"],
+            "desc": item.get("desc"),
+            "url": item.get("url"),
+            "avatar": _static_path(item.get("avatar")),
+            "tags": item.get("tags") or [],
+        })
+    _import_rows(Friend, "name", "friends", rows, stats, batch_size)
+
+
+def _import_artworks(source: Any, report: TransferReport, batch_size: int) -> None:
+    data = _read_json(source, ARTWORKS_INDEX, report) or {}
+    stats = report.table("artworks")
+    rows = []
+    for item in data.get("artworks", []):
+        if not item.get("fullsize"):
+            stats.skipped += 1
+            continue
+        rows.append({
+            "title": item.get("title"),
+            "thumbnail": _static_path(item.get("thumbnail")),
+            "fullsize": _static_path(item["fullsize"]),
+            "description": item.get("description"),
+            "date": item.get("date"),
+        })
+    _import_rows(Artwork, "fullsize", "artworks", rows, stats, batch_size)
+
+
+# ── 导出 ────────────────────────────────────────────────────────────────────────
+
+def export_content(target_path: str, static_folder: str, batch_size: int = 500, log: Log = print) -> TransferReport:
+    """把分类、合集、文章、友链与画廊导出到目录或归档（需要在 app_context 里调用）。"""
+    started = time.perf_counter()
+    report = TransferReport()
+    sink = open_sink(target_path)
+    try:
+        def write(path: str, data: bytes) -> None:
+            sink.write(path, data)
+            report.files += 1
+            report.bytes += len(data)
+
+        def write_json(path: str, value: Any) -> None:
+            write(path, json.dumps(value, ensure_ascii=False, indent=2).encode("utf-8"))
+
+        _export_articles(write, write_json, report, batch_size, log)
+        _export_friends(write, write_json, static_folder, report)
+        _export_artworks(write, write_json, static_folder, report)
+    finally:
+        sink.close()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _export_articles(write: Callable[[str, bytes], None], write_json: Callable[[str, Any], None], report: TransferReport, batch_size: int, log: Log) -> None:
+    started = time.perf_counter()
+    categories = dict(db.session.execute(db.select(Category.id, Category.slug)).all())
+    collection_slugs: Dict[int, str] = {}
+    meta: Dict[str, Any] = {
+        "categories": dict(db.session.execute(db.select(Category.slug, Category.name).order_by(Category.id)).all()),
+        "collections": [],
+    }
+    for col_id, slug, name, description, category_id in db.session.execute(
+        db.select(Collection.id, Collection.slug, Collection.name, Collection.description, Collection.category_id).order_by(Collection.id)
+    ):
+        collection_slugs[col_id] = slug
+        meta["collections"].append({"slug": slug, "name": name, "description": description, "category": categories[category_id]})
+    report.table("categories").unchanged = len(categories)
+    report.table("collections").unchanged = len(collection_slugs)
+
+    stats = report.table("articles")
+    index: Dict[str, List[Dict[str, Any]]] = {slug: [] for slug in meta["categories"]}
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            db.select(Article.id, Article.slug, Article.uid, Article.title, Article.date, Article.content, Article.category_id, Article.collection_id)
+            .where(Article.id > last_id)
+            .order_by(Article.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        for article_id, slug, uid, title, date, content, category_id, collection_id in batch:
+            category_slug = categories[category_id]
+            filename = slug if _SAFE_NAME.match(slug) else str(article_id)
+            content_path = f"/article/{category_slug}/{filename}.md"
+            write(content_path.lstrip("/"), (content or "").encode("utf-8"))
+            entry = {"id": slug, "uid": uid, "title": title, "date": date, "content": content_path}
+            if collection_id is not None:
+                entry["collection"] = collection_slugs[collection_id]
+            index[category_slug].append(entry)
+        last_id = batch[-1][0]
+        stats.unchanged += len(batch)
+        log(f"   -> 文章 {stats.unchanged}")
+
+    write_json(ARTICLE_INDEX, index)
+    write_json(ARTICLE_META, meta)
+    stats.seconds = time.perf_counter() - started
+
+
+def _export_image(write: Callable[[str, bytes], None], static_folder: str, url: Optional[str]) -> None:
+    """/static/friends、/static/artwork 下的示例图片随内容导出。"""
+    if not url or not url.startswith("/static/"):
+        return
+    path = url[len("/static/"):]
+    if path.split("/", 1)[0] not in IMAGE_DIRS or ".." in path.split("/"):
+        return
+    full = os.path.join(static_folder, *path.split("/"))
+    if os.path.isfile(full):
+        with open(full, "rb") as f:
+            write(path, f.read())
+
+
+def _export_friends(write: Callable[[str, bytes], None], write_json: Callable[[str, Any], None], static_folder: str, report: TransferReport) -> None:
+    started = time.perf_counter()
+    friends = [f.to_dict() for f in db.session.execute(db.select(Friend).order_by(Friend.id)).scalars()]
+    for friend in friends:
+        _export_image(write, static_folder, friend["avatar"])
+    write_json(FRIENDS_INDEX, {"friends": friends})
+    report.table("friends").unchanged = len(friends)
+    report.table("friends").seconds = time.perf_counter() - started
+
+
+def _export_artworks(write: Callable[[str, bytes], None], write_json: Callable[[str, Any], None], static_folder: str, report: TransferReport) -> None:
+    started = time.perf_counter()
+    artworks = [a.to_dict() for a in db.session.execute(db.select(Artwork).order_by(Artwork.id)).scalars()]
+    for artwork in artworks:
+        _export_image(write, static_folder, artwork["thumbnail"])
+        _export_image(write, static_folder, artwork["fullsize"])
+    write_json(ARTWORKS_INDEX, {"artworks": artworks})
+    report.table("artworks").unchanged = len(artworks)
+    report.table("artworks").seconds = time.perf_counter() - started
+
+
+# ── 报告 ────────────────────────────────────────────────────────────────────────
+
+def format_report(report: TransferReport, exported: bool = False) -> List[str]:
+    lines = []
+    for name, stats in report.tables.items():
+        rate = stats.total / stats.seconds if stats.seconds > 0 else 0.0
+        if exported:
+            lines.append(f"   {name}: {stats.total} 行（{rate:.0f} 行/秒）")
+        else:
+            lines.append(
+                f"   {name}: 新增 {stats.inserted}，更新 {stats.updated}，未变 {stats.unchanged}，"
+                f"跳过 {stats.skipped}（{rate:.0f} 行/秒）"
+            )
+    megabytes = report.bytes / 1024 / 1024
+    speed = megabytes / report.seconds if report.seconds > 0 else 0.0
+    lines.append(f"⏱️ 共 {report.files} 个文件、{megabytes:.1f} MB，耗时 {report.seconds:.2f} 秒（{speed:.1f} MB/s）")
+    return lines
@@ -0,0 +1,121 @@
+"""
+数据库连接配置
+
+职责：
+  1. 从环境变量读取数据库 URI 与连接池参数，写入 app.config。
+  2. 对 SQLite 在每条新连接上执行调优 PRAGMA（WAL、busy_timeout、mmap 等），
+     解决多个 gunicorn worker 并发时读请求被后台写入阻塞、以及 `database is locked` 的问题。
+  3. querylog.py 与 metrics.py 共用的 SQL 计时辅助（语句失败时清理 conn.info 里的计时栈）。
+
+NOTE: PRAGMA 通过 SQLAlchemy 的 connect 事件下发，连接池里的每条连接在创建时都会执行一次，
+      之后复用连接不再有额外开销。
+"""
+
+import os
+import sqlite3
+from typing import Any, Callable, Dict, List
+
+from flask import Flask
+from sqlalchemy import event, inspect
+
+from extensions import db
+
+# SQLite 调优 PRAGMA 的默认值，均可用同名（大写）环境变量覆盖
+DEFAULT_SQLITE_PRAGMAS: Dict[str, str] = {
+    # WAL：读写互不阻塞，读请求不会再等后台提交
+    "journal_mode": "WAL",
+    # WAL 下 NORMAL 已能保证数据库不损坏，只在断电时可能丢最后几个事务，换来少得多的 fsync
+    "synchronous": "NORMAL",
+    # 遇到写锁时最多等待的毫秒数，而不是立刻抛出 database is locked
+    "busy_timeout": "5000",
+    # 内存映射读取的字节数（256MB），减少 read() 系统调用与页拷贝
+    "mmap_size": str(256 * 1024 * 1024),
+    # 页缓存大小，负数表示 KiB（64MB）
+    "cache_size": str(-64 * 1024),
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+}
+
+# 连接池参数：环境变量名 -> (create_engine 参数名, 类型)
+_POOL_OPTIONS = {
+    "DB_POOL_SIZE": ("pool_size", int),
+    "DB_MAX_OVERFLOW": ("max_overflow", int),
+    "DB_POOL_TIMEOUT": ("pool_timeout", float),
+    "DB_POOL_RECYCLE": ("pool_recycle", int),
+}
+
+
+def load_database_config(app: Flask) -> None:
+    """读取 DATABASE_URL、连接池与 SQLite PRAGMA 配置。"""
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite:///blog.db")
+
+    engine_options: Dict[str, Any] = {}
+    for env_name, (option, cast) in _POOL_OPTIONS.items():
+        value = os.getenv(env_name)
+        if value:
+            engine_options[option] = cast(value)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+
+    app.config["SQLITE_PRAGMAS"] = {
+        name: os.getenv(f"SQLITE_{name.upper()}", default)
+        for name, default in DEFAULT_SQLITE_PRAGMAS.items()
+    }
+
+
+def register_sqlite_pragmas(app: Flask) -> None:
+    """在 db.init_app(app) 之后调用：为 SQLite 引擎的每条新连接下发 PRAGMA。"""
+    pragmas: Dict[str, str] = app.config.get("SQLITE_PRAGMAS", {})
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if value:
+                    cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def create_missing_indexes() -> List[str]:
+    """
+    为已有数据库补建模型里声明、但库里还没有的索引，返回新建的索引名。
+
+    NOTE: db.create_all() 只会为新建的表创建索引，老表新增的索引需要靠这里补上。
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created: List[str] = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(str(index.name))
+    return created
+
+
+def pop_start_time_on_error(info_key: str) -> Callable[[Any], None]:
+    """
+    生成 handle_error 监听器：弹出失败语句压在 conn.info[info_key] 里的 (语句, 开始时间)。
+
+    失败的语句不会触发 after_cursor_execute，不弹出的话栈会随池化连接的生命周期一直增长。
+    NOTE: 语句在进入 before_cursor_execute 之前就失败（如参数处理出错）时栈顶不是它，
+          所以按语句文本核对后再弹出。
+    """
+    def _handle_error(context: Any) -> None:
+        conn = context.connection
+        stack = conn.info.get(info_key) if conn is not None else None
+        if stack and stack[-1][0] == context.statement:
+            stack.pop()
+
+    return _handle_error
@@ -4,6 +4,10 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_jwt_extended import JWTManager
 
+from cache import ResponseCache
+from metrics import Metrics
+import ratelimit_storage  # noqa: F401  注册 sqlite:// 限流存储
+
 # 数据库实例
 db = SQLAlchemy()
 
@@ -12,8 +16,14 @@ jwt = JWTManager()
 
 # 限流器实例
 # 针对只读接口放开，用全局 5000/hour 作为底线兜底
+# NOTE: 计数存储由 create_app 从环境变量 RATELIMIT_STORAGE_URI 读取，默认是各 worker 共享的 SQLite 文件
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["50000 per day", "5000 per hour"],
-    storage_uri="memory://"
 )
+
+# 公开接口响应缓存实例
+response_cache = ResponseCache()
+
+# 请求级性能指标实例（/api/metrics）
+metrics = Metrics()
@@ -0,0 +1,58 @@
+"""
+gunicorn 配置：gunicorn -c gunicorn.conf.py（或 flask serve）
+
+所有选项都可以用环境变量覆盖，见 .env.example 的「生产服务器」一节。
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# gunicorn 在创建应用之前就读取本文件，先加载 .env 才能让其中的 GUNICORN_* / WEB_CONCURRENCY 生效
+load_dotenv()
+
+from serving import default_workers  # noqa: E402
+
+_workers, _threads = default_workers()
+
+wsgi_app = "wsgi:app"
+bind = os.getenv("GUNICORN_BIND", "unix:blog.sock")
+# 与原先 systemd 里的 `-m 007` 一致：socket 对同组的 Nginx 可读写
+umask = 0o007
+
+workers = _workers
+threads = _threads
+worker_class = "gthread"
+
+# master 只加载一次应用并预热缓存，worker 直接 fork，共享只读内存
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+# 收到 SIGTERM / HUP 后给正在处理的请求留出的时间
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+# 定期轮换 worker，防止长期运行的内存碎片累积；加抖动避免所有 worker 同时重启
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def _flask_app(worker):
+    return worker.app.wsgi()
+
+
+def when_ready(server):
+    server.log.info(f"Blog backend ready: {server.cfg.workers} workers x {server.cfg.threads} threads")
+
+
+def post_fork(server, worker):
+    from serving import on_worker_start
+    on_worker_start(_flask_app(worker))
+
+
+def worker_exit(server, worker):
+    from serving import on_worker_exit
+    on_worker_exit(_flask_app(worker))
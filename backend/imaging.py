@@ -0,0 +1,225 @@
+"""
+上传图片的派生图流水线
+
+职责：
+  上传成功后，在后台线程池里为图片生成多种宽度的 WebP / AVIF 变体，
+  并在原图旁边写一份清单（<文件名>.variants.json），前端可据此拼出 srcset：
+
+    {
+      "src": "/static/uploads/artwork/abc.png",
+      "width": 3000, "height": 2000,
+      "thumbnail": "/static/uploads/artwork/abc-320w.webp",
+      "variants": [
+        {"url": "/static/uploads/artwork/abc-640w.webp", "width": 640, "height": 427, "type": "image/webp"},
+        ...
+      ]
+    }
+
+NOTE: 清单最后写入，存在即代表全部变体已生成完毕；生成失败只记日志，不影响原图上传。
+      线程池在第一次使用时才创建，避免 gunicorn preload 之后 fork 出的 worker 继承到失效的线程。
+"""
+
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow 为可选依赖，缺失时只保存原图
+    Image = None
+
+# 生成的变体宽度（像素），不超过原图宽度
+VARIANT_WIDTHS = (320, 640, 1280, 1920)
+
+# 各格式的编码参数
+_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "avif": ("AVIF", "image/avif", {"quality": 60, "speed": 8}),
+}
+
+# 动图缩放会丢帧，直接跳过
+_SKIP_EXTENSIONS = {"gif"}
+
+MANIFEST_SUFFIX = ".variants.json"
+
+# 派生文件名：<原文件名>-<宽度>w.<格式>
+_DERIVATIVE_NAME = re.compile(r"-\d+w\.(?:webp|avif)$")
+
+# EXIF Orientation 标签：5~8 表示图片需要旋转 90°/270° 显示
+_EXIF_ORIENTATION = 0x0112
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app: Flask) -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(app.config.get("IMAGE_WORKERS", 2))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imaging")
+        return _executor
+
+
+def shutdown(wait: bool = True) -> None:
+    """等待排队中的派生任务完成并关闭线程池（进程退出前调用）。"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+def available_formats() -> List[str]:
+    if Image is None:
+        return []
+    return [fmt for fmt in _FORMATS if features.check(fmt)]
+
+
+def image_size(path: str) -> Optional[Tuple[int, int]]:
+    """
+    只读文件头取得图片的显示宽高（按 EXIF 方向交换宽高，不解码像素）；
+    Pillow 缺失或无法识别时返回 None。
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            if img.getexif().get(_EXIF_ORIENTATION) in (5, 6, 7, 8):
+                width, height = height, width
+            return width, height
+    except Exception:
+        return None
+
+
+def manifest_path(path: str) -> str:
+    return os.path.splitext(path)[0] + MANIFEST_SUFFIX
+
+
+def is_derivative(filename: str) -> bool:
+    """是否为流水线生成的文件（变体或清单），素材列表据此隐藏它们。"""
+    return filename.endswith(MANIFEST_SUFFIX) or bool(_DERIVATIVE_NAME.search(filename))
+
+
+def manifest_url(url: str) -> str:
+    """原图 URL 对应的清单 URL。"""
+    return _to_url(url, manifest_path(url))
+
+
+def source_stem(filename: str) -> str:
+    """原图、派生图或清单的文件名 → 原图去掉扩展名后的部分。"""
+    if filename.endswith(MANIFEST_SUFFIX):
+        return filename[:-len(MANIFEST_SUFFIX)]
+    stem = os.path.splitext(filename)[0]
+    if _DERIVATIVE_NAME.search(filename):
+        stem = stem.rsplit("-", 1)[0]
+    return stem
+
+
+def _variant_name(path: str, width: int, fmt: str) -> str:
+    stem = os.path.splitext(path)[0]
+    return f"{stem}-{width}w.{fmt}"
+
+
+def _to_url(url: str, variant_path: str) -> str:
+    """把变体的磁盘路径换算成与原图同目录的 URL。"""
+    return url.rsplit("/", 1)[0] + "/" + os.path.basename(variant_path)
+
+
+def _atomic_write(target: str, write: Any) -> None:
+    tmp = f"{target}.tmp-{threading.get_ident()}"
+    try:
+        write(tmp)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def generate_derivatives(path: str, url: str) -> Dict[str, Any]:
+    """同步生成全部变体并写入清单，返回清单内容。"""
+    formats = available_formats()
+    with Image.open(path) as opened:
+        img = ImageOps.exif_transpose(opened)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "P") else "RGB")
+        width, height = img.size
+
+        variants: List[Dict[str, Any]] = []
+        for target_width in VARIANT_WIDTHS:
+            if target_width >= width:
+                continue
+            target_height = max(1, round(height * target_width / width))
+            resized = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                pil_format, mime, options = _FORMATS[fmt]
+                variant_path = _variant_name(path, target_width, fmt)
+                _atomic_write(variant_path, lambda tmp: resized.save(tmp, pil_format, **options))
+                variants.append({
+                    "url": _to_url(url, variant_path),
+                    "width": target_width,
+                    "height": target_height,
+                    "type": mime,
+                })
+
+    # 缩略图取最小宽度的第一种格式（WebP）；原图本身就很小时直接用原图
+    thumbnail = variants[0]["url"] if variants else url
+    manifest = {"src": url, "width": width, "height": height, "thumbnail": thumbnail, "variants": variants}
+
+    def _write_manifest(tmp: str) -> None:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+    _atomic_write(manifest_path(path), _write_manifest)
+    return manifest
+
+
+def schedule_derivatives(app: Flask, path: str, url: str) -> Optional[str]:
+    """
+    把派生任务放进后台线程池，立即返回清单的 URL；
+    该图片不需要 / 无法生成派生图时返回 None。
+    """
+    ext = path.rsplit(".", 1)[-1].lower()
+    if Image is None or ext in _SKIP_EXTENSIONS or not available_formats():
+        return None
+
+    def _run() -> None:
+        try:
+            generate_derivatives(path, url)
+        except Exception as e:
+            app.logger.error(f"Failed to generate derivatives for {path}: {str(e)}", exc_info=True)
+
+    _get_executor(app).submit(_run)
+    return manifest_url(url)
+
+
+def remove_derivatives(path: str) -> Tuple[int, int]:
+    """删除原图的全部变体与清单，返回 (删除的文件数, 失败数)。"""
+    removed = failed = 0
+    manifest_file = manifest_path(path)
+    if not os.path.exists(manifest_file):
+        return removed, failed
+
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        names = [v["url"].rsplit("/", 1)[-1] for v in manifest.get("variants", [])]
+    except (OSError, ValueError, KeyError):
+        names = []
+
+    directory = os.path.dirname(path)
+    for name in names + [os.path.basename(manifest_file)]:
+        try:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+        except FileNotFoundError:
+            continue
+        except OSError:
+            failed += 1
+    return removed, failed
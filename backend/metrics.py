@@ -0,0 +1,272 @@
+"""
+请求级性能指标（Prometheus 文本格式，GET /api/metrics）
+
+职责：
+  1. 每个请求记录：端点耗时直方图、状态码计数、响应字节数、
+     本请求执行的 SQL 条数与 SQL 总耗时（SQLAlchemy 的 cursor 事件）、响应缓存命中情况。
+  2. 「每请求 SQL 条数」直方图按端点统计——某个端点的条数随数据量线性增长，就是 N+1。
+  3. 多 worker 部署时，各进程每隔 METRICS_FLUSH_INTERVAL 秒把自己的快照写到 METRICS_DIR/<pid>.json，
+     /api/metrics 合并所有存活 worker 的快照输出，每条序列带 worker="<pid>" 标签
+     （worker 重启后旧序列自然消失，sum(rate(...)) 依然正确）。
+
+NOTE: 热路径上只有几次字典累加与一把进程内锁；METRICS_ENABLED=False 时完全不注册钩子。
+      ASGI 快速路径（asgi.py）命中的缓存请求同样计入，SQL 条数为 0。
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import event
+
+# 指标名前缀
+PREFIX = "blog"
+
+# 耗时直方图的桶（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# 每请求 SQL 条数直方图的桶
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+# 响应大小直方图的桶（字节）
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# 指标名 -> (类型, 说明, 直方图桶)
+_SPECS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    "http_requests_total": ("counter", "按端点、方法与状态码统计的请求数", ()),
+    "http_request_duration_seconds": ("histogram", "请求处理耗时", LATENCY_BUCKETS),
+    "http_response_size_bytes": ("histogram", "响应体字节数（压缩后）", SIZE_BUCKETS),
+    "sql_queries_per_request": ("histogram", "单个请求执行的 SQL 条数", QUERY_COUNT_BUCKETS),
+    "sql_queries_total": ("counter", "请求内执行的 SQL 总条数", ()),
+    "sql_duration_seconds_total": ("counter", "请求内执行 SQL 的总耗时", ()),
+    "response_cache_requests_total": ("counter", "可缓存端点的缓存结果（hit / miss / not_modified）", ()),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+_Key = Tuple[str, Labels]
+
+
+class Metrics:
+    """进程内指标注册表：计数器与直方图都以 (指标名, 标签) 为键。"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.directory: Optional[str] = None
+        self.flush_interval = 5.0
+
+        self._counters: Dict[_Key, float] = {}
+        # 直方图：各桶计数（最后一个是 +Inf）+ 末尾的 sum
+        self._histograms: Dict[_Key, List[float]] = {}
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def init_app(self, app: Flask) -> None:
+        """在 db.init_app(app) 之后调用：注册请求钩子与 SQL 计时事件。"""
+        self.enabled = bool(app.config.get("METRICS_ENABLED", True))
+        if not self.enabled:
+            return
+        self.directory = app.config.get("METRICS_DIR")
+        self.flush_interval = float(app.config.get("METRICS_FLUSH_INTERVAL", 5.0))
+
+        # 排在所有 before_request 之前，被限流拒绝（429）的请求也能计时
+        app.before_request_funcs.setdefault(None, []).insert(0, begin_request)
+        app.after_request(self._after_request)
+
+        from database import pop_start_time_on_error
+        from extensions import db
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", pop_start_time_on_error("query_started"))
+
+    # ── 记录 ────────────────────────────────────────────────────────────────────
+
+    def inc(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        buckets = _SPECS[name][2]
+        with self._lock:
+            key = (name, labels)
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0.0] * (len(buckets) + 2)
+            index = len(buckets)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    index = i
+                    break
+            hist[index] += 1
+            hist[-1] += value
+
+    def reset(self) -> None:
+        """清空本进程的指标（预热请求不计入统计）。"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def _after_request(self, response: Response) -> Response:
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        labels: Labels = (("endpoint", request.endpoint or "unmatched"),)
+
+        self.inc("http_requests_total", labels + (("method", request.method), ("status", str(response.status_code))))
+        self.observe("http_request_duration_seconds", labels, elapsed)
+        self.observe("http_response_size_bytes", labels, float(response.content_length or 0))
+
+        query_count = g.pop("sql_query_count", 0)
+        query_duration = g.pop("sql_duration", 0.0)
+        self.observe("sql_queries_per_request", labels, query_count)
+        if query_count:
+            self.inc("sql_queries_total", labels, query_count)
+            self.inc("sql_duration_seconds_total", labels, query_duration)
+
+        cache_result = g.get("response_cache")
+        if cache_result:
+            self.inc("response_cache_requests_total", labels + (("result", cache_result),))
+
+        self._maybe_flush()
+        return response
+
+    # ── 多进程快照 ──────────────────────────────────────────────────────────────
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), list(hist)] for (name, labels), hist in self._histograms.items()],
+            }
+
+    def _maybe_flush(self, force: bool = False) -> None:
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < self.flush_interval:
+            return
+        self._flushed_at = now
+
+        os.makedirs(self.directory, exist_ok=True)
+        target = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp = f"{target}.tmp-{threading.get_ident()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, target)
+
+    def _worker_snapshots(self) -> Iterable[Tuple[int, Dict[str, Any]]]:
+        """本进程的实时快照 + 其它存活 worker 最近一次写出的快照；已退出 worker 的文件顺手删掉。"""
+        pid = os.getpid()
+        yield pid, self.snapshot()
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext != ".json" or not stem.isdigit():
+                continue
+            other = int(stem)
+            if other == pid:
+                continue
+            path = os.path.join(self.directory, name)
+            if not _pid_alive(other):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    yield other, json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    # ── 输出 ────────────────────────────────────────────────────────────────────
+
+    def render(self) -> str:
+        """合并所有 worker 的快照，输出 Prometheus 文本格式（0.0.4）。"""
+        self._maybe_flush(force=True)
+        samples: Dict[str, List[str]] = {name: [] for name in _SPECS}
+        for pid, snap in self._worker_snapshots():
+            worker = (("worker", str(pid)),)
+            for name, labels, value in snap["counters"]:
+                if name in samples:
+                    labels = tuple(map(tuple, labels)) + worker
+                    samples[name].append(_sample(name, labels, value))
+            for name, labels, hist in snap["histograms"]:
+                if name in samples:
+                    labels = tuple(map(tuple, labels)) + worker
+                    samples[name].extend(_histogram_samples(name, labels, hist))
+
+        lines: List[str] = []
+        for name, (kind, help_text, _) in _SPECS.items():
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            lines.extend(samples[name])
+
+        from extensions import response_cache
+        lines.append(f"# HELP {PREFIX}_response_cache_entries 本进程响应缓存中的条目数")
+        lines.append(f"# TYPE {PREFIX}_response_cache_entries gauge")
+        lines.append(_sample("response_cache_entries", (("worker", str(os.getpid())),), response_cache.size()))
+        return "\n".join(lines) + "\n"
+
+
+def begin_request() -> None:
+    """请求开始计时。"""
+    g.metrics_started = time.perf_counter()
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    conn.info.setdefault("query_started", []).append((statement, time.perf_counter()))
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    _, started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    if has_request_context():
+        g.sql_query_count = g.get("sql_query_count", 0) + 1
+        g.sql_duration = g.get("sql_duration", 0.0) + elapsed
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _sample(name: str, labels: Labels, value: float, suffix: str = "") -> str:
+    return f"{PREFIX}_{name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+
+
+def _histogram_samples(name: str, labels: Labels, hist: List[float]) -> List[str]:
+    buckets = _SPECS[name][2]
+    lines: List[str] = []
+    cumulative = 0.0
+    for bound, count in zip(buckets + (float("inf"),), hist[:-1]):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else _format_value(bound)
+        lines.append(_sample(name, labels + (("le", le),), cumulative, "_bucket"))
+    lines.append(_sample(name, labels, hist[-1], "_sum"))
+    lines.append(_sample(name, labels, cumulative, "_count"))
+    return lines
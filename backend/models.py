@@ -1,12 +1,44 @@
-from typing import Any, Dict, List, Optional, cast
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple, cast
 from datetime import datetime
 
-from sqlalchemy import JSON, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from extensions import db
 
+# 摘要长度（字符数）
+EXCERPT_LENGTH = 120
+
+# 阅读速度：中日韩文字按字计，其余按词计（每分钟）
+CJK_CHARS_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+
+_MARKDOWN_SYMBOLS = re.compile(r"[#*`>\[\]!_~\-]")
+_WHITESPACE = re.compile(r"\s+")
+_CJK_CHAR = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]")
+_LATIN_WORD = re.compile(r"[A-Za-z0-9]+(?:['’][A-Za-z]+)?")
+
+
+def markdown_to_plain(markdown: Optional[str]) -> str:
+    """粗略去掉 Markdown 符号并压缩空白，用于摘要与全文检索。"""
+    plain = _MARKDOWN_SYMBOLS.sub("", markdown or "").strip()
+    return _WHITESPACE.sub(" ", plain)
+
+
+def summarize(markdown: Optional[str]) -> Tuple[str, int, int]:
+    """计算纯文本摘要、字数与阅读时长（分钟）；批量写入时可以不经过 ORM 对象直接调用。"""
+    plain = markdown_to_plain(markdown)
+    excerpt = plain[:EXCERPT_LENGTH] + ("..." if len(plain) > EXCERPT_LENGTH else "")
+
+    cjk_count = len(_CJK_CHAR.findall(plain))
+    word_count = len(_LATIN_WORD.findall(plain))
+    total = cjk_count + word_count
+    minutes = cjk_count / CJK_CHARS_PER_MINUTE + word_count / WORDS_PER_MINUTE
+    return excerpt, total, math.ceil(minutes) if total else 0
+
 class User(db.Model):
     """管理员用户模型"""
     def __init__(self, username: str):
@@ -40,6 +72,11 @@ class Category(db.Model):
 
 class Collection(db.Model):
     """连载合集模型"""
+    __table_args__ = (
+        # 文章索引按分类分组合集
+        Index("ix_collection_category_id", "category_id"),
+    )
+
     def __init__(self, slug: str, name: str, category_id: int, description: Optional[str] = None):
         self.slug = slug
         self.name = name
@@ -66,6 +103,13 @@ class Collection(db.Model):
 
 class Article(db.Model):
     """文章模型"""
+    __table_args__ = (
+        # 文章索引：按分类取「不属于任何合集」的文章
+        Index("ix_article_category_collection", "category_id", "collection_id"),
+        # 合集详情按日期排序分页、合集文章数统计
+        Index("ix_article_collection_date", "collection_id", "date"),
+    )
+
     def __init__(self, slug: str, title: str, date: str, content: Optional[str], category_id: int, uid: Optional[str] = None, collection_id: Optional[int] = None):
         self.slug = slug
         self.title = title
@@ -74,15 +118,26 @@ class Article(db.Model):
         self.category_id = category_id
         self.uid = uid
         self.collection_id = collection_id
+        self.refresh_summary()
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     slug: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
     uid: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     date: Mapped[str] = mapped_column(String(20), nullable=False)
-    content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # NOTE: 正文默认延迟加载，列表 / 合集 / sitemap 等路径都不会读取它；
+    #       需要正文的查询请显式加上 .options(undefer(Article.content))
+    content: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)
     category_id: Mapped[int] = mapped_column(ForeignKey("category.id"), nullable=False)
     collection_id: Mapped[Optional[int]] = mapped_column(ForeignKey("collection.id"), nullable=True)
+    # 以下三列由 refresh_summary() 在保存时根据 content 预先算好，读路径不再做文本处理
+    excerpt: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    word_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    reading_time: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def refresh_summary(self) -> None:
+        """根据当前 content 重新计算纯文本摘要、字数与阅读时长（分钟）。"""
+        self.excerpt, self.word_count, self.reading_time = summarize(self.content)
 
     def to_dict_simple(self) -> Dict[str, Any]:
         return {
@@ -90,7 +145,10 @@ class Article(db.Model):
             "uid": self.uid,
             "title": self.title,
             "date": self.date,
-            "collection_id": self.collection_id
+            "collection_id": self.collection_id,
+            "excerpt": self.excerpt,
+            "word_count": self.word_count,
+            "reading_time": self.reading_time
         }
 
 
@@ -187,6 +245,10 @@ class Contribution(db.Model):
 
 class Plan(db.Model):
     """近期计划 / 待办模型"""
+    __table_args__ = (
+        Index("ix_plan_sort_order", "sort_order", "id"),
+    )
+
     def __init__(self, content: str, status: str = 'todo', sort_order: int = 0):
         self.content = content
         self.status = status
@@ -207,3 +269,86 @@ class Plan(db.Model):
             "update_date": self.update_date,
             "sort_order": self.sort_order
         }
+
+
+class ContentVersion(db.Model):
+    """公开数据版本号（响应缓存按资源失效用）"""
+    def __init__(self, resource: str, version: int = 0, updated_at: float = 0.0):
+        self.resource = resource
+        self.version = version
+        self.updated_at = updated_at
+
+    resource: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class Asset(db.Model):
+    """上传文件目录（素材库列表直接查表，不再扫描 static/uploads）"""
+    __table_args__ = (
+        Index("ix_asset_type_mtime", "type", "mtime", "id"),
+        Index("ix_asset_type_size", "type", "size", "id"),
+        Index("ix_asset_mtime", "mtime", "id"),
+        Index("ix_asset_hash", "hash"),
+    )
+
+    def __init__(self, path: str, type: str, size: int, hash: str, mtime: float,
+                 width: Optional[int] = None, height: Optional[int] = None):
+        self.path = path
+        self.type = type
+        self.size = size
+        self.hash = hash
+        self.mtime = mtime
+        self.width = width
+        self.height = height
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # 相对 UPLOAD_FOLDER 的路径，例如 "article/<hash>.png"
+    path: Mapped[str] = mapped_column(String(300), unique=True, nullable=False)
+    type: Mapped[str] = mapped_column(String(20), nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    width: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    height: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # 文件内容的 SHA-256（十六进制）
+    hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    mtime: Mapped[float] = mapped_column(Float, nullable=False)
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def url(self) -> str:
+        return f"/static/uploads/{self.path}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "url": self.url,
+            "type": self.type,
+            "size": self.size,
+            "width": self.width,
+            "height": self.height,
+            "hash": self.hash,
+            "mtime": self.mtime,
+            "date": datetime.fromtimestamp(self.mtime).strftime('%Y-%m-%d %H:%M')
+        }
+
+
+class AssetReference(db.Model):
+    """内容对上传文件的引用索引（回收孤儿文件时查这张表，不再扫描文章正文）"""
+    __table_args__ = (
+        Index("ix_asset_reference_key", "asset_key"),
+    )
+
+    def __init__(self, owner_type: str, owner_id: int, asset_key: str):
+        self.owner_type = owner_type
+        self.owner_id = owner_id
+        self.asset_key = asset_key
+
+    # 引用方：article / artwork / friend / sponsor 及其主键
+    owner_type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    owner_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # 被引用的原图：<上传类型>/<去掉扩展名的文件名>，引用派生图也记到原图名下
+    asset_key: Mapped[str] = mapped_column(String(300), primary_key=True)
@@ -0,0 +1,115 @@
+"""
+列表接口的键集（游标）分页与字段裁剪
+
+查询参数：
+  ?limit=N        键集（游标）分页，响应里附带 next_cursor，没有下一页时为 null
+  ?cursor=...     上一页返回的 next_cursor
+  ?fields=a,b     只返回指定字段
+不带 limit 时返回完整列表，兼容旧前端。
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import request
+from sqlalchemy import Select
+
+from extensions import db
+
+# 单页条数上限
+MAX_PAGE_SIZE = 200
+# paginate 读取的查询参数（也是响应缓存键里保留的参数）
+PAGINATION_PARAMS = ("limit", "cursor", "fields")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _cursor_types(column: Any) -> Tuple[type, ...]:
+    """游标里某一列允许的 JSON 值类型：按排序列的 Python 类型收窄，未知类型时只允许标量。"""
+    try:
+        python_type = column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return (int, float, str)
+    if python_type is float:
+        # JSON 里整数形式的浮点数（如 1700000000）会被解析成 int
+        return (int, float)
+    if python_type in (int, str):
+        return (python_type,)
+    return (int, float, str)
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """解码游标并逐列校验值的类型；不合法时抛出 ValueError，由调用方返回 400。"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+    for value, column in zip(values, columns):
+        # bool 是 int 的子类，要单独排除
+        if isinstance(value, bool) or not isinstance(value, _cursor_types(column)):
+            raise ValueError("Invalid cursor")
+    return values
+
+
+def paginate(
+    stmt: Select[Any],
+    order_columns: Tuple[Any, ...],
+    serialize: Callable[[Any], Dict[str, Any]],
+    allowed_fields: Tuple[str, ...],
+    descending: bool = False,
+) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
+    """
+    按 order_columns 做键集分页并按 fields 裁剪字段，返回 (条目, next_cursor, 是否分页)。
+
+    order_columns 必须能唯一确定一行（最后一列通常是主键），游标里存的就是上一页最后一行的这几列。
+    descending=True 时所有排序列一起倒序。
+    参数不合法时抛出 ValueError。
+    """
+    fields_arg = request.args.get("fields")
+    fields: Optional[List[str]] = None
+    if fields_arg:
+        fields = [f for f in fields_arg.split(",") if f]
+        unknown = [f for f in fields if f not in allowed_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    limit_arg = request.args.get("limit")
+    paginated = limit_arg is not None
+    limit = 0
+    if paginated:
+        try:
+            limit = int(limit_arg or "")
+        except ValueError:
+            raise ValueError("Invalid limit")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+        cursor = request.args.get("cursor")
+        if cursor:
+            values = decode_cursor(cursor, order_columns)
+            keys, bound = db.tuple_(*order_columns), db.tuple_(*values)
+            stmt = stmt.where(keys < bound if descending else keys > bound)
+        # 多取一行用来判断是否还有下一页
+        stmt = stmt.limit(limit + 1)
+
+    ordering = [col.desc() for col in order_columns] if descending else list(order_columns)
+    rows = db.session.execute(stmt.order_by(*ordering)).scalars().all()
+
+    next_cursor: Optional[str] = None
+    if paginated and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, col.key) for col in order_columns])
+
+    items = [serialize(row) for row in rows]
+    if fields is not None:
+        items = [{f: item[f] for f in fields} for item in items]
+    return items, next_cursor, paginated
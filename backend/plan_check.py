@@ -0,0 +1,143 @@
+"""
+热点查询的执行计划检查（flask db check-plans）
+
+用测试客户端真实请求一遍公开接口，记录每个请求实际发出的 SELECT，
+再逐条执行 EXPLAIN QUERY PLAN。只要出现不带任何索引的整表扫描（`SCAN <table>`），
+且该表不在这个接口的白名单里，就判定为回归并以非零状态码退出，可直接放进 CI。
+同时检查除文章详情外的接口都没有读取 Article.content（正文列默认延迟加载）。
+
+NOTE: 检查针对当前数据库执行，只发 GET 请求，不会修改数据；
+      运行期间会临时关闭响应缓存，保证每个请求都真正落到 SQLite。
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from flask import Flask
+from sqlalchemy import event
+
+from extensions import db, response_cache
+from models import Article, Category, Collection
+
+# 不带任何索引的整表扫描，例如 "SCAN article"
+_BARE_SCAN = re.compile(r"^SCAN (\w+)$")
+
+# 选取了文章正文列的语句
+_SELECTS_CONTENT = re.compile(r"\barticle\.content\b")
+
+# 所有接口都允许扫描的表（系统表 / 行数固定很少的表）
+_ALWAYS_ALLOWED = frozenset({"sqlite_master", "category", "content_version"})
+
+# 翻页请求用的游标：第一页之后的请求都是「主键 > 上一页末尾」的形式
+_FIRST_ID_CURSOR = "WzBd"  # base64("[0]")
+
+
+@dataclass
+class HotPath:
+    """一个需要守住执行计划的接口"""
+    label: str
+    url: str
+    # 允许整表扫描的表：本来就要返回整张表的列表接口
+    allowed_scans: FrozenSet[str] = frozenset()
+    headers: Dict[str, str] = field(default_factory=dict)
+    # 只有文章详情接口允许读取 Article.content，其它路径一律视为回归
+    reads_content: bool = False
+
+
+@dataclass
+class Violation:
+    label: str
+    statement: str
+    detail: str
+
+
+def _hot_paths() -> List[HotPath]:
+    """按当前库里的真实数据拼出各接口的 URL；缺少样本数据的接口会被跳过。"""
+    paths = [
+        HotPath("article index", "/api/articles/index", frozenset({"collection"})),
+        HotPath("sitemap", "/sitemap.xml"),
+        HotPath("friends", "/api/friends", frozenset({"friend"})),
+        HotPath("friends page", f"/api/friends?limit=20&cursor={_FIRST_ID_CURSOR}"),
+        HotPath("sponsors", "/api/sponsors", frozenset({"sponsor"})),
+        HotPath("artworks", "/api/artworks", frozenset({"artwork"})),
+        HotPath("artworks page", f"/api/artworks?limit=20&cursor={_FIRST_ID_CURSOR}"),
+        HotPath("contributions", "/api/contributions", frozenset({"contribution"})),
+        HotPath("plans", "/api/plans", frozenset({"plan"})),
+        HotPath("search", "/api/search?q=blog"),
+    ]
+
+    article = db.session.execute(
+        db.select(Category.slug, Article.slug).join(Category, Article.category_id == Category.id).limit(1)
+    ).first()
+    if article:
+        cat_slug, slug = article
+        paths.append(HotPath("article detail", f"/api/article/{cat_slug}/{slug}", reads_content=True))
+        paths.append(HotPath(
+            "seo article", f"/articles/{cat_slug}/{slug}", headers={"User-Agent": "Googlebot"}
+        ))
+
+    collection_slug = db.session.execute(db.select(Collection.slug).limit(1)).scalar()
+    if collection_slug:
+        paths.append(HotPath("collection detail", f"/api/collection/{collection_slug}"))
+        paths.append(HotPath("collection page", f"/api/collection/{collection_slug}?limit=20"))
+    return paths
+
+
+def _explain(statement: str, parameters: Any) -> List[str]:
+    conn = db.session.connection()
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[3] for row in rows]
+
+
+def check_query_plans(app: Flask) -> List[Violation]:
+    """请求全部热点接口并检查执行计划，返回违规列表（为空表示全部通过）。"""
+    client = app.test_client()
+    violations: List[Violation] = []
+    captured: List[tuple] = []
+
+    def _record(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")) and not executemany:
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        paths = _hot_paths()
+        engine = db.engine
+
+    cache_enabled = response_cache.enabled
+    response_cache.enabled = False
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        for path in paths:
+            captured.clear()
+            resp = client.get(path.url, headers=path.headers)
+            resp.get_data()
+            if resp.status_code >= 500:
+                violations.append(Violation(path.label, path.url, f"HTTP {resp.status_code}"))
+                continue
+
+            statements = list(captured)
+            with app.app_context():
+                for statement, parameters in statements:
+                    if not path.reads_content and _SELECTS_CONTENT.search(statement):
+                        violations.append(Violation(path.label, statement, "SELECT article.content"))
+                    for detail in _explain(statement, parameters):
+                        match = _BARE_SCAN.match(detail)
+                        if not match:
+                            continue
+                        table = match.group(1)
+                        if table in _ALWAYS_ALLOWED or table in path.allowed_scans:
+                            continue
+                        violations.append(Violation(path.label, statement, detail))
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+        response_cache.enabled = cache_enabled
+
+    return violations
+
+
+def format_violation(violation: Violation, width: Optional[int] = 160) -> str:
+    statement = " ".join(violation.statement.split())
+    if width and len(statement) > width:
+        statement = statement[:width] + "..."
+    return f"[{violation.label}] {violation.detail}\n    {statement}"
@@ -0,0 +1,267 @@
+"""
+按请求开启的性能剖析（WSGI 中间件，覆盖所有蓝图）
+
+两种触发方式：
+  1. 按需：管理员带上 access token，再加请求头 X-Profile: <模式> 或查询参数 ?__profile=<模式>，
+     只剖析这一个请求。查询参数在交给应用之前会被去掉，不影响缓存键与业务逻辑。
+  2. 持续采样：PROFILE_SAMPLE_EVERY=N 时，每个 worker 每 N 个请求自动用采样模式剖析一个，
+     开销只落在被抽中的请求上。
+
+模式：
+  sample      采样剖析，输出折叠栈（.collapsed，flamegraph.pl / speedscope 都能直接打开）
+  speedscope  采样剖析，输出 speedscope 的 JSON（https://www.speedscope.app）
+  cprofile    确定性剖析，输出 pstats 文件（.prof，可用 snakeviz / python -m pstats 查看）
+
+结果写到 PROFILE_DIR（默认 instance/profiles），文件名会在响应头 X-Profile-File 里返回；
+目录里最多保留 PROFILE_MAX_FILES 个文件，超出时删除最旧的。
+
+NOTE: 采样线程每隔 PROFILE_INTERVAL 秒抓一次目标线程的调用栈，需要先拿到 GIL，
+      纯 Python 计算密集的代码段实际采样间隔会接近 sys.getswitchinterval()（默认 5ms）。
+      cProfile 同一时刻只能有一个在运行，并发的 cprofile 请求会被跳过（照常响应，不出文件）。
+"""
+
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from flask import Flask
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_QUERY_ARG = "__profile"
+MODES = ("sample", "speedscope", "cprofile")
+
+# 文件名里路径部分的非法字符
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+Frame = Tuple[str, str, int]
+StartResponse = Callable[..., Any]
+
+
+class StackSampler:
+    """后台线程定时抓取目标线程的调用栈，统计每条栈出现的次数。"""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[Tuple[Frame, ...]] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[Frame] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, frame.f_lineno))
+                frame = frame.f_back
+            if stack:
+                # 由外到内：根帧在前
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg 的折叠栈格式：每行「帧;帧;帧 次数」。"""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            names = ";".join(f"{name} ({_short_path(path)}:{line})" for name, path, line in stack)
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """speedscope 的 sampled 类型文件：每条栈作为一个样本，权重为次数 × 采样间隔。"""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[Frame, int] = {}
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, count in self.stacks.items():
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "blog-backend",
+        }
+
+
+class ProfilerMiddleware:
+    """包在 app.wsgi_app 外层：决定是否剖析当前请求，并把结果写入 PROFILE_DIR。"""
+
+    def __init__(self, wsgi_app: Callable[..., Iterable[bytes]], app: Flask) -> None:
+        self.wsgi_app = wsgi_app
+        self.app = app
+        self.directory: str = app.config["PROFILE_DIR"]
+        self.sample_every = int(app.config.get("PROFILE_SAMPLE_EVERY", 0))
+        self.interval = float(app.config.get("PROFILE_INTERVAL", 0.002))
+        self.max_files = int(app.config.get("PROFILE_MAX_FILES", 500))
+
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+
+    def __call__(self, environ: Dict[str, Any], start_response: StartResponse) -> Iterable[bytes]:
+        mode = self._requested_mode(environ)
+        if mode is None and self._sampled_turn():
+            mode = "sample"
+        if mode is None:
+            return self.wsgi_app(environ, start_response)
+        if mode == "cprofile" and not self._cprofile_lock.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+
+        try:
+            return self._profile(environ, start_response, mode)
+        finally:
+            if mode == "cprofile":
+                self._cprofile_lock.release()
+
+    def _sampled_turn(self) -> bool:
+        if self.sample_every <= 0:
+            return False
+        with self._counter_lock:
+            self._counter += 1
+            return self._counter % self.sample_every == 0
+
+    def _requested_mode(self, environ: Dict[str, Any]) -> Optional[str]:
+        """读取并移除剖析参数；只有带合法管理员 token 的请求才会生效。"""
+        mode = environ.get(PROFILE_HEADER)
+        query = environ.get("QUERY_STRING", "")
+        if PROFILE_QUERY_ARG in query:
+            pairs = parse_qsl(query, keep_blank_values=True)
+            mode = next((v for k, v in pairs if k == PROFILE_QUERY_ARG), mode) or "sample"
+            environ["QUERY_STRING"] = urlencode([(k, v) for k, v in pairs if k != PROFILE_QUERY_ARG])
+        if not mode:
+            return None
+        mode = mode.strip().lower()
+        if mode not in MODES or not self._is_admin(environ):
+            return None
+        return mode
+
+    def _is_admin(self, environ: Dict[str, Any]) -> bool:
+        from flask_jwt_extended import decode_token
+
+        auth = environ.get("HTTP_AUTHORIZATION", "")
+        scheme, _, token = auth.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        try:
+            with self.app.app_context():
+                return decode_token(token.strip()).get("type") == "access"
+        except Exception:
+            return False
+
+    def _profile(self, environ: Dict[str, Any], start_response: StartResponse, mode: str) -> Iterable[bytes]:
+        captured: Dict[str, Any] = {}
+
+        def _capture(status: str, headers: List[Tuple[str, str]], exc_info: Any = None) -> Callable[[bytes], None]:
+            captured["status"], captured["headers"], captured["exc_info"] = status, headers, exc_info
+            return lambda data: None
+
+        # 响应体在剖析范围内一次性收集完，流式响应（如 sitemap 分片）的生成过程也会被计入
+        started = time.perf_counter()
+        result: Any
+        if mode == "cprofile":
+            result = cProfile.Profile()
+            result.enable()
+            try:
+                body = self._run(environ, _capture)
+            finally:
+                result.disable()
+        else:
+            with StackSampler(threading.get_ident(), self.interval) as result:
+                body = self._run(environ, _capture)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        name = self._file_name(environ, elapsed_ms, mode)
+        try:
+            self._write(name, mode, result)
+            captured["headers"] = list(captured["headers"]) + [("X-Profile-File", name)]
+        except OSError as e:
+            self.app.logger.error(f"Failed to write profile {name}: {str(e)}")
+
+        start_response(captured["status"], captured["headers"], captured["exc_info"])
+        return body
+
+    def _run(self, environ: Dict[str, Any], start_response: StartResponse) -> List[bytes]:
+        result = self.wsgi_app(environ, start_response)
+        try:
+            return list(result)
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                close()
+
+    def _file_name(self, environ: Dict[str, Any], elapsed_ms: float, mode: str) -> str:
+        path = _UNSAFE_NAME.sub("_", environ.get("PATH_INFO", "/").strip("/")) or "root"
+        # 同一秒内可能有多个请求被剖析，附上毫秒与线程号避免重名
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+        ext = {"sample": "collapsed", "speedscope": "speedscope.json", "cprofile": "prof"}[mode]
+        return f"{stamp}-{os.getpid()}.{threading.get_ident() % 10000}-{environ.get('REQUEST_METHOD', 'GET')}-{path[:80]}-{elapsed_ms:.0f}ms.{ext}"
+
+    def _write(self, name: str, mode: str, result: Any) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        target = os.path.join(self.directory, name)
+        if mode == "cprofile":
+            result.dump_stats(target)
+        elif mode == "speedscope":
+            with open(target, "w", encoding="utf-8") as f:
+                json.dump(result.speedscope(name), f)
+        else:
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(result.collapsed())
+        self._prune()
+
+    def _prune(self) -> None:
+        """只保留最新的 max_files 个剖析文件。"""
+        entries = [e for e in os.scandir(self.directory) if e.is_file()]
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+
+
+def _short_path(path: str) -> str:
+    """帧里的文件路径只保留 site-packages / 项目目录之后的部分，火焰图更好读。"""
+    for marker in ("site-packages" + os.sep, "backend" + os.sep):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    return os.path.basename(path)
+
+
+def register_profiler(app: Flask) -> None:
+    """在 create_app 的最后调用：把剖析中间件包在最外层，覆盖 ProxyFix 与所有蓝图。"""
+    app.wsgi_app = ProfilerMiddleware(app.wsgi_app, app)  # type: ignore[method-assign]
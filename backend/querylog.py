@@ -0,0 +1,170 @@
+"""
+慢查询日志与 N+1 检测（SQLAlchemy cursor 事件）
+
+职责：
+  1. 慢查询：单条 SQL 耗时超过 SLOW_QUERY_MS 时记一条 WARNING，附上端点、参数与执行计划
+     （SQLite 为 EXPLAIN QUERY PLAN）。同一条语句在每个进程里只附一次计划，避免刷屏。
+  2. N+1：同一个请求里结构相同的语句（参数不同、IN 列表长度不同都算同一条）执行次数
+     达到 N_PLUS_ONE_THRESHOLD 时，在请求结束后记一条 WARNING，并指出第一次达到阈值时
+     项目代码里的调用位置——循环里的 db.session.get()、to_dict() 里触发的懒加载都会被抓到。
+  3. 严格模式：QUERY_STRICT=True 时，检测到 N+1 直接抛出 NPlusOneError，
+     测试（app.testing）里异常会原样抛给测试用例，修好的热路径不会悄悄退化。
+
+NOTE: 计划通过原始 DBAPI 游标获取，不经过 SQLAlchemy，因此不会再次触发这里的事件；
+      只有超过阈值的语句才会多执行一次 EXPLAIN，正常请求的额外开销只是一次字典累加。
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import event
+
+# 同一进程内已经附过执行计划的语句数上限（LRU）
+EXPLAINED_CACHE_SIZE = 256
+
+# 日志里参数与语句的最大长度
+MAX_LOGGED_CHARS = 1000
+
+_WHITESPACE = re.compile(r"\s+")
+# IN (?, ?, ?) / VALUES (?, ?), (?, ?) 等展开后的占位符列表，归一成一个
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+
+
+class NPlusOneError(RuntimeError):
+    """严格模式下，请求里检测到重复执行的结构相同的语句。"""
+
+
+def normalize(statement: str) -> str:
+    """把语句归一成「结构」：压缩空白、合并占位符列表。"""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryLog:
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.slow_seconds = float(app.config.get("SLOW_QUERY_MS", 200)) / 1000
+        self.explain = bool(app.config.get("QUERY_EXPLAIN", True))
+        self.threshold = int(app.config.get("N_PLUS_ONE_THRESHOLD", 10))
+        self.strict = bool(app.config.get("QUERY_STRICT", False))
+        self.project_root = os.path.abspath(app.root_path) + os.sep
+
+        self._explained: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ── 事件 ────────────────────────────────────────────────────────────────────
+
+    def before_cursor_execute(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info.setdefault("querylog_started", []).append((statement, time.perf_counter()))
+
+    def after_cursor_execute(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        _, started = conn.info["querylog_started"].pop()
+        elapsed = time.perf_counter() - started
+        in_request = has_request_context()
+
+        if self.threshold > 0 and in_request:
+            shape = normalize(statement)
+            counts: Dict[str, int] = g.setdefault("query_shapes", {})
+            counts[shape] = counts.get(shape, 0) + 1
+            if counts[shape] == self.threshold:
+                g.setdefault("query_repeated", {})[shape] = self._call_site()
+
+        if self.slow_seconds > 0 and elapsed >= self.slow_seconds:
+            self._log_slow(conn, statement, parameters, executemany, elapsed, in_request)
+
+    def check_request(self, response: Response) -> Response:
+        """after_request：汇报本请求里达到阈值的重复语句。"""
+        repeated: Dict[str, str] = g.pop("query_repeated", {})
+        counts: Dict[str, int] = g.pop("query_shapes", {})
+        if not repeated:
+            return response
+
+        endpoint = request.endpoint or request.path
+        lines = [
+            f"  {counts[shape]}× {_truncate(shape)}\n    first reached the threshold at {site}"
+            for shape, site in repeated.items()
+        ]
+        message = f"Possible N+1 in {endpoint} ({request.method} {request.path}):\n" + "\n".join(lines)
+        if self.strict:
+            raise NPlusOneError(message)
+        self.app.logger.warning(message)
+        return response
+
+    # ── 慢查询 ──────────────────────────────────────────────────────────────────
+
+    def _log_slow(self, conn: Any, statement: str, parameters: Any, executemany: bool, elapsed: float, in_request: bool) -> None:
+        where = f"{request.method} {request.path}" if in_request else "outside request"
+        message = (
+            f"Slow query ({elapsed * 1000:.1f} ms, {where}): {_truncate(statement)}\n"
+            f"  params: {_truncate(repr(parameters))}"
+        )
+        plan = None if executemany else self._plan_once(conn, statement, parameters)
+        if plan:
+            message += "\n  plan:\n" + "\n".join(f"    {line}" for line in plan)
+        self.app.logger.warning(message)
+
+    def _plan_once(self, conn: Any, statement: str, parameters: Any) -> Optional[List[str]]:
+        if not self.explain:
+            return None
+        shape = normalize(statement)
+        with self._lock:
+            if shape in self._explained:
+                return None
+            self._explained[shape] = None
+            while len(self._explained) > EXPLAINED_CACHE_SIZE:
+                self._explained.popitem(last=False)
+
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception as e:
+            return [f"(EXPLAIN failed: {e})"]
+        finally:
+            cursor.close()
+        if conn.dialect.name == "sqlite":
+            # (id, parent, notused, detail)：按 parent 缩进成树
+            depth: Dict[int, int] = {0: 0}
+            plan = []
+            for node_id, parent, _, detail in rows:
+                depth[node_id] = depth.get(parent, 0) + 1
+                plan.append("  " * (depth[node_id] - 1) + str(detail))
+            return plan
+        return [" ".join(str(col) for col in row) for row in rows]
+
+    def _call_site(self) -> str:
+        """调用栈里第一个属于项目代码（不含本模块）的帧。"""
+        frame = sys._getframe(2)
+        this_file = os.path.abspath(__file__)
+        while frame is not None:
+            path = os.path.abspath(frame.f_code.co_filename)
+            if path.startswith(self.project_root) and path != this_file and "site-packages" not in path:
+                return f"{os.path.relpath(path, self.project_root)}:{frame.f_lineno} in {frame.f_code.co_name}"
+            frame = frame.f_back
+        return "unknown"
+
+
+def _truncate(text: str) -> str:
+    return text if len(text) <= MAX_LOGGED_CHARS else text[:MAX_LOGGED_CHARS] + "..."
+
+
+def register_query_log(app: Flask) -> None:
+    """在 db.init_app(app) 之后调用：为引擎注册慢查询与 N+1 检测。"""
+    if float(app.config.get("SLOW_QUERY_MS", 200)) <= 0 and int(app.config.get("N_PLUS_ONE_THRESHOLD", 10)) <= 0:
+        return
+    from database import pop_start_time_on_error
+    from extensions import db
+
+    query_log = QueryLog(app)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", query_log.before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", query_log.after_cursor_execute)
+    event.listen(engine, "handle_error", pop_start_time_on_error("querylog_started"))
+    app.after_request(query_log.check_request)
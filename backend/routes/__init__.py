@@ -4,6 +4,8 @@ from .auth import auth_bp
 from .admin import admin_bp
 from .assets import assets_bp
 from .seo import seo_bp
+from .metrics import metrics_bp
+from .batch import batch_bp
 
 def register_routes(app):
     """注册所有蓝图"""
@@ -16,7 +18,9 @@ def register_routes(app):
     app.register_blueprint(public_bp, url_prefix='/api')
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(batch_bp, url_prefix='/api')
     app.register_blueprint(assets_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
 
     # NOTE: SEO 蓝图注册在最后，路径与 SPA 前端路由重合。
     # 爬虫命中时由 Flask 返回 meta HTML；普通浏览器请求由 Nginx 的静态文件服务接管，不会到达此处。
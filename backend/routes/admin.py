@@ -3,17 +3,25 @@ import uuid
 from typing import Any, Dict, Optional, cast
 from datetime import datetime
 
-from flask import Blueprint, current_app, jsonify, request, Response
+from flask import Blueprint, current_app, jsonify, make_response, request, Response
 from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 
-from extensions import db, limiter
-from models import Article, Category, Collection, Friend, Artwork, Plan, Sponsor, Contribution
+from extensions import db, limiter, response_cache
+from models import Article, Asset, Category, Collection, Friend, Artwork, Plan, Sponsor, Contribution
 from schemas import ArticleSchema, CollectionSchema, FriendSchema, ArtworkSchema, PlanSchema, SponsorSchema
 from routes.assets import allowed_file
+from pagination import paginate
+import asset_catalog
+import search
+import imaging
 
 admin_bp = Blueprint("admin", __name__)
 
+# 素材库列表可用的排序字段
+ASSET_SORT_COLUMNS = {"mtime": Asset.mtime, "size": Asset.size, "name": Asset.path}
+ASSET_FIELDS = ("id", "name", "url", "type", "size", "width", "height", "hash", "mtime", "date")
+
 
 @admin_bp.route("/articles", methods=["POST"])
 @jwt_required()
@@ -64,6 +72,7 @@ def save_article():
             article.content = validated_data.get("content", "")
             article.category_id = category.id
             article.collection_id = real_collection_id
+            article.refresh_summary()
 
         today_str = datetime.now().strftime("%Y-%m-%d")
         contrib = cast(Optional[Contribution], Contribution.query.filter_by(date=today_str).first())
@@ -73,6 +82,10 @@ def save_article():
             new_contrib = Contribution(date=today_str, count=1)
             db.session.add(new_contrib)
 
+        db.session.flush()
+        search.index_article(article)
+        response_cache.bump("articles", "contributions")
+
         db.session.commit()
         return jsonify({"message": "Article saved successfully", "id": article.slug})
     except Exception as e:
@@ -85,7 +98,9 @@ def save_article():
 def delete_article(slug: str):
     article = cast(Optional[Article], Article.query.filter_by(slug=slug).first())
     if article:
+        search.remove_article(article.id)
         db.session.delete(article)
+        response_cache.bump("articles")
         db.session.commit()
         return jsonify({"message": "Deleted"})
     return jsonify({"error": "Not found"}), 404
@@ -94,27 +109,40 @@ def delete_article(slug: str):
 @admin_bp.route("/admin/assets", methods=["GET"])
 @jwt_required()
 def get_article_assets():
-    upload_folder_str = cast(str, current_app.config['UPLOAD_FOLDER'])
-    assets_dir = os.path.join(upload_folder_str, 'article')
-
-    if not os.path.exists(assets_dir):
-        return jsonify({"assets": []})
-
-    assets: list[Dict[str, Any]] = []
-    with os.scandir(assets_dir) as entries:
-        for entry in entries:
-            # allowed_file 只接受文件名字符串，跳过非图片文件
-            if entry.is_file():
-                mtime = entry.stat().st_mtime
-                url = f"/static/uploads/article/{entry.name}"
-                assets.append({
-                    "name": entry.name,
-                    "url": url,
-                    "mtime": mtime,
-                    "date": datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M')
-                })
-    assets.sort(key=lambda x: float(x['mtime']), reverse=True)
-    return jsonify({"assets": assets})
+    """
+    素材库列表，直接分页查 Asset 表。
+
+    查询参数：
+      ?type=article   上传类型（article / artwork / friend / misc），all 表示全部；默认 article，兼容旧前端
+      ?sort=mtime     排序字段：mtime / size / name
+      ?order=desc     asc / desc
+      以及 pagination.py 的 ?limit / ?cursor / ?fields
+    """
+    upload_type = request.args.get("type", "article")
+    sort = request.args.get("sort", "mtime")
+    order = request.args.get("order", "desc")
+    if upload_type != "all" and upload_type not in asset_catalog.UPLOAD_TYPES:
+        return jsonify({"error": f"Invalid type: {upload_type}"}), 400
+    if sort not in ASSET_SORT_COLUMNS:
+        return jsonify({"error": f"Invalid sort: {sort}"}), 400
+    if order not in ("asc", "desc"):
+        return jsonify({"error": f"Invalid order: {order}"}), 400
+
+    stmt = db.select(Asset)
+    if upload_type != "all":
+        stmt = stmt.filter_by(type=upload_type)
+
+    try:
+        assets, next_cursor, paginated = paginate(
+            stmt, (ASSET_SORT_COLUMNS[sort], Asset.id), Asset.to_dict, ASSET_FIELDS, descending=order == "desc"
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    data: Dict[str, Any] = {"assets": assets}
+    if paginated:
+        data["next_cursor"] = next_cursor
+    return jsonify(data)
 
 
 @admin_bp.route("/admin/assets", methods=["DELETE"])
@@ -123,15 +151,22 @@ def delete_article_asset():
     filename = request.args.get('filename')
     if not filename:
         return jsonify({"error": "Filename required"}), 400
+    upload_type = request.args.get('type', 'article')
+    if upload_type not in asset_catalog.UPLOAD_TYPES:
+        return jsonify({"error": f"Invalid type: {upload_type}"}), 400
     safe_filename = os.path.basename(filename)
     upload_folder_del = cast(str, current_app.config['UPLOAD_FOLDER'])
-    file_path = os.path.join(upload_folder_del, 'article', safe_filename)
+    file_path = os.path.join(upload_folder_del, upload_type, safe_filename)
 
     if os.path.exists(file_path):
         try:
             os.remove(file_path)
+            imaging.remove_derivatives(file_path)
+            asset_catalog.forget(upload_type, safe_filename)
+            db.session.commit()
             return jsonify({"message": "File deleted"})
         except Exception as e:
+            db.session.rollback()
             return jsonify({"error": str(e)}), 500
     return jsonify({"error": "File not found"}), 404
 
@@ -162,6 +197,7 @@ def add_collection():
             category_id=category.id
         )
         db.session.add(new_col)
+        response_cache.bump("articles")
         db.session.commit()
         return jsonify({"message": "Collection created"})
     except Exception as e:
@@ -178,6 +214,7 @@ def delete_collection(slug: str):
         return jsonify({"error": "Collection not found"}), 404
     Article.query.filter_by(collection_id=col.id).update({"collection_id": None})
     db.session.delete(col)
+    response_cache.bump("articles")
     db.session.commit()
     return jsonify({"message": "Collection deleted safely, articles are now independent."})
 
@@ -191,6 +228,7 @@ def update_collection(slug: str):
         return jsonify({"error": "Collection not found"}), 404
     col.name = data.get("name", col.name)
     col.description = data.get("description", col.description)
+    response_cache.bump("articles")
     db.session.commit()
     return jsonify({"message": "Collection updated"})
 
@@ -214,6 +252,7 @@ def add_friend():
             tags=validated_data.get("tags", [])
         )
         db.session.add(new_friend)
+        response_cache.bump("friends")
         db.session.commit()
         return jsonify({"message": "Friend added", "friend": new_friend.to_dict()})
     except Exception as e:
@@ -242,6 +281,7 @@ def update_friend(id: int):
         friend.url = validated_data.get("url", friend.url)
         friend.avatar = validated_data.get("avatar", friend.avatar)
         friend.tags = validated_data.get("tags", friend.tags)
+        response_cache.bump("friends")
         db.session.commit()
         return jsonify({"message": "Friend updated", "friend": friend.to_dict()})
     except Exception as e:
@@ -257,6 +297,7 @@ def delete_friend(id: int):
     if not friend:
         return jsonify({"error": "Friend not found"}), 404
     db.session.delete(friend)
+    response_cache.bump("friends")
     db.session.commit()
     return jsonify({"message": "Friend deleted"})
 
@@ -280,6 +321,7 @@ def add_artwork():
             date=validated_data.get("date", datetime.now().strftime("%Y-%m-%d"))
         )
         db.session.add(new_work)
+        response_cache.bump("artworks")
         db.session.commit()
         return jsonify({"message": "Artwork added", "artwork": new_work.to_dict()})
     except Exception as e:
@@ -308,6 +350,7 @@ def update_artwork(id: int):
         work.fullsize = validated_data.get("fullsize", work.fullsize)
         work.description = validated_data.get("description", work.description)
         work.date = validated_data.get("date", work.date)
+        response_cache.bump("artworks")
         db.session.commit()
         return jsonify({"message": "Artwork updated", "artwork": work.to_dict()})
     except Exception as e:
@@ -323,6 +366,7 @@ def delete_artwork(id: int):
     if not work:
         return jsonify({"error": "Artwork not found"}), 404
     db.session.delete(work)
+    response_cache.bump("artworks")
     db.session.commit()
     return jsonify({"message": "Artwork deleted"})
 
@@ -341,6 +385,7 @@ def add_plan():
     max_order = db.session.query(db.func.max(Plan.sort_order)).scalar() or 0
     new_plan = Plan(content=validated["content"], status=status, sort_order=max_order + 1)
     db.session.add(new_plan)
+    response_cache.bump("plans")
     db.session.commit()
     return jsonify(new_plan.to_dict())
 
@@ -363,6 +408,7 @@ def update_plan(id: int):
         plan.update_date = datetime.now().strftime("%Y-%m-%d")
     if "content" in validated:
         plan.content = validated["content"]
+    response_cache.bump("plans")
     db.session.commit()
     return jsonify(plan.to_dict())
 
@@ -376,6 +422,7 @@ def delete_plan(id: int):
         if not plan:
             return jsonify({"error": "Plan not found"}), 404
         db.session.delete(plan)
+        response_cache.bump("plans")
         db.session.commit()
         return jsonify({"message": "Plan deleted"})
     except Exception as e:
@@ -388,13 +435,20 @@ def delete_plan(id: int):
 @jwt_required()
 def reorder_plans() -> Response:
     data: list[Dict[str, Any]] = request.json or []
-    for item in data:
-        plan_id = item.get("id")
-        sort_order = item.get("sort_order")
-        if plan_id is not None and sort_order is not None:
-            plan = db.session.get(Plan, plan_id)
-            if plan:
-                plan.sort_order = sort_order
+    # 前端可能把 id 当字符串传上来（原先 session.get 会自动转换），这里统一转成整数再匹配查询结果
+    try:
+        orders = {
+            int(item["id"]): int(item["sort_order"])
+            for item in data
+            if item.get("id") is not None and item.get("sort_order") is not None
+        }
+    except (AttributeError, TypeError, ValueError):
+        return make_response(jsonify({"error": "id and sort_order must be integers"}), 400)
+    # 一次查出存在的计划，再用一条 executemany 的 UPDATE 批量改序，不再逐条 get（N+1）
+    existing = db.session.execute(db.select(Plan.id).where(Plan.id.in_(list(orders)))).scalars().all()
+    if existing:
+        db.session.execute(db.update(Plan), [{"id": plan_id, "sort_order": orders[plan_id]} for plan_id in existing])
+    response_cache.bump("plans")
     db.session.commit()
     return jsonify({"message": "Reorder successful"})
 
@@ -417,6 +471,7 @@ def add_sponsor():
         date=validated.get("date")
     )
     db.session.add(new_sponsor)
+    response_cache.bump("sponsors")
     db.session.commit()
     return jsonify({"message": "Sponsor added", "sponsor": new_sponsor.to_dict()})
 
@@ -444,6 +499,7 @@ def update_sponsor(id: int):
         sponsor.message = validated["message"]
     if "date" in validated:
         sponsor.date = validated["date"]
+    response_cache.bump("sponsors")
     db.session.commit()
     return jsonify({"message": "Sponsor updated", "sponsor": sponsor.to_dict()})
 
@@ -457,6 +513,7 @@ def delete_sponsor(id: int):
         if not sponsor:
             return jsonify({"message": "Sponsor not found"}), 404
         db.session.delete(sponsor)
+        response_cache.bump("sponsors")
         db.session.commit()
         return jsonify({"message": "Sponsor deleted"})
     except Exception as e:
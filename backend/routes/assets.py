@@ -1,21 +1,52 @@
+import hashlib
 import os
-import uuid
-from typing import cast
+import tempfile
+from typing import IO, Optional, cast
 
 import magic
-from flask import Blueprint, current_app, jsonify, request
+from flask import Blueprint, Request, Response, current_app, jsonify, request
 from flask_jwt_extended import jwt_required
 from werkzeug.utils import secure_filename
 
-from extensions import limiter
+from extensions import db, limiter
+from asset_catalog import UPLOAD_TYPES, record_upload
+import imaging
 
 assets_bp = Blueprint("assets", __name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 ALLOWED_MIME_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+# 上传请求体在文件上限之外，再留给 multipart 边界与表单字段的余量
+FORM_OVERHEAD = 1024 * 1024
+
+# 流式读写上传文件时每次处理的字节数
+CHUNK_SIZE = 64 * 1024
+# 用于 MIME 嗅探的文件头字节数
+MAGIC_HEADER_SIZE = 2048
+# 内容寻址文件名取 SHA-256 的前 32 个十六进制字符（128 位），与旧的 uuid4().hex 文件名等长
+HASH_NAME_LENGTH = 32
+
+# 上传文件的 URL 由内容决定、永不改变，可以让浏览器与 CDN 永久缓存
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@assets_bp.after_app_request
+def add_upload_cache_headers(response: Response) -> Response:
+    """开发环境由 Flask 直接提供 /static/uploads 时同样带上永久缓存头（生产环境由 Nginx 配置）。"""
+    if request.endpoint == "static" and (request.view_args or {}).get("filename", "").startswith("uploads/"):
+        if response.status_code in (200, 206, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
 
 def allowed_file(file) -> tuple[bool, str]:
+    """
+    检查文件名与扩展名。
+
+    NOTE: 文件内容（MIME 嗅探、大小上限、空文件）改由 UploadStream 在接收请求体时流式校验，
+          这里不再 seek / read 上传文件。
+    """
     if not file or not file.filename:
         return False, "No file provided"
     
@@ -27,31 +58,151 @@ def allowed_file(file) -> tuple[bool, str]:
     if ext not in ALLOWED_EXTENSIONS:
         return False, f"Extension .{ext} not allowed"
     
-    file.seek(0)
-    header = file.read(2048)
-    file.seek(0)
-    
-    try:
-        mime = magic.from_buffer(header, mime=True)
-    except Exception as e:
-        current_app.logger.error(f"MIME detection failed: {str(e)}")
-        return False, "Failed to detect file type"
-    
-    if mime not in ALLOWED_MIME_TYPES:
-        return False, f"MIME type {mime} not allowed"
-    
-    file.seek(0, 2)
-    size = file.tell()
-    file.seek(0)
-    
-    if size > MAX_FILE_SIZE:
-        return False, f"File too large (max {MAX_FILE_SIZE//1024//1024}MB)"
-    if size == 0:
-        return False, "Empty file not allowed"
-    
     return True, ""
 
 
+class UploadStream:
+    """
+    上传文件的接收容器：multipart 解析器每收到一块数据就调用一次 write()，
+    在这一遍里同时完成 MIME 嗅探（第一块）、大小限制（累计）、SHA-256 哈希和写临时文件，
+    每个并发上传只占用解析器的一小块缓冲区，原图不会被整份读进内存或重复读取。
+
+    校验失败后立即删除临时文件，剩余的请求体只读不写；失败原因记在 error 上。
+    临时文件建在上传目录里，commit() 时用 os.replace 原子地移动到最终位置。
+    """
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        self._file: Optional[IO[bytes]] = os.fdopen(fd, "w+b")
+        self._digest = hashlib.sha256()
+        self._head = bytearray()
+        self.max_size = max_size
+        self.size = 0
+        self.mime: Optional[str] = None
+        self.error: Optional[str] = None
+
+    @classmethod
+    def from_file(cls, source: IO[bytes], directory: str, max_size: int) -> "UploadStream":
+        """把普通文件对象转成 UploadStream（请求没有经过 UploadRequest 解析时的兜底）。"""
+        stream = cls(directory, max_size)
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            stream.write(chunk)
+        return stream
+
+    @property
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+    def write(self, data: bytes) -> int:
+        if self.error is None:
+            self.size += len(data)
+            if self.size > self.max_size:
+                self._fail(f"File too large (max {self.max_size//1024//1024}MB)")
+                return len(data)
+
+            self._digest.update(data)
+            cast(IO[bytes], self._file).write(data)
+            if self.mime is None:
+                self._head += data[:MAGIC_HEADER_SIZE - len(self._head)]
+                if len(self._head) >= MAGIC_HEADER_SIZE:
+                    self._sniff()
+        return len(data)
+
+    def finish(self) -> Optional[str]:
+        """请求体接收完毕后调用：补做不足一个文件头大小的小文件的嗅探，返回错误信息（通过时为 None）。"""
+        if self.error is None and self.size == 0:
+            self._fail("Empty file not allowed")
+        if self.error is None and self.mime is None:
+            self._sniff()
+        return self.error
+
+    def commit(self, target: str) -> bool:
+        """
+        把临时文件移动到 target，返回是否为重复上传。
+
+        NOTE: 同样内容的文件已经存在时直接丢弃临时文件，不覆盖原文件，派生图也保持不变；
+              但要刷新原文件的 mtime：孤儿回收（asset_catalog.find_orphans）按 mtime 计算宽限期，
+              重新上传的旧图在保存进文章之前也必须受宽限期保护。
+        """
+        self._close_file()
+        if os.path.exists(target):
+            self.close()
+            os.utime(target)
+            return True
+        os.replace(self.path, target)
+        return False
+
+    def close(self) -> None:
+        """丢弃临时文件；请求结束时 Werkzeug 会对每个上传文件调用一次。"""
+        self._close_file()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    # ── 供 FileStorage 使用的文件对象接口 ──────────────────────────────────────
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence) if self._file else 0
+
+    def tell(self) -> int:
+        return self._file.tell() if self._file else 0
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size) if self._file else b""
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._file.readline(size) if self._file else b""
+
+    def _sniff(self) -> None:
+        try:
+            mime = magic.from_buffer(bytes(self._head), mime=True)
+        except Exception as e:
+            current_app.logger.error(f"MIME detection failed: {str(e)}")
+            self._fail("Failed to detect file type")
+            return
+        self.mime = mime
+        if mime not in ALLOWED_MIME_TYPES:
+            self._fail(f"MIME type {mime} not allowed")
+
+    def _fail(self, error: str) -> None:
+        self.error = error
+        self.close()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class UploadRequest(Request):
+    """只让上传接口用 UploadStream 接收文件、按上传上限限制请求体，其它请求保持 Werkzeug 的默认行为。"""
+
+    @property
+    def max_content_length(self) -> Optional[int]:
+        # 只作用于上传接口：全局的 MAX_CONTENT_LENGTH 会连带限制后台 JSON 接口（如 /admin/batch）
+        if self._max_content_length is None and self.endpoint == "assets.upload_file":
+            return int(current_app.config.get("MAX_UPLOAD_SIZE", MAX_FILE_SIZE)) + FORM_OVERHEAD
+        return super().max_content_length
+
+    @max_content_length.setter
+    def max_content_length(self, value: Optional[int]) -> None:
+        self._max_content_length = value
+
+    def _get_file_stream(
+        self,
+        total_content_length: Optional[int],
+        content_type: Optional[str],
+        filename: Optional[str] = None,
+        content_length: Optional[int] = None,
+    ) -> IO[bytes]:
+        if self.endpoint == "assets.upload_file":
+            return cast(IO[bytes], UploadStream(
+                cast(str, current_app.config["UPLOAD_FOLDER"]),
+                current_app.config.get("MAX_UPLOAD_SIZE", MAX_FILE_SIZE),
+            ))
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
 @assets_bp.route("/upload", methods=["POST"])
 @jwt_required()
 @limiter.limit("10 per minute")
@@ -69,8 +220,7 @@ def upload_file():
     if not is_allowed:
         return jsonify({"error": err_msg}), 400
     
-    allowed_types = {'article', 'artwork', 'friend', 'misc'}
-    if upload_type not in allowed_types:
+    if upload_type not in UPLOAD_TYPES:
         upload_type = 'misc'
         
     upload_folder = cast(str, current_app.config['UPLOAD_FOLDER'])
@@ -81,21 +231,38 @@ def upload_file():
 
     # file.filename 在此处已经过 allowed_file 校验，必然包含 '.'，断言非 None 供类型检查器理解
     raw_filename: str = file.filename  # type: ignore[assignment]
-    ext = raw_filename.rsplit('.', 1)[1].lower()
-    filename = secure_filename(f"{uuid.uuid4().hex}.{ext}")
-    
-    save_path = os.path.join(save_dir, filename)
+    ext = secure_filename(raw_filename.rsplit('.', 1)[1].lower())
+
     upload_folder_abs = os.path.abspath(upload_folder)
-    save_path_abs = os.path.abspath(save_path)
-    
-    if not save_path_abs.startswith(upload_folder_abs):
+    save_dir_abs = os.path.abspath(save_dir)
+
+    if not save_dir_abs.startswith(upload_folder_abs):
         return jsonify({"error": "Path traversal detected"}), 400
-    
+
+    stream = file.stream
+    if not isinstance(stream, UploadStream):
+        stream = UploadStream.from_file(
+            stream, upload_folder_abs, current_app.config.get("MAX_UPLOAD_SIZE", MAX_FILE_SIZE)
+        )
+    err_msg = stream.finish()
+    if err_msg:
+        return jsonify({"error": err_msg}), 400
+
+    filename = f"{stream.hexdigest[:HASH_NAME_LENGTH]}.{ext}"
+    save_path_abs = os.path.join(save_dir_abs, filename)
     try:
-        file.save(save_path_abs)
+        duplicate = stream.commit(save_path_abs)
+        record_upload(upload_folder_abs, save_path_abs, upload_type, stream.hexdigest)
+        db.session.commit()
     except Exception as e:
+        db.session.rollback()
         current_app.logger.error(f"File save failed: {str(e)}")
         return jsonify({"error": "Failed to save file"}), 500
 
     url = f"/static/uploads/{upload_type}/{filename}"
-    return jsonify({"message": "Upload successful", "url": url})
+    if duplicate and os.path.exists(imaging.manifest_path(save_path_abs)):
+        manifest = imaging.manifest_url(url)
+    else:
+        # 派生图在后台生成，清单写好之前请求 manifest 会 404，前端应回退到原图
+        manifest = imaging.schedule_derivatives(current_app._get_current_object(), save_path_abs, url)
+    return jsonify({"message": "Upload successful", "url": url, "manifest": manifest, "duplicate": duplicate})
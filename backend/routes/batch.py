@@ -0,0 +1,421 @@
+"""
+后台批量写入接口：POST /api/admin/batch
+
+请求体：
+  {"operations": [
+      {"op": "create", "type": "collection", "data": {"slug": "saga", "name": "...", "category": "novels"}},
+      {"op": "update", "type": "article", "id": "chapter-1", "data": {"collection_id": "saga"}},
+      {"op": "delete", "type": "friend", "id": 3}
+  ]}
+
+  type：article / collection 的 id 为 slug；friend / artwork / sponsor 的 id 为数字主键。
+  data：与单条接口相同，用 schemas.py 校验；update 为部分更新，只写入出现的字段，slug 不可修改。
+
+语义：
+  1. 全部生效或全部不生效：任意一条校验失败、目标不存在或 slug 冲突时返回 400 / 404，并指出是第几条（index）。
+  2. 按类型分组、以固定顺序执行：合集新增 / 更新 → 文章新增 / 更新 → 文章删除 → 合集删除 → 友链 / 画廊 / 投喂，
+     因此可以在一批里新建合集并把文章移进去；同一个目标在一批里只能出现一次。
+  3. 每组操作只用常数条语句：一次 IN 查询核对目标，executemany 插入 / 按主键批量更新，IN 批量删除；
+     全文检索索引、素材引用索引、今日贡献度与响应缓存版本号在同一事务里维护。
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+from marshmallow import Schema, ValidationError
+from sqlalchemy import delete, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from extensions import db, limiter, response_cache
+from models import Article, Artwork, Category, Collection, Contribution, Friend, Sponsor, summarize
+from schemas import ArticleSchema, ArtworkSchema, CollectionSchema, FriendSchema, SponsorSchema
+import asset_catalog
+import search
+
+batch_bp = Blueprint("batch", __name__)
+
+# 单次请求允许的最大操作数
+MAX_OPERATIONS = 1000
+
+OPS = ("create", "update", "delete")
+
+
+@dataclass(frozen=True)
+class EntityType:
+    model: Any
+    schema: Type[Schema]
+    key: str        # 对外标识：slug 或数字主键 id
+    resource: str   # 对应的响应缓存资源
+    label: str      # 错误信息里的名称
+
+
+ENTITY_TYPES: Dict[str, EntityType] = {
+    "collection": EntityType(Collection, CollectionSchema, "slug", "articles", "Collection"),
+    "article": EntityType(Article, ArticleSchema, "slug", "articles", "Article"),
+    "friend": EntityType(Friend, FriendSchema, "id", "friends", "Friend"),
+    "artwork": EntityType(Artwork, ArtworkSchema, "id", "artworks", "Artwork"),
+    "sponsor": EntityType(Sponsor, SponsorSchema, "id", "sponsors", "Sponsor"),
+}
+
+# 校验通过后不写入数据库的字段（uid 与单条接口一样由后端生成）
+IGNORED_FIELDS = ("isNew", "uid")
+
+
+@dataclass
+class Operation:
+    index: int
+    op: str
+    type: str
+    target: Any = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    row_id: Optional[int] = None
+
+
+class BatchError(Exception):
+    def __init__(self, status: int, body: Dict[str, Any]) -> None:
+        super().__init__(body.get("error"))
+        self.status = status
+        self.body = body
+
+
+@batch_bp.route("/admin/batch", methods=["POST"])
+@jwt_required()
+@limiter.limit("10 per minute")
+def apply_batch():
+    payload = request.json or {}
+    operations = payload.get("operations") if isinstance(payload, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > MAX_OPERATIONS:
+        return jsonify({"error": f"Too many operations (max {MAX_OPERATIONS})"}), 400
+
+    try:
+        parsed = _parse(operations)
+        _apply(parsed)
+        db.session.commit()
+    except BatchError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Failed to apply batch: {str(e)}")
+        return jsonify({"error": "Failed to apply batch"}), 500
+
+    return jsonify({
+        "message": "Batch applied",
+        "results": [
+            {"index": o.index, "op": o.op, "type": o.type, "id": o.target if o.op != "create" else _public_id(o)}
+            for o in parsed
+        ],
+    })
+
+
+def _public_id(operation: Operation) -> Any:
+    return operation.data["slug"] if ENTITY_TYPES[operation.type].key == "slug" else operation.row_id
+
+
+# ── 校验 ────────────────────────────────────────────────────────────────────────
+
+def _parse(operations: List[Any]) -> List[Operation]:
+    """逐条校验，汇总全部错误后一次性返回；同一目标重复出现也视为错误。"""
+    parsed: List[Operation] = []
+    errors: Dict[str, Any] = {}
+    seen: Set[Tuple[str, Any]] = set()
+    for index, raw in enumerate(operations):
+        if not isinstance(raw, dict):
+            errors[str(index)] = "Operation must be an object"
+            continue
+        op, kind = raw.get("op"), raw.get("type")
+        if op not in OPS or kind not in ENTITY_TYPES:
+            errors[str(index)] = f"op must be one of {list(OPS)} and type one of {list(ENTITY_TYPES)}"
+            continue
+        entity = ENTITY_TYPES[kind]
+        operation = Operation(index, op, kind)
+
+        if op != "create":
+            target = raw.get("id")
+            if entity.key == "id":
+                try:
+                    target = int(target)
+                except (TypeError, ValueError):
+                    target = None
+            elif target is not None and not isinstance(target, str):
+                errors[str(index)] = "id must be a slug string"
+                continue
+            if not target:
+                errors[str(index)] = "id is required for update and delete"
+                continue
+            operation.target = target
+
+        if op != "delete":
+            data = raw.get("data")
+            if not isinstance(data, dict):
+                errors[str(index)] = "data must be an object"
+                continue
+            try:
+                operation.data = entity.schema(partial=op == "update").load(data)
+            except ValidationError as err:
+                errors[str(index)] = err.messages
+                continue
+            for name in IGNORED_FIELDS + (("slug",) if op == "update" else ()):
+                operation.data.pop(name, None)
+
+        key = operation.data.get("slug") if op == "create" else operation.target
+        if key is not None:
+            if (kind, key) in seen:
+                errors[str(index)] = f"{entity.label} {key} appears more than once in this batch"
+                continue
+            seen.add((kind, key))
+        parsed.append(operation)
+
+    if errors:
+        raise BatchError(400, {"error": "Validation failed", "details": errors})
+    return parsed
+
+
+# ── 执行 ────────────────────────────────────────────────────────────────────────
+
+def _apply(operations: List[Operation]) -> None:
+    groups: Dict[Tuple[str, str], List[Operation]] = {}
+    for operation in operations:
+        groups.setdefault((operation.type, operation.op), []).append(operation)
+
+    def take(kind: str, op: str) -> List[Operation]:
+        return groups.get((kind, op), [])
+
+    categories: Dict[str, int] = dict(db.session.execute(db.select(Category.slug, Category.id)).all())
+    resources: Set[str] = set()
+
+    for kind in ENTITY_TYPES:
+        ops = [o for op in OPS for o in take(kind, op)]
+        if ops:
+            resources.add(ENTITY_TYPES[kind].resource)
+            _resolve_targets(kind, ops)
+
+    _write_collections(take("collection", "create"), take("collection", "update"), categories)
+    _write_articles(take("article", "create"), take("article", "update"), categories)
+    _delete_articles(take("article", "delete"))
+    _delete_collections(take("collection", "delete"))
+    for kind in ("friend", "artwork", "sponsor"):
+        _write_simple(kind, take(kind, "create"), take(kind, "update"), take(kind, "delete"))
+
+    # 与单条保存接口一致：每次保存文章记一次今日贡献
+    saved = len(take("article", "create")) + len(take("article", "update"))
+    if saved:
+        today = datetime.now().strftime("%Y-%m-%d")
+        stmt = sqlite_insert(Contribution).values(date=today, count=saved)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[Contribution.date], set_={"count": Contribution.count + saved}
+        ))
+        resources.add("contributions")
+
+    response_cache.bump(*sorted(resources))
+
+
+def _resolve_targets(kind: str, operations: List[Operation]) -> None:
+    """一次查询核对本类型的全部目标：update / delete 的目标必须存在，create 的 slug 不能已存在。"""
+    entity = ENTITY_TYPES[kind]
+    key_column = getattr(entity.model, entity.key)
+    keys = [o.target if o.op != "create" else o.data.get("slug") for o in operations]
+    keys = [k for k in keys if k is not None]
+    existing: Dict[Any, int] = dict(
+        db.session.execute(db.select(key_column, entity.model.id).where(key_column.in_(keys))).all()
+    ) if keys else {}
+
+    for operation in operations:
+        if operation.op == "create":
+            if entity.key == "slug" and operation.data["slug"] in existing:
+                raise BatchError(400, {"error": f"{entity.label} slug already exists", "index": operation.index})
+        elif operation.target not in existing:
+            raise BatchError(404, {"error": f"{entity.label} not found", "index": operation.index})
+        else:
+            operation.row_id = existing[operation.target]
+
+
+def _category_id(operation: Operation, categories: Dict[str, int]) -> int:
+    category_id = categories.get(operation.data["category"])
+    if category_id is None:
+        raise BatchError(400, {"error": "Invalid category", "index": operation.index})
+    return category_id
+
+
+def _insert(model: Any, operations: List[Operation], rows: List[Dict[str, Any]]) -> None:
+    """
+    executemany 插入并取回新主键。
+
+    NOTE: 不用 sort_by_parameter_order=True：SQLite 下它会退化成一行一条 INSERT。
+          有 slug 的模型连同 slug 一起 RETURNING，按 slug 对回各条操作（同 content_io._upsert）；
+          只有主键的模型依赖多行 INSERT 按 VALUES 顺序分配递增 rowid，排序后的主键与参数顺序一一对应。
+    """
+    if not rows:
+        return
+    key_column = getattr(model, "slug", None)
+    if key_column is not None:
+        ids = dict(
+            (slug, new_id) for new_id, slug in db.session.execute(insert(model).returning(model.id, key_column), rows)
+        )
+        for operation, row in zip(operations, rows):
+            operation.row_id = ids[row["slug"]]
+        return
+
+    new_ids = sorted(db.session.execute(insert(model).returning(model.id), rows).scalars())
+    assert len(new_ids) == len(operations), f"inserted {len(new_ids)} {model.__name__} rows for {len(operations)} operations"
+    for operation, new_id in zip(operations, new_ids):
+        operation.row_id = new_id
+
+
+def _update(model: Any, rows: List[Dict[str, Any]]) -> None:
+    """按主键批量更新；各行字段不同也没关系，SQLAlchemy 会按字段组合分组执行。"""
+    rows = [row for row in rows if len(row) > 1]
+    if rows:
+        db.session.execute(update(model), rows)
+
+
+def _sync_references(model: Any, ids: List[int]) -> None:
+    """按写入后的当前值重建这些行的素材引用（只改了缩略图时也要带上原图）。"""
+    if not ids:
+        return
+    owner_type, fields = asset_catalog.TRACKED_FIELDS[model]
+    rows = db.session.execute(
+        db.select(model.id, *(getattr(model, f) for f in fields)).where(model.id.in_(ids))
+    ).all()
+    asset_catalog.sync_references(
+        db.session.connection(), owner_type,
+        ((row[0], asset_catalog.extract_references(*row[1:])) for row in rows),
+    )
+
+
+def _forget_references(model: Any, ids: List[int]) -> None:
+    owner_type, _ = asset_catalog.TRACKED_FIELDS[model]
+    asset_catalog.sync_references(db.session.connection(), owner_type, ((i, set()) for i in ids))
+
+
+def _write_collections(creates: List[Operation], updates: List[Operation], categories: Dict[str, int]) -> None:
+    _insert(Collection, creates, [
+        {
+            "slug": o.data["slug"],
+            "name": o.data["name"],
+            "description": o.data.get("description", ""),
+            "category_id": _category_id(o, categories),
+        }
+        for o in creates
+    ])
+    rows = []
+    for o in updates:
+        row: Dict[str, Any] = {"id": o.row_id}
+        for name in ("name", "description"):
+            if name in o.data:
+                row[name] = o.data[name]
+        if "category" in o.data:
+            row["category_id"] = _category_id(o, categories)
+        rows.append(row)
+    _update(Collection, rows)
+
+
+def _write_articles(creates: List[Operation], updates: List[Operation], categories: Dict[str, int]) -> None:
+    # 合集可能是本批里刚创建的，写完合集之后再解析 slug；不存在的合集与单条接口一样当作不属于合集
+    slugs = {o.data["collection_id"] for o in creates + updates if o.data.get("collection_id")}
+    collections: Dict[str, int] = dict(
+        db.session.execute(db.select(Collection.slug, Collection.id).where(Collection.slug.in_(slugs))).all()
+    ) if slugs else {}
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    rows = []
+    for o in creates:
+        content = o.data.get("content") or ""
+        excerpt, word_count, reading_time = summarize(content)
+        rows.append({
+            "slug": o.data["slug"],
+            "uid": str(uuid.uuid4())[:8],
+            "title": o.data["title"],
+            "date": o.data.get("date") or today,
+            "content": content,
+            "category_id": _category_id(o, categories),
+            "collection_id": collections.get(o.data.get("collection_id") or ""),
+            "excerpt": excerpt,
+            "word_count": word_count,
+            "reading_time": reading_time,
+        })
+    _insert(Article, creates, rows)
+
+    rows = []
+    for o in updates:
+        row: Dict[str, Any] = {"id": o.row_id}
+        for name in ("title", "date"):
+            if o.data.get(name) is not None:
+                row[name] = o.data[name]
+        if "content" in o.data:
+            row["content"] = o.data["content"] or ""
+            row["excerpt"], row["word_count"], row["reading_time"] = summarize(row["content"])
+        if "category" in o.data:
+            row["category_id"] = _category_id(o, categories)
+        if "collection_id" in o.data:
+            row["collection_id"] = collections.get(o.data["collection_id"] or "")
+        rows.append(row)
+    _update(Article, rows)
+
+    # 标题或正文变化都要重建索引，这里一次读回写入后的标题与正文
+    changed = [o.row_id for o in creates + updates if "title" in o.data or "content" in o.data]
+    if changed:
+        written = db.session.execute(
+            db.select(Article.id, Article.title, Article.content).where(Article.id.in_(changed))
+        ).all()
+        search.index_rows([(row.id, row.title, row.content) for row in written])
+        owner_type, _ = asset_catalog.TRACKED_FIELDS[Article]
+        with_content = {o.row_id for o in creates + updates if "content" in o.data}
+        asset_catalog.sync_references(db.session.connection(), owner_type, (
+            (row.id, asset_catalog.extract_references(row.content)) for row in written if row.id in with_content
+        ))
+
+
+def _delete_articles(deletes: List[Operation]) -> None:
+    ids = [o.row_id for o in deletes if o.row_id is not None]
+    if not ids:
+        return
+    search.remove_rows(ids)
+    _forget_references(Article, ids)
+    db.session.execute(delete(Article).where(Article.id.in_(ids)))
+
+
+def _delete_collections(deletes: List[Operation]) -> None:
+    ids = [o.row_id for o in deletes if o.row_id is not None]
+    if not ids:
+        return
+    # 与单条接口一致：合集里的文章保留，变为独立文章
+    db.session.execute(update(Article).where(Article.collection_id.in_(ids)).values(collection_id=None))
+    db.session.execute(delete(Collection).where(Collection.id.in_(ids)))
+
+
+# 新建时的默认值，与单条接口保持一致
+_CREATE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "friend": {"desc": "", "avatar": "", "tags": []},
+    "artwork": {"title": "Untitled", "description": ""},
+    "sponsor": {"avatar": None, "url": None, "message": None},
+}
+
+
+def _write_simple(kind: str, creates: List[Operation], updates: List[Operation], deletes: List[Operation]) -> None:
+    model = ENTITY_TYPES[kind].model
+    today = datetime.now().strftime("%Y-%m-%d")
+    columns = set(model.__table__.columns.keys())
+
+    rows = []
+    for o in creates:
+        row = {**_CREATE_DEFAULTS[kind], **{k: v for k, v in o.data.items() if k in columns}}
+        if "date" in columns and not row.get("date"):
+            row["date"] = today
+        rows.append(row)
+    _insert(model, creates, rows)
+    _update(model, [{"id": o.row_id, **{k: v for k, v in o.data.items() if k in columns}} for o in updates])
+
+    _, fields = asset_catalog.TRACKED_FIELDS[model]
+    _sync_references(model, [o.row_id for o in creates + updates if o.row_id is not None and any(f in o.data for f in fields)])
+
+    ids = [o.row_id for o in deletes if o.row_id is not None]
+    if ids:
+        _forget_references(model, ids)
+        db.session.execute(delete(model).where(model.id.in_(ids)))
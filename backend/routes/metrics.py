@@ -0,0 +1,38 @@
+"""
+性能指标抓取接口：GET /api/metrics（Prometheus 文本格式）
+
+鉴权二选一：
+  1. Authorization: Bearer <METRICS_TOKEN> —— 给 Prometheus 用的长期静态令牌；
+  2. 管理员的 JWT access token —— 在浏览器或 curl 里临时查看。
+"""
+
+import hmac
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request
+
+from extensions import limiter, metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _has_metrics_token() -> bool:
+    token = current_app.config.get("METRICS_TOKEN")
+    if not token:
+        return False
+    auth = request.headers.get("Authorization", "")
+    scheme, _, credentials = auth.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip().encode("utf-8"), token.encode("utf-8"))
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+@limiter.exempt
+def get_metrics():
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics disabled"}), 404
+    if not _has_metrics_token():
+        # 不是静态令牌时按管理员 JWT 校验，失败由 flask_jwt_extended 返回 401
+        verify_jwt_in_request()
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,46 +1,124 @@
-from typing import Any, Dict, List, cast
-from flask import Blueprint, Response, jsonify, make_response
+from typing import Any, Callable, Dict, Tuple
+from flask import Blueprint, Response, jsonify, make_response, request
+from sqlalchemy import Select
+from sqlalchemy.orm import undefer
 from models import Category, Collection, Article, Friend, Sponsor, Artwork, Contribution, Plan
-from extensions import db
+from extensions import db, response_cache
+from pagination import PAGINATION_PARAMS, paginate
+from search import search_articles
 
 public_bp = Blueprint("public", __name__)
 
+# ── 列表分页 ────────────────────────────────────────────────────────────────────
+# 列表接口支持 ?limit / ?cursor / ?fields（见 pagination.py），不带 limit 时仍返回完整列表，兼容旧前端。
+# 下面是各列表允许通过 fields 选取的字段。
+
+ARTICLE_FIELDS = ("id", "uid", "title", "date", "collection_id", "excerpt", "word_count", "reading_time")
+FRIEND_FIELDS = ("id", "name", "desc", "url", "avatar", "tags")
+SPONSOR_FIELDS = ("id", "name", "avatar", "url", "message", "date")
+ARTWORK_FIELDS = ("id", "title", "thumbnail", "fullsize", "description", "date")
+CONTRIBUTION_FIELDS = ("date", "count")
+PLAN_FIELDS = ("id", "content", "status", "update_date", "sort_order")
+
+
+def _list_response(
+    name: str,
+    stmt: Select[Any],
+    order_columns: Tuple[Any, ...],
+    serialize: Callable[[Any], Dict[str, Any]],
+    allowed_fields: Tuple[str, ...],
+) -> Response:
+    try:
+        items, next_cursor, paginated = paginate(stmt, order_columns, serialize, allowed_fields)
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+
+    data: Dict[str, Any] = {name: items}
+    if paginated:
+        data["next_cursor"] = next_cursor
+    return jsonify(data)
+
+
 @public_bp.route("/articles/index")
+@response_cache.cached("articles")
 def get_article_index() -> Response:
+    """
+    文章索引。
+
+    NOTE: 查询次数固定为 3 次，与分类、合集数量无关：
+      1. 分类列表（保证没有文章的分类也有空数组）
+      2. 文章投影（不含 content 列，摘要 / 字数直接读预先算好的列）
+      3. 合集 + 文章数的 GROUP BY 统计（不再为了 len() 懒加载整份文章列表）
+    """
     data: Dict[str, Any] = {}
     data["_collections"] = {}
 
-    categories: List[Category] = cast(
-        List[Category], db.session.execute(db.select(Category)).scalars().all()
-    )
-
-    for cat in categories:
-        articles: List[Article] = cast(
-            List[Article],
-            db.session.execute(
-                db.select(Article).filter_by(category_id=cat.id, collection_id=None)
-            ).scalars().all(),
+    category_slugs = db.session.execute(db.select(Category.slug).order_by(Category.id)).scalars().all()
+    for slug in category_slugs:
+        data[slug] = []
+        data["_collections"][slug] = []
+
+    article_rows = db.session.execute(
+        db.select(
+            Category.slug,
+            Article.slug,
+            Article.uid,
+            Article.title,
+            Article.date,
+            Article.excerpt,
+            Article.word_count,
+            Article.reading_time,
         )
-        data[cat.slug] = [a.to_dict_simple() for a in articles]
-
-        collections: List[Collection] = cast(
-            List[Collection],
-            db.session.execute(
-                db.select(Collection).filter_by(category_id=cat.id)
-            ).scalars().all(),
+        .join(Category, Article.category_id == Category.id)
+        .where(Article.collection_id.is_(None))
+        .order_by(Article.id)
+    ).all()
+    for cat_slug, slug, uid, title, date, excerpt, word_count, reading_time in article_rows:
+        data[cat_slug].append({
+            "id": slug,
+            "uid": uid,
+            "title": title,
+            "date": date,
+            "collection_id": None,
+            "excerpt": excerpt,
+            "word_count": word_count,
+            "reading_time": reading_time
+        })
+
+    collection_rows = db.session.execute(
+        db.select(
+            Category.slug,
+            Collection.slug,
+            Collection.name,
+            Collection.description,
+            db.func.count(Article.id),
         )
-        data["_collections"][cat.slug] = [c.to_dict_simple() for c in collections]
+        .join(Category, Collection.category_id == Category.id)
+        .outerjoin(Article, Article.collection_id == Collection.id)
+        .group_by(Collection.id)
+        .order_by(Collection.id)
+    ).all()
+    for cat_slug, slug, name, description, article_count in collection_rows:
+        data["_collections"][cat_slug].append({
+            "id": slug,
+            "name": name,
+            "description": description,
+            "article_count": article_count
+        })
 
     return jsonify(data)
 
 @public_bp.route("/article/<category_slug>/<article_slug>")
+@response_cache.cached("articles")
 def get_article_content(category_slug: str, article_slug: str) -> Response:
     category = db.session.execute(db.select(Category).filter_by(slug=category_slug)).scalar_one_or_none()
     if not category:
         return make_response(jsonify({"error": "Category not found"}), 404)
 
     article = db.session.execute(
-        db.select(Article).filter_by(slug=article_slug, category_id=category.id)
+        db.select(Article)
+        .options(undefer(Article.content))
+        .filter_by(slug=article_slug, category_id=category.id)
     ).scalar_one_or_none()
 
     if not article:
@@ -56,39 +134,74 @@ def get_article_content(category_slug: str, article_slug: str) -> Response:
     })
 
 @public_bp.route("/collection/<collection_slug>")
+@response_cache.cached("articles", params=PAGINATION_PARAMS)
 def get_collection_detail(collection_slug: str) -> Response:
     collection = db.session.execute(db.select(Collection).filter_by(slug=collection_slug)).scalar_one_or_none()
     if not collection:
         return make_response(jsonify({"error": "Collection not found"}), 404)
 
-    return jsonify({
+    try:
+        articles, next_cursor, paginated = paginate(
+            db.select(Article).filter_by(collection_id=collection.id),
+            (Article.date, Article.id),
+            Article.to_dict_simple,
+            ARTICLE_FIELDS,
+        )
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+
+    data: Dict[str, Any] = {
         "id": collection.slug,
         "name": collection.name,
         "description": collection.description,
-        "articles": [a.to_dict_simple() for a in collection.articles]
-    })
+        "articles": articles
+    }
+    if paginated:
+        data["next_cursor"] = next_cursor
+    return jsonify(data)
 
 @public_bp.route("/friends")
+@response_cache.cached("friends", params=PAGINATION_PARAMS)
 def get_friends() -> Response:
-    friends = db.session.execute(db.select(Friend)).scalars().all()
-    return jsonify({"friends": [f.to_dict() for f in friends]})
+    return _list_response("friends", db.select(Friend), (Friend.id,), Friend.to_dict, FRIEND_FIELDS)
 
 @public_bp.route("/sponsors")
+@response_cache.cached("sponsors", params=PAGINATION_PARAMS)
 def get_sponsors() -> Response:
-    sponsors = db.session.execute(db.select(Sponsor)).scalars().all()
-    return jsonify({"sponsors": [s.to_dict() for s in sponsors]})
+    return _list_response("sponsors", db.select(Sponsor), (Sponsor.id,), Sponsor.to_dict, SPONSOR_FIELDS)
 
 @public_bp.route("/artworks")
+@response_cache.cached("artworks", params=PAGINATION_PARAMS)
 def get_artworks() -> Response:
-    artworks = db.session.execute(db.select(Artwork)).scalars().all()
-    return jsonify({"artworks": [a.to_dict() for a in artworks]})
+    return _list_response("artworks", db.select(Artwork), (Artwork.id,), Artwork.to_dict, ARTWORK_FIELDS)
 
 @public_bp.route("/contributions")
+@response_cache.cached("contributions", params=PAGINATION_PARAMS)
 def get_contributions() -> Response:
-    contributions = db.session.execute(db.select(Contribution)).scalars().all()
-    return jsonify({"contributions": [c.to_dict() for c in contributions]})
+    return _list_response(
+        "contributions", db.select(Contribution), (Contribution.date,), Contribution.to_dict, CONTRIBUTION_FIELDS
+    )
 
 @public_bp.route("/plans")
+@response_cache.cached("plans", params=PAGINATION_PARAMS)
 def get_plans() -> Response:
-    plans = db.session.execute(db.select(Plan)).scalars().all()
-    return jsonify({"plans": [p.to_dict() for p in plans]})
+    return _list_response("plans", db.select(Plan), (Plan.sort_order, Plan.id), Plan.to_dict, PLAN_FIELDS)
+
+@public_bp.route("/search")
+def search() -> Response:
+    """
+    全文搜索。
+
+    NOTE: 不走响应缓存：自由文本查询几乎不重复，缓存只会把文章页等热点条目挤出 LRU；
+          FTS5 查询本身只有一条语句。
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return make_response(jsonify({"error": "Query required"}), 400)
+    if len(query) > 100:
+        return make_response(jsonify({"error": "Query too long"}), 400)
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 50)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+
+    results, has_more = search_articles(query, limit=limit, offset=offset)
+    return jsonify({"query": query, "results": results, "has_more": has_more})
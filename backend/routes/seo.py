@@ -2,7 +2,8 @@
 SEO 支援蓝图
 
 职责：
-  1. sitemap.xml —— 动态生成包含所有文章与页面的标准站点地图，供搜索引擎爬取。
+  1. sitemap.xml —— 动态生成包含所有文章与页面的标准站点地图，供搜索引擎爬取；
+     URL 超过 5 万条时自动切换为 sitemap 索引 + 分片。
   2. 爬虫 meta 注入 —— 检测搜索引擎 User-Agent，对爬虫请求返回带有页面专属
      title / description / og:* 标签的完整 HTML，解决纯 SPA 无法被正常索引的问题。
      普通浏览器请求不受影响，仍由 Vue SPA 接管。
@@ -10,11 +11,16 @@ SEO 支援蓝图
 NOTE: 此蓝图应在所有 API 蓝图之后、兜底 SPA 路由之前注册，且 url_prefix 为空字符串。
 """
 
+import itertools
+import math
 import re
 from datetime import datetime, timezone
-from flask import Blueprint, Response, current_app, make_response, request
+from typing import Iterable, Iterator, Tuple
+from xml.sax.saxutils import escape as xml_escape
+
+from flask import Blueprint, Response, current_app, make_response, request, stream_with_context
 from models import Article, Category
-from extensions import db
+from extensions import db, response_cache
 
 seo_bp = Blueprint("seo", __name__)
 
@@ -84,70 +90,120 @@ def _build_seo_html(title: str, description: str, canonical: str, og_image: str
 
 # ── sitemap.xml ──────────────────────────────────────────────────────────────────
 
+# 单个 sitemap 文件的 URL 上限（sitemaps.org 协议规定 50,000）
+SITEMAP_MAX_URLS = 50000
+
+_STATIC_PAGES = [
+    ("/home",     "1.0", "daily"),
+    ("/articles", "0.9", "weekly"),
+    ("/gallery",  "0.7", "monthly"),
+    ("/friends",  "0.6", "monthly"),
+]
+
+
+def _site_lastmod() -> str:
+    """静态页与分类页的 lastmod：取文章数据最近一次变更的日期，从未变更过则取当日。"""
+    ts = response_cache.last_modified(("articles",)) or datetime.now(timezone.utc).timestamp()
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _iter_sitemap_urls() -> Iterator[Tuple[str, str, str, str]]:
+    """
+    按顺序产出全站 (loc, lastmod, changefreq, priority)。
+
+    NOTE: 分类页与文章页来自同一条 Category LEFT JOIN Article 的投影查询，
+          不加载 Article.content，也不再逐篇回查分类。
+    """
+    lastmod = _site_lastmod()
+    for path, priority, changefreq in _STATIC_PAGES:
+        yield f"{SITE_URL}{path}", lastmod, changefreq, priority
+
+    rows = db.session.execute(
+        db.select(Category.slug, Article.slug, Article.date)
+        .outerjoin(Article, Article.category_id == Category.id)
+        .order_by(Category.id, Article.id)
+        .execution_options(yield_per=1000)
+    )
+    current_category = None
+    for cat_slug, article_slug, article_date in rows:
+        if cat_slug != current_category:
+            current_category = cat_slug
+            yield f"{SITE_URL}/articles/{cat_slug}", lastmod, "weekly", "0.8"
+        if article_slug is not None:
+            yield f"{SITE_URL}/articles/{cat_slug}/{article_slug}", article_date, "monthly", "0.9"
+
+
+def _sitemap_url_count() -> int:
+    """与 _iter_sitemap_urls 产出的条数一致（静态页 + 分类页 + 文章页）。"""
+    category_count = db.select(db.func.count(Category.id)).scalar_subquery()
+    article_count = (
+        db.select(db.func.count(Article.id))
+        .join(Category, Article.category_id == Category.id)
+        .scalar_subquery()
+    )
+    return len(_STATIC_PAGES) + db.session.execute(db.select(category_count + article_count)).scalar_one()
+
+
+def _iter_urlset(urls: Iterable[Tuple[str, str, str, str]]) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for loc, lastmod, changefreq, priority in urls:
+        yield (
+            f"  <url>\n"
+            f"    <loc>{xml_escape(loc)}</loc>\n"
+            f"    <lastmod>{xml_escape(lastmod)}</lastmod>\n"
+            f"    <changefreq>{changefreq}</changefreq>\n"
+            f"    <priority>{priority}</priority>\n"
+            f"  </url>\n"
+        )
+    yield "</urlset>"
+
+
+def _iter_sitemap_index(shard_count: int) -> Iterator[str]:
+    lastmod = _site_lastmod()
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for page in range(1, shard_count + 1):
+        yield (
+            f"  <sitemap>\n"
+            f"    <loc>{SITE_URL}/sitemap-{page}.xml</loc>\n"
+            f"    <lastmod>{lastmod}</lastmod>\n"
+            f"  </sitemap>\n"
+        )
+    yield "</sitemapindex>"
+
+
+def _xml_response(chunks: Iterator[str]) -> Response:
+    # NOTE: 以生成器流式输出；开启响应缓存时由缓存层一次性收集、压缩并保存，直到文章数据变更
+    return Response(stream_with_context(chunks), content_type="application/xml; charset=utf-8")
+
+
 @seo_bp.route("/sitemap.xml")
+@response_cache.cached("articles")
 def sitemap() -> Response:
     """
     动态生成 sitemap.xml。
 
     包含：首页、各分类页、所有文章详情页。
-    lastmod 取文章 date 字段；静态页使用当日日期。
+    lastmod 取文章 date 字段；静态页与分类页取文章数据最近一次变更的日期。
+    URL 总数超过 SITEMAP_MAX_URLS 时改为输出 sitemap 索引，指向 /sitemap-<n>.xml 分片。
     """
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-
-    urls: list[dict] = []
-
-    # 静态固定页面
-    static_pages = [
-        {"loc": f"{SITE_URL}/home",     "priority": "1.0", "changefreq": "daily"},
-        {"loc": f"{SITE_URL}/articles", "priority": "0.9", "changefreq": "weekly"},
-        {"loc": f"{SITE_URL}/gallery",  "priority": "0.7", "changefreq": "monthly"},
-        {"loc": f"{SITE_URL}/friends",  "priority": "0.6", "changefreq": "monthly"},
-    ]
-    for page in static_pages:
-        urls.append({**page, "lastmod": today})
-
-    # 分类页
-    categories = db.session.execute(db.select(Category)).scalars().all()
-    for cat in categories:
-        urls.append({
-            "loc": f"{SITE_URL}/articles/{cat.slug}",
-            "lastmod": today,
-            "priority": "0.8",
-            "changefreq": "weekly",
-        })
-
-    # 文章详情页
-    articles = db.session.execute(db.select(Article)).scalars().all()
-    for article in articles:
-        cat = db.session.get(Category, article.category_id)
-        if not cat:
-            continue
-        urls.append({
-            "loc": f"{SITE_URL}/articles/{cat.slug}/{article.slug}",
-            "lastmod": article.date,
-            "priority": "0.9",
-            "changefreq": "monthly",
-        })
-
-    # 组装 XML
-    url_entries = "\n".join(
-        f"""  <url>
-    <loc>{u["loc"]}</loc>
-    <lastmod>{u["lastmod"]}</lastmod>
-    <changefreq>{u["changefreq"]}</changefreq>
-    <priority>{u["priority"]}</priority>
-  </url>"""
-        for u in urls
-    )
+    total = _sitemap_url_count()
+    if total > SITEMAP_MAX_URLS:
+        return _xml_response(_iter_sitemap_index(math.ceil(total / SITEMAP_MAX_URLS)))
+    return _xml_response(_iter_urlset(_iter_sitemap_urls()))
 
-    xml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
-{url_entries}
-</urlset>"""
 
-    resp = make_response(xml)
-    resp.headers["Content-Type"] = "application/xml; charset=utf-8"
-    return resp
+@seo_bp.route("/sitemap-<int:page>.xml")
+@response_cache.cached("articles")
+def sitemap_shard(page: int) -> Response:
+    """sitemap 索引的第 page 个分片（从 1 开始）。"""
+    total = _sitemap_url_count()
+    if page < 1 or (page - 1) * SITEMAP_MAX_URLS >= total:
+        return make_response("Sitemap not found", 404)
+    start = (page - 1) * SITEMAP_MAX_URLS
+    urls = itertools.islice(_iter_sitemap_urls(), start, start + SITEMAP_MAX_URLS)
+    return _xml_response(_iter_urlset(urls))
 
 
 # ── 爬虫 meta 注入（SPA 路由拦截） ──────────────────────────────────────────────
@@ -157,7 +213,7 @@ def seo_article(category_slug: str, article_slug: str) -> Response:
     """
     文章详情页的爬虫 meta 注入端点。
 
-    爬虫命中时：查询数据库取标题与正文摘要，返回纯 meta HTML。
+    爬虫命中时：查询数据库取标题与预存的正文摘要，返回纯 meta HTML。
     普通浏览器：重定向至 SPA（由 Nginx/前端路由接管）。
 
     NOTE: 此路由与前端 SPA 路由路径相同，依赖 Nginx 将爬虫流量路由至 Flask，
@@ -168,34 +224,24 @@ def seo_article(category_slug: str, article_slug: str) -> Response:
         # 非爬虫：返回 SPA 壳，让前端 Vue Router 接管
         return current_app.send_static_file("index.html")  # type: ignore[return-value]
 
-    category = db.session.execute(
-        db.select(Category).filter_by(slug=category_slug)
-    ).scalar_one_or_none()
-
-    article = (
-        db.session.execute(
-            db.select(Article).filter_by(slug=article_slug, category_id=category.id)
-        ).scalar_one_or_none()
-        if category
-        else None
-    )
+    # 只取标题与预先算好的摘要（见 Article.refresh_summary），不加载正文、不做正则处理
+    row = db.session.execute(
+        db.select(Article.title, Article.excerpt)
+        .join(Category, Article.category_id == Category.id)
+        .where(Category.slug == category_slug, Article.slug == article_slug)
+    ).one_or_none()
 
-    if not article:
+    if not row:
         return make_response(_build_seo_html(
             title="页面未找到",
             description=f"{SITE_NAME} - 该文章不存在或已被删除。",
             canonical=f"{SITE_URL}/articles/{category_slug}/{article_slug}",
         ), 404)
 
-    # 取正文前 120 字作为摘要（去除 Markdown 符号）
-    raw_content = article.content or ""
-    plain = re.sub(r"[#*`>\[\]!_~\-]", "", raw_content).strip()
-    plain = re.sub(r"\s+", " ", plain)
-    excerpt = plain[:120] + ("..." if len(plain) > 120 else "")
-
+    title, excerpt = row
     canonical = f"{SITE_URL}/articles/{category_slug}/{article_slug}"
     html = _build_seo_html(
-        title=article.title,
+        title=title,
         description=excerpt or SITE_DESC,
         canonical=canonical,
     )
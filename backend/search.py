@@ -0,0 +1,234 @@
+"""
+文章全文检索（SQLite FTS5）
+
+职责：
+  1. 维护 article_fts 虚拟表（rowid = article.id），在后台写入文章时与业务数据同一事务增量更新。
+  2. 提供带 bm25 排序、标题高亮与正文片段的检索。
+
+中文分词：
+  unicode61 分词器会把连续的汉字当成一个整词，导致「你好世界」只能整句命中。
+  这里在建索引与查询时都在每个 CJK 字符两侧插入 U+2063（不可见分隔符，unicode61 默认视为分隔符），
+  相当于按字切分，查询词按「相邻字短语」匹配；输出片段前再把分隔符去掉，原文得以原样还原。
+"""
+
+import html
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.orm import undefer
+
+from extensions import db, response_cache
+from models import Article, Category, markdown_to_plain
+
+FTS_TABLE = "article_fts"
+
+FTS_DDL = f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    title,
+    content,
+    tokenize = "unicode61 remove_diacritics 2"
+)"""
+
+# 标题命中权重远高于正文
+SEARCH_SQL = f"""
+SELECT rowid,
+       highlight({FTS_TABLE}, 0, char(57344), char(57345)) AS title_hl,
+       snippet({FTS_TABLE}, 1, char(57344), char(57345), '…', :snippet_tokens) AS snippet
+FROM {FTS_TABLE}
+WHERE {FTS_TABLE} MATCH :match
+ORDER BY bm25({FTS_TABLE}, 10.0, 1.0)
+LIMIT :limit OFFSET :offset
+"""
+
+# 片段长度（以 token 计，中文约等于字数），FTS5 上限为 64
+SNIPPET_TOKENS = 32
+
+_SEPARATOR = "\u2063"
+_MARK_OPEN = "\ue000"
+_MARK_CLOSE = "\ue001"
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_CJK_CHAR = re.compile(f"([{_CJK}])")
+# 查询串里的一个「词」：连续的 CJK 字符，或连续的字母数字
+_QUERY_TERM = re.compile(f"[{_CJK}]+|[^\\W_]+")
+
+_table_checked = False
+
+
+def segment(value: Optional[str]) -> str:
+    """在每个 CJK 字符两侧插入分隔符，使 unicode61 按字切分。"""
+    return _CJK_CHAR.sub(f"{_SEPARATOR}\\1{_SEPARATOR}", value or "")
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    把用户输入转成 FTS5 MATCH 表达式；没有任何可检索的词时返回 None。
+
+    CJK 片段转成相邻字短语，字母数字词做前缀匹配，多个词之间为 AND。
+    NOTE: 每个词都包在双引号里，用户输入的 AND / OR / NEAR / * 等语法字符不会被解释。
+    """
+    clauses: List[str] = []
+    for term in _QUERY_TERM.findall(query):
+        phrase = '"' + segment(term).replace('"', '""') + '"'
+        if not _CJK_CHAR.match(term):
+            phrase += "*"
+        clauses.append(phrase)
+    return " ".join(clauses) if clauses else None
+
+
+def render_fragment(value: str) -> str:
+    """去掉分隔符、转义 HTML，再把高亮标记换成 <mark>，可以直接 v-html。"""
+    escaped = html.escape(value.replace(_SEPARATOR, ""))
+    return escaped.replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def _index_row(article: Article) -> Dict[str, Any]:
+    return {
+        "rowid": article.id,
+        "title": segment(article.title),
+        "content": segment(markdown_to_plain(article.content)),
+    }
+
+
+# ── 索引维护 ────────────────────────────────────────────────────────────────────
+
+def ensure_index() -> bool:
+    """确保 FTS 表存在（每个进程只检查一次）；本次新建时返回 True。"""
+    global _table_checked
+    if _table_checked:
+        return False
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first()
+    if not exists:
+        db.session.execute(text(FTS_DDL))
+    _table_checked = True
+    return not exists
+
+
+def index_article(article: Article) -> None:
+    """
+    新增或更新一篇文章的索引。
+
+    NOTE: 需要 article.id，新文章请先 db.session.flush()；与业务写入同一事务提交。
+    """
+    if ensure_index():
+        current_app.logger.warning(f"{FTS_TABLE} was just created; run `flask search rebuild` to index old articles.")
+    db.session.execute(
+        text(f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, title, content) VALUES (:rowid, :title, :content)"),
+        _index_row(article),
+    )
+
+
+def index_rows(rows: List[Tuple[int, str, Optional[str]]]) -> None:
+    """
+    批量新增或更新索引，rows 为 (article.id, 标题, 正文)；用于不经过 ORM 对象的批量导入。
+
+    NOTE: 与业务写入同一事务提交，调用方负责 bump 缓存版本。
+    """
+    if not rows:
+        return
+    ensure_index()
+    db.session.execute(
+        text(f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, title, content) VALUES (:rowid, :title, :content)"),
+        [
+            {"rowid": article_id, "title": segment(title), "content": segment(markdown_to_plain(content))}
+            for article_id, title, content in rows
+        ],
+    )
+
+
+def remove_article(article_id: int) -> None:
+    """从索引里删除一篇文章。"""
+    ensure_index()
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"), {"rowid": article_id})
+
+
+def remove_rows(article_ids: List[int]) -> None:
+    """从索引里批量删除文章。"""
+    if not article_ids:
+        return
+    ensure_index()
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"), [{"rowid": i} for i in article_ids])
+
+
+def rebuild(batch_size: int = 500) -> int:
+    """清空并按批重建全部索引，返回索引的文章数。"""
+    ensure_index()
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    total = 0
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            db.select(Article)
+            .options(undefer(Article.content))
+            .where(Article.id > last_id)
+            .order_by(Article.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not batch:
+            break
+        db.session.execute(
+            text(f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (:rowid, :title, :content)"),
+            [_index_row(a) for a in batch],
+        )
+        last_id = batch[-1].id
+        total += len(batch)
+        db.session.expunge_all()
+    db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+    response_cache.bump("articles")
+    db.session.commit()
+    return total
+
+
+# ── 查询 ────────────────────────────────────────────────────────────────────────
+
+def search_articles(query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    检索文章，返回 (结果列表, 是否还有下一页)。
+
+    结果按相关度排序，title / snippet 为已转义、带 <mark> 高亮的 HTML 片段。
+    """
+    match = build_match_query(query)
+    if match is None:
+        return [], False
+
+    ensure_index()
+    hits = db.session.execute(
+        text(SEARCH_SQL),
+        {"match": match, "limit": limit + 1, "offset": offset, "snippet_tokens": SNIPPET_TOKENS},
+    ).all()
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    if not hits:
+        return [], False
+
+    # 一次性取回命中文章的元数据（不含正文），再按相关度顺序拼装
+    meta = {
+        row.id: row
+        for row in db.session.execute(
+            db.select(
+                Article.id, Article.slug, Article.uid, Article.date, Article.collection_id,
+                Category.slug.label("category"),
+            )
+            .join(Category, Article.category_id == Category.id)
+            .where(Article.id.in_([hit.rowid for hit in hits]))
+        )
+    }
+    results: List[Dict[str, Any]] = []
+    for hit in hits:
+        row = meta.get(hit.rowid)
+        if row is None:
+            continue
+        results.append({
+            "id": row.slug,
+            "uid": row.uid,
+            "category": row.category,
+            "date": row.date,
+            "collection_id": row.collection_id,
+            "title": render_fragment(hit.title_hl),
+            "snippet": render_fragment(hit.snippet),
+        })
+    return results, has_more
+
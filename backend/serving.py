@@ -0,0 +1,103 @@
+"""
+生产环境启动支持（wsgi.py / gunicorn.conf.py / flask serve 共用）
+
+职责：
+  1. warm_up()：在 gunicorn master 里、fork worker 之前执行一次，
+     预先请求热点公开接口填满响应缓存（fork 后各 worker 以写时复制的方式共享），
+     然后关闭 master 持有的数据库连接，避免 SQLite 连接跨进程复用。
+  2. on_worker_start()：每个 worker fork 之后执行，建立本进程自己的数据库连接
+     （触发 database.py 里的 PRAGMA），第一个访客不用再付建连与调优的开销。
+  3. on_worker_exit()：worker 优雅退出时等待后台派生图任务完成，再释放连接。
+  4. default_workers()：按 CPU 核数给出 worker / 线程数的默认值。
+
+NOTE: gunicorn 不支持 Windows；Windows 上 flask serve 会退回到多线程的 Werkzeug 服务器，仅供本地试用。
+"""
+
+import multiprocessing
+import os
+from typing import List, Tuple
+
+from flask import Flask
+
+from extensions import db, metrics
+from models import Article, Category
+import imaging
+
+# 启动预热时额外请求的最新文章数
+WARMUP_ARTICLES = 20
+
+# 预热的固定路径：文章索引、站点地图与各公开列表
+_WARMUP_PATHS = (
+    "/api/articles/index",
+    "/api/friends",
+    "/api/sponsors",
+    "/api/artworks",
+    "/api/contributions",
+    "/api/plans",
+    "/sitemap.xml",
+)
+
+
+def default_workers() -> Tuple[int, int]:
+    """
+    返回 (worker 进程数, 每个 worker 的线程数)。
+
+    进程数取 CPU 核数 + 1：请求大多是 SQLite 读与 JSON 序列化，CPU 绑定为主，
+    再多的进程只会争抢同一个数据库文件的写锁；每个进程再开 4 个线程吸收慢客户端与 I/O 等待。
+    均可用 WEB_CONCURRENCY / GUNICORN_THREADS 环境变量覆盖。
+    """
+    cores = multiprocessing.cpu_count()
+    workers = int(os.getenv("WEB_CONCURRENCY", cores + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+    return workers, threads
+
+
+def _warmup_urls(app: Flask) -> List[str]:
+    urls = list(_WARMUP_PATHS)
+    with app.app_context():
+        rows = db.session.execute(
+            db.select(Category.slug, Article.slug)
+            .join(Category, Article.category_id == Category.id)
+            .order_by(Article.date.desc(), Article.id.desc())
+            .limit(WARMUP_ARTICLES)
+        ).all()
+    urls.extend(f"/api/article/{cat_slug}/{slug}" for cat_slug, slug in rows)
+    return urls
+
+
+def warm_up(app: Flask) -> int:
+    """请求热点接口填充响应缓存，返回成功预热的 URL 数。在 fork worker 之前调用。"""
+    warmed = 0
+    try:
+        client = app.test_client()
+        for url in _warmup_urls(app):
+            resp = client.get(url)
+            resp.get_data()
+            if resp.status_code == 200:
+                warmed += 1
+    except Exception as e:
+        # 数据库还没初始化等情况：跳过预热，不影响启动
+        app.logger.warning(f"Warm-up skipped: {str(e)}")
+    finally:
+        # 预热请求不计入性能指标
+        metrics.reset()
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    return warmed
+
+
+def on_worker_start(app: Flask) -> None:
+    """worker fork 之后调用：丢弃从 master 继承的连接池，建立本进程自己的连接。"""
+    with app.app_context():
+        # close=False：不去关闭父进程的连接，只是让本进程不再使用它们
+        db.engine.dispose(close=False)
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+
+
+def on_worker_exit(app: Flask) -> None:
+    """worker 退出前调用：等待排队中的派生图任务完成，再关闭数据库连接。"""
+    imaging.shutdown(wait=True)
+    with app.app_context():
+        db.engine.dispose()
@@ -0,0 +1,15 @@
+"""
+生产环境 WSGI 入口
+
+    gunicorn -c gunicorn.conf.py          # 配置里已经指定 wsgi_app = "wsgi:app"
+    flask serve                           # 等价的 CLI 启动方式
+
+NOTE: gunicorn 开启 preload_app 时本模块只在 master 里导入一次，
+      应用创建与缓存预热都发生在 fork worker 之前。
+"""
+
+from app import create_app
+from serving import warm_up
+
+app = create_app()
+warm_up(app)
@@ -14,4 +14,20 @@ export const login = (data: Record<string, string>) => api.post('/admin/login',
  * @param token 用于续签的刷新令牌 (Refresh Token)，不可错传为 Access Token
  * @returns 包含全新 Access Token 的响应
  */
-export const refreshToken = (token: string) => api.post('/admin/refresh', {}, { headers: { Authorization: `Bearer ${token}` } })
\ No newline at end of file
+export const refreshToken = (token: string) => api.post('/admin/refresh', {}, { headers: { Authorization: `Bearer ${token}` } })
+
+/** 批量写入里的一条操作；article / collection 的 id 为 slug，friend / artwork / sponsor 为数字主键。 */
+export interface BatchOperation {
+  op: 'create' | 'update' | 'delete'
+  type: 'article' | 'collection' | 'friend' | 'artwork' | 'sponsor'
+  id?: string | number
+  data?: Record<string, unknown>
+}
+
+/**
+ * 在一个事务里批量执行新增 / 修改 / 删除，任意一条失败则全部不生效。
+ *
+ * @param operations 操作列表（单次最多 1000 条）
+ * @returns 每条操作的结果（新建的记录带回 id）
+ */
+export const applyBatch = (operations: BatchOperation[]) => api.post('/admin/batch', { operations })
@@ -1,11 +1,23 @@
 import api from './index'
 
 /**
- * 获取所有的资产文件（例如图片）列表。
+ * 素材列表的查询参数（均可省略，默认列出 article 类型、按修改时间倒序的全部素材）。
+ */
+export interface AssetQuery {
+  type?: 'article' | 'artwork' | 'friend' | 'misc' | 'all'
+  sort?: 'mtime' | 'size' | 'name'
+  order?: 'asc' | 'desc'
+  limit?: number
+  cursor?: string
+}
+
+/**
+ * 获取资产文件（例如图片）列表。
  *
+ * @param query 类型筛选、排序与分页参数；传入 `limit` 时响应会附带 `next_cursor`
  * @returns 包含资产文件信息的响应
  */
-export const getAssets = () => api.get('/admin/assets')
+export const getAssets = (query?: AssetQuery) => api.get('/admin/assets', { params: query })
 
 /**
  * 上传一个新的资产文件（如图片）。
@@ -19,6 +31,8 @@ export const uploadAsset = (formData: FormData) => api.post('/upload', formData)
  * 根据文件名删除指定的资产文件。
  *
  * @param filename 要删除的文件名
+ * @param type 文件所属的上传类型，默认 `article`
  * @returns 删除操作的结果响应
  */
-export const deleteAsset = (filename: string) => api.delete('/admin/assets', { params: { filename } })
\ No newline at end of file
+export const deleteAsset = (filename: string, type?: Exclude<AssetQuery['type'], 'all'>) =>
+  api.delete('/admin/assets', { params: { filename, type } })
\ No newline at end of file
@@ -8,6 +8,9 @@ export interface ArticleSummary {
   title: string
   date: string
   collection_id: number | string | null
+  excerpt?: string | null // 后端保存时预先生成的纯文本摘要
+  word_count?: number
+  reading_time?: number // 预计阅读时长（分钟）
 }
 
 /**